@@ -1,8 +1,31 @@
 import os
 import json
+import hashlib
+from typing import AsyncIterator
 import google.generativeai as genai
 from ollama import AsyncClient
 from config import settings
+from single_flight import SingleFlight
+import metrics
+
+
+def _record_call(backend: str, mode: str, ok: bool, prompt_tokens=None, completion_tokens=None):
+    """Count one LLM call and the token usage the backend reported, if any."""
+    metrics.LLM_REQUESTS.inc(backend=backend, mode=mode, outcome="ok" if ok else "error")
+    if prompt_tokens:
+        metrics.LLM_TOKENS.inc(prompt_tokens, backend=backend, direction="prompt")
+    if completion_tokens:
+        metrics.LLM_TOKENS.inc(completion_tokens, backend=backend, direction="completion")
+
+
+def _gemini_usage(response) -> tuple:
+    usage = getattr(response, "usage_metadata", None)
+    return (getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
+
+
+class LLMStreamError(Exception):
+    """The upstream model failed mid-stream; str() is the bracketed error text."""
+
 
 class AIClient:
     def __init__(self):
@@ -15,16 +38,60 @@ class AIClient:
         else:
             print("[AI] Using Local Ollama Engine")
             # Connects to your local Ollama server
-            self.ollama_client = AsyncClient(host="http://localhost:11434")
+            self.ollama_client = AsyncClient(host=settings.ollama_host)
             self.model_name = "llama3"
+        self.single_flight = SingleFlight(
+            on_shared=lambda mode: metrics.LLM_COALESCED.inc(mode=mode)
+        )
+
+    def _fingerprint(self, prompt: str, max_tokens: int) -> str:
+        """Identity of an upstream call: same fingerprint, same request."""
+        model = settings.gemini_model if self.use_gemini else self.model_name
+        head = f"{model}\0{max_tokens}\0{settings.llm_temperature}\0"
+        return hashlib.sha256((head + prompt).encode("utf-8")).hexdigest()
 
     async def complete(self, prompt: str, max_tokens: int = 1500) -> dict:
-        """Asynchronous completion using either Gemini or Local Ollama."""
+        """Asynchronous completion using either Gemini or Local Ollama.
+
+        Concurrent calls with the same prompt and settings share one
+        upstream call (see SingleFlight).
+        """
+        if not settings.llm_single_flight:
+            return await self._complete(prompt, max_tokens)
+        result = await self.single_flight.call(
+            self._fingerprint(prompt, max_tokens), lambda: self._complete(prompt, max_tokens)
+        )
+        return {**result, "web_sources": list(result["web_sources"])}
+
+    async def _complete(self, prompt: str, max_tokens: int) -> dict:
         if self.use_gemini:
             return await self._complete_gemini(prompt, max_tokens)
         else:
             return await self._complete_ollama(prompt, max_tokens)
 
+    async def stream(self, prompt: str, max_tokens: int = 1500) -> AsyncIterator[str]:
+        """Asynchronous token streaming using either Gemini or Local Ollama.
+
+        Yields text fragments as soon as the upstream model produces them.
+        An upstream failure raises LLMStreamError (after any fragments
+        already yielded), so a partial answer is never mistaken for a full one.
+        Concurrent streams of the same prompt share one upstream stream.
+        """
+        if not settings.llm_single_flight:
+            stream = self._stream(prompt, max_tokens)
+        else:
+            stream = self.single_flight.stream(
+                self._fingerprint(prompt, max_tokens), lambda: self._stream(prompt, max_tokens)
+            )
+        async for piece in stream:
+            yield piece
+
+    def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        if self.use_gemini:
+            return self._stream_gemini(prompt, max_tokens)
+        else:
+            return self._stream_ollama(prompt, max_tokens)
+
     async def _complete_gemini(self, prompt: str, max_tokens: int) -> dict:
         try:
             # We use a thread-safe wrapper or just call it since it's a simple API call
@@ -34,11 +101,14 @@ class AIClient:
                 prompt,
                 generation_config=genai.types.GenerationConfig(
                     max_output_tokens=max_tokens,
-                    temperature=0.7,
+                    temperature=settings.llm_temperature,
                 )
             )
-            return {"text": response.text, "web_sources": []}
+            text = response.text
+            _record_call("gemini", "complete", True, *_gemini_usage(response))
+            return {"text": text, "web_sources": []}
         except Exception as e:
+            _record_call("gemini", "complete", False)
             return {"text": f"[Gemini Error] {str(e)}", "web_sources": []}
 
     async def _complete_ollama(self, prompt: str, max_tokens: int) -> dict:
@@ -46,11 +116,59 @@ class AIClient:
             response = await self.ollama_client.generate(
                 model=self.model_name,
                 prompt=prompt,
-                options={"num_predict": max_tokens},
+                options={"num_predict": max_tokens, "temperature": settings.llm_temperature},
+            )
+            _record_call(
+                "ollama", "complete", True,
+                response.get("prompt_eval_count"), response.get("eval_count"),
             )
             return {"text": response["response"], "web_sources": []}
         except Exception as e:
+            _record_call("ollama", "complete", False)
             return {
                 "text": f"[Ollama Error] Is Ollama running? Details: {str(e)}",
                 "web_sources": [],
             }
+
+    async def _stream_gemini(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        try:
+            response = await self.gemini_model.generate_content_async(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=settings.llm_temperature,
+                ),
+                stream=True,
+            )
+            async for chunk in response:
+                # Safety-blocked or empty chunks raise on .text access
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue
+                if text:
+                    yield text
+            _record_call("gemini", "stream", True, *_gemini_usage(response))
+        except Exception as e:
+            _record_call("gemini", "stream", False)
+            raise LLMStreamError(f"[Gemini Error] {str(e)}") from e
+
+    async def _stream_ollama(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        try:
+            parts = await self.ollama_client.generate(
+                model=self.model_name,
+                prompt=prompt,
+                options={"num_predict": max_tokens, "temperature": settings.llm_temperature},
+                stream=True,
+            )
+            usage = (None, None)
+            async for part in parts:
+                text = part["response"]
+                if text:
+                    yield text
+                if part.get("done"):
+                    usage = (part.get("prompt_eval_count"), part.get("eval_count"))
+            _record_call("ollama", "stream", True, *usage)
+        except Exception as e:
+            _record_call("ollama", "stream", False)
+            raise LLMStreamError(f"[Ollama Error] Is Ollama running? Details: {str(e)}") from e
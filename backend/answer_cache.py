@@ -0,0 +1,136 @@
+"""
+Semantic Answer Cache
+Serves stored LLM answers for near-duplicate questions, matched by
+cosine similarity of question embeddings within the same answer context.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def subject_key(subject: Optional[str]) -> str:
+    """Retrieval treats a missing subject and "General" alike (no filter)."""
+    if not subject or subject.lower() == "general":
+        return "general"
+    return subject
+
+
+class SemanticAnswerCache:
+    """
+    In-memory answer cache with TTL and LRU eviction.
+
+    An entry only matches when every context field agrees: student level,
+    explanation mode, subject, weak-subject flag and corpus version. Within
+    that context the closest stored question wins if its cosine similarity
+    reaches `threshold`.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 2000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple, set] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ─── Public API ──────────────────────────────────────────────────────────
+
+    def lookup(self, embedding: List[float], context: Tuple, corpus_version: int) -> Optional[Dict]:
+        """Return the cached payload for the nearest matching question, if any."""
+        key = self._bucket_key(context, corpus_version)
+        query = self._unit(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            ids = [i for i in list(self._buckets.get(key, ())) if not self._expired(i, now)]
+            best_id, best_score = None, -1.0
+            if ids:
+                matrix = np.stack([self._entries[i]["vector"] for i in ids])
+                scores = matrix @ query
+                pos = int(np.argmax(scores))
+                best_id, best_score = ids[pos], float(scores[pos])
+
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return {**self._entries[best_id]["payload"], "similarity": round(best_score, 4)}
+
+    def store(self, embedding: List[float], context: Tuple, corpus_version: int, payload: Dict):
+        key = self._bucket_key(context, corpus_version)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {
+                "vector": self._unit(embedding),
+                "bucket": key,
+                "subject": key[0],
+                "created": time.monotonic(),
+                "payload": payload,
+            }
+            self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate_subject(self, subject: Optional[str]):
+        """
+        Drop entries whose answers may depend on `subject`'s documents:
+        that subject's own entries plus unfiltered ("general") ones.
+        """
+        affected = {subject_key(subject), "general"}
+        with self._lock:
+            stale = [i for i, e in self._entries.items() if e["subject"] in affected]
+            for entry_id in stale:
+                self._drop(entry_id)
+        if stale:
+            print(f"[AnswerCache] Invalidated {len(stale)} entries for subject '{subject}'")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    # ─── Internals (caller holds the lock) ───────────────────────────────────
+
+    @staticmethod
+    def _bucket_key(context: Tuple, corpus_version: int) -> Tuple:
+        subject, *rest = context
+        return (subject_key(subject), *rest, corpus_version)
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _expired(self, entry_id: int, now: float) -> bool:
+        if now - self._entries[entry_id]["created"] <= self.ttl_seconds:
+            return False
+        self._drop(entry_id)
+        return True
+
+    def _drop(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        bucket = self._buckets.get(entry["bucket"])
+        if bucket is not None:
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[entry["bucket"]]
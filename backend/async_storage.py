@@ -0,0 +1,126 @@
+"""
+Async Storage Facade
+Lets async request handlers call the blocking storage components
+(RAGEngine, ConversationMemory, InsightTracker) without stalling the
+event loop. Each resource class gets its own sized thread pool with
+queue-depth and wait-time metrics for capacity planning.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class InstrumentedExecutor:
+    """
+    ThreadPoolExecutor that records how long calls wait for a free worker
+    (queue time) and how long they run. A growing wait time means the pool
+    is undersized for the load on that resource.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"store-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.run_total_s = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        submitted = time.perf_counter()
+        dequeued = False
+        with self._lock:
+            self.queued += 1
+
+        def call():
+            nonlocal dequeued
+            started = time.perf_counter()
+            waited = started - submitted
+            with self._lock:
+                dequeued = True
+                self.queued -= 1
+                self.active += 1
+                self.wait_total_s += waited
+                self.wait_max_s = max(self.wait_max_s, waited)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.failed += 0 if ok else 1
+                    self.run_total_s += time.perf_counter() - started
+
+        # Run with the caller's context so per-request state (metrics stage
+        # timings) follows the call onto the worker thread, as asyncio.to_thread does.
+        context = contextvars.copy_context()
+        try:
+            future = self._pool.submit(context.run, call)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+        def forget_if_never_started(_):
+            # A caller cancelled while waiting for a worker cancels the
+            # call before it starts, so call() never leaves the queue.
+            nonlocal dequeued
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self.queued -= 1
+
+        future.add_done_callback(forget_if_never_started)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.wait_total_s / done * 1000, 3),
+                "max_wait_ms": round(self.wait_max_s * 1000, 3),
+                "avg_run_ms": round(self.run_total_s / done * 1000, 3),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+class AsyncStore:
+    """
+    Async proxy over a blocking component: every public method becomes an
+    awaitable that runs on the component's executor. The wrapped object is
+    still reachable as `.sync` for code already running off the loop.
+    """
+
+    def __init__(self, component: Any, executor: InstrumentedExecutor):
+        self.sync = component
+        self.executor = executor
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.executor.run(attr, *args, **kwargs)
+
+        return call
@@ -0,0 +1,59 @@
+"""
+benchmarks/bench_chunking.py — Chunking throughput per strategy.
+Scales sample_syllabus.txt up to each target size and reports MB/s for
+whole-text and streamed (1 MB blocks) chunking.
+
+Run: python benchmarks/bench_chunking.py [--sizes 1 10 50] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from chunker import STRATEGIES, Chunker
+from config import settings
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'sample_syllabus.txt')
+BLOCK_CHARS = 1 << 20
+
+
+def scaled_text(size_mb: float) -> str:
+    with open(SAMPLE, encoding="utf-8") as f:
+        sample = f.read().strip() + "\n\n"
+    target = int(size_mb * 1024 * 1024)
+    return (sample * (target // len(sample.encode("utf-8")) + 1))[:target]
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(sizes, repeat):
+    print(f"\n✂️  Chunking throughput (chunk_size={settings.chunk_size}, overlap={settings.chunk_overlap})")
+    print(f"  {'strategy':<10}{'input':>9}{'chunks':>9}{'whole MB/s':>12}{'stream MB/s':>13}")
+    for size_mb in sizes:
+        text = scaled_text(size_mb)
+        mb = len(text.encode("utf-8")) / (1024 * 1024)
+        blocks = [text[i:i + BLOCK_CHARS] for i in range(0, len(text), BLOCK_CHARS)]
+        for strategy in STRATEGIES:
+            chunker = Chunker(strategy, settings.chunk_size, settings.chunk_overlap, settings.chunk_min_words)
+            count = len(chunker.chunk(text))
+            whole = best_of(repeat, lambda: chunker.chunk(text))
+            stream = best_of(repeat, lambda: sum(1 for _ in chunker.iter_chunks(blocks)))
+            print(f"  {strategy:<10}{mb:>7.1f}MB{count:>9}{mb / whole:>12.1f}{mb / stream:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="input sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
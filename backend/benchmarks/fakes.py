@@ -0,0 +1,62 @@
+"""
+benchmarks/fakes.py — Offline stand-ins for the embedding provider and the
+LLM client, so benchmarks measure our code rather than network round trips.
+The test suite uses the same HashEmbeddingProvider (tests/conftest.py), so
+benchmarks and tests see identical retrieval behaviour.
+"""
+
+import hashlib
+import math
+import os
+import sys
+from typing import AsyncIterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from embedding_provider import EmbeddingProvider
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Deterministic bag-of-hashed-words vectors, L2-normalized like real models."""
+
+    name = "hash"
+
+    def __init__(self, dimensions: int = 256):
+        super().__init__(f"bow-{dimensions}")
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            vec = [0.0] * self.dimensions
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+                vec[int.from_bytes(digest, "little") % self.dimensions] += 1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            vectors.append([v / norm for v in vec])
+        return vectors
+
+
+class StubAIClient:
+    """Same interface as AIClient; answers instantly with canned text."""
+
+    ANSWER = (
+        "Newton's second law states that force equals mass times acceleration. "
+        "For a 5 kg body accelerating at 3 m/s², the net force is 15 N.\n"
+    ) * 8
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt: str, max_tokens: int = 1500) -> dict:
+        self.calls += 1
+        if "follow-up" in prompt.lower():
+            return {"text": '["What is inertia?", "How is momentum defined?"]', "web_sources": []}
+        return {"text": self.ANSWER, "web_sources": []}
+
+    async def stream(self, prompt: str, max_tokens: int = 1500) -> AsyncIterator[str]:
+        self.calls += 1
+        for piece in self.ANSWER.split(" "):
+            yield piece + " "
@@ -0,0 +1,376 @@
+"""
+benchmarks/run_benchmarks.py — Offline micro-benchmarks for backend hot paths.
+
+Everything runs against temporary databases with a deterministic hash
+embedder and a stub LLM client, so no API key or network is needed.
+Results are written as JSON; pass an earlier file to --compare to see
+per-benchmark changes between commits.
+
+Run (from backend/):
+    python benchmarks/run_benchmarks.py                   # full suite
+    python benchmarks/run_benchmarks.py --quick           # smaller tables
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<old>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import HashEmbeddingProvider, StubAIClient
+
+SAMPLE = os.path.join(BACKEND, "sample_syllabus.txt")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SUBJECTS = ["Physics", "Mathematics", "Chemistry", "Biology"]
+QUESTIONS = [
+    "Explain Newton's second law of motion with an example",
+    "What is the formula for kinetic energy and how is it derived?",
+    "How does the first law of thermodynamics relate to internal energy?",
+    "Describe simple harmonic motion of a spring mass system",
+    "What are Kepler's laws of planetary motion?",
+    "How do you integrate a polynomial function step by step?",
+    "What is the difference between isothermal and adiabatic processes?",
+    "Define acceleration due to gravity and how it varies with altitude",
+]
+
+
+# ─── Measurement ─────────────────────────────────────────────────────────────
+
+def measure(fn: Callable[[], object], repeat: int = 20, warmup: int = 2) -> Dict:
+    """Time `fn` `repeat` times after `warmup` untimed calls; milliseconds."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the components' progress prints while fixtures are built."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def syllabus(size_mb: float) -> str:
+    with open(SAMPLE, encoding="utf-8") as f:
+        sample = f.read().strip() + "\n\n"
+    target = int(size_mb * 1024 * 1024)
+    return (sample * (target // len(sample.encode("utf-8")) + 1))[:target]
+
+
+def random_question(rng: random.Random) -> str:
+    words = rng.choice(QUESTIONS).split()
+    rng.shuffle(words)
+    return " ".join(words) + "?"
+
+
+# ─── Benchmarks ──────────────────────────────────────────────────────────────
+
+def bench_chunk_text(workdir: str, sizes) -> Dict:
+    from rag_engine import RAGEngine
+    with quiet():
+        rag = RAGEngine(persist_dir=os.path.join(workdir, "chunk_chroma"), embedding_provider=HashEmbeddingProvider())
+    text = syllabus(1.0)
+    stats = measure(lambda: rag._chunk_text(text), repeat=5, warmup=1)
+    stats["mb_per_s"] = round(1.0 / (stats["median_ms"] / 1000), 2)
+    stats["chunks"] = len(rag._chunk_text(text))
+    rag.close()
+    return {"chunk_text[1MB]": stats}
+
+
+def bench_retrieve(workdir: str, sizes) -> Dict:
+    from rag_engine import RAGEngine
+    with quiet():
+        rag = RAGEngine(persist_dir=os.path.join(workdir, "retrieve_chroma"), embedding_provider=HashEmbeddingProvider())
+        text = syllabus(sizes["corpus_mb"] / len(SUBJECTS))
+        for subject in SUBJECTS:
+            rag.add_document(text, {"filename": f"{subject}.txt", "subject": subject})
+    chunks = rag.count_chunks()
+    queries = iter(range(10 ** 9))
+
+    def run(subject):
+        return lambda: rag.retrieve(QUESTIONS[next(queries) % len(QUESTIONS)], subject_filter=subject)
+
+    with quiet():
+        results = {
+            f"retrieve[{chunks} chunks, subject]": {**measure(run("Physics")), "chunks": chunks},
+            f"retrieve[{chunks} chunks, all subjects]": {**measure(run(None)), "chunks": chunks},
+        }
+    rag.close()
+    return results
+
+
+def bench_build_prompt(workdir: str, sizes) -> Dict:
+    with quiet():
+        import main
+    from context_assembler import assemble_context
+    # Neighbouring chunks of one document, as retrieval tends to return them
+    chunks = [
+        {"text": c, "filename": "syllabus.txt", "subject": "Physics", "score": 0.8,
+         "doc_id": "bench", "chunk_index": i}
+        for i, c in enumerate(main.rag_engine._chunk_text(syllabus(0.05))[:5])
+    ]
+    history = [
+        {"question": q, "answer": StubAIClient.ANSWER, "type": "answered", "topic": "physics"}
+        for q in QUESTIONS[:6]
+    ]
+
+    def build():
+        context = assemble_context(chunks, main.settings.context_token_budget)
+        return main._build_prompt(QUESTIONS[0], context["text"], history, "intermediate", "detailed", True)
+
+    stats = measure(build, repeat=200)
+    context = assemble_context(chunks, main.settings.context_token_budget)
+    stats["context_tokens"] = context["tokens"]
+    stats["context_tokens_saved"] = context["tokens_saved"]
+    return {"build_prompt[5 chunks, 6 turns]": stats}
+
+
+def bench_memory(workdir: str, sizes) -> Dict:
+    import memory_manager
+    results = {}
+    for rows in sizes["memory_rows"]:
+        memory_manager.DB_PATH = os.path.join(workdir, f"memory_{rows}.db")
+        memory = memory_manager.ConversationMemory()
+        rng = random.Random(rows)
+        sessions = [f"s{i}" for i in range(max(1, rows // 50))]
+        now = datetime.now(timezone.utc).isoformat()
+        memory.conn.executemany(
+            "INSERT INTO turns (session_id, question, answer, turn_type, topic, timestamp) VALUES (?,?,?,?,?,?)",
+            ((rng.choice(sessions), random_question(rng), StubAIClient.ANSWER, "answered", "physics", now)
+             for _ in range(rows))
+        )
+        memory.conn.commit()
+
+        results[f"memory.get_history[{rows} turns]"] = measure(
+            lambda: memory.get_history(rng.choice(sessions), last_n=6), repeat=50
+        )
+        # Active session: repeated reads of the same history (cacheable)
+        results[f"memory.get_history_active[{rows} turns]"] = measure(
+            lambda: memory.get_history(sessions[0], last_n=6), repeat=200
+        )
+        results[f"memory.is_weak_topic[{rows} turns]"] = measure(
+            lambda: memory.is_weak_topic(rng.choice(sessions), "physics"), repeat=200
+        )
+        results[f"memory.add_turn[{rows} turns]"] = measure(
+            lambda: memory.add_turn(rng.choice(sessions), random_question(rng), StubAIClient.ANSWER), repeat=50
+        )
+
+        def burst():
+            for _ in range(1000):
+                memory.add_turn(rng.choice(sessions), random_question(rng), StubAIClient.ANSWER)
+            if memory.writes is not None:
+                memory.writes.flush()
+
+        stats = measure(burst, repeat=3, warmup=1)
+        stats["rows_per_s"] = round(1000 / (stats["median_ms"] / 1000))
+        results[f"memory.add_turn_committed[1000 turns, {rows} table]"] = stats
+        memory.close()
+    return results
+
+
+def bench_insights(workdir: str, sizes) -> Dict:
+    import insight_tracker
+    results = {}
+    for rows in sizes["insight_rows"]:
+        insight_tracker.DB_PATH = os.path.join(workdir, f"insights_{rows}.db")
+        tracker = insight_tracker.InsightTracker()
+        rng = random.Random(rows)
+        sessions = [f"s{i}" for i in range(max(1, rows // 50))]
+        now = datetime.now(timezone.utc).isoformat()
+        batch = []
+        for _ in range(rows):
+            question = random_question(rng)
+            batch.append((rng.choice(sessions), question, rng.choice(SUBJECTS),
+                          json.dumps(tracker._extract_keywords(question)), now))
+            if len(batch) == 50_000:
+                tracker.conn.executemany(
+                    "INSERT INTO questions (session_id, question, subject, keywords, timestamp) VALUES (?,?,?,?,?)", batch
+                )
+                batch = []
+        if batch:
+            tracker.conn.executemany(
+                "INSERT INTO questions (session_id, question, subject, keywords, timestamp) VALUES (?,?,?,?,?)", batch
+            )
+        tracker.conn.executemany(
+            "INSERT INTO confusion_reports (session_id, topic, confusion_level, timestamp) VALUES (?,?,?,?)",
+            ((rng.choice(sessions), rng.choice(["gravity", "entropy", "integration"]), rng.randint(1, 5), now)
+             for _ in range(rows // 10))
+        )
+        tracker.conn.commit()
+        # Bulk rows bypass record_question, so index them like a backfill
+        start = time.perf_counter()
+        tracker.rebuild_keyword_aggregates()
+        results[f"insights.backfill_keywords[{rows} rows]"] = {
+            "repeat": 1, **{k: round((time.perf_counter() - start) * 1000, 4)
+                            for k in ("min_ms", "median_ms", "mean_ms", "p95_ms")}
+        }
+
+        repeat = 3 if rows >= 1_000_000 else 10
+        session = lambda: rng.choice(sessions)
+        results[f"insights.get_global_top_topics[{rows} rows]"] = measure(
+            tracker.get_global_top_topics, repeat=repeat, warmup=1
+        )
+        results[f"insights.get_frequent_topics[{rows} rows]"] = measure(
+            lambda: tracker.get_frequent_topics(session()), repeat=repeat, warmup=1
+        )
+        results[f"insights.get_question_count[{rows} rows]"] = measure(
+            lambda: tracker.get_question_count(session()), repeat=repeat, warmup=1
+        )
+        results[f"insights.get_subjects[{rows} rows]"] = measure(
+            lambda: tracker.get_subjects(session()), repeat=repeat, warmup=1
+        )
+        results[f"insights.get_confusion_areas[{rows} rows]"] = measure(
+            lambda: tracker.get_confusion_areas(session()), repeat=repeat, warmup=1
+        )
+        results[f"insights.record_question[{rows} rows]"] = measure(
+            lambda: tracker.record_question(session(), random_question(rng), "Physics"), repeat=repeat, warmup=1
+        )
+        tracker.close()
+    return results
+
+
+def bench_ask(workdir: str, sizes) -> Dict:
+    """POST /ask end to end with the stub LLM (answer cache off)."""
+    from fastapi.testclient import TestClient
+    import main
+    from config import settings
+
+    main.ai_client = StubAIClient()
+    main.rag_engine.embedding_provider = HashEmbeddingProvider()
+    with quiet():
+        main.rag_engine.add_document(syllabus(0.2), {"filename": "syllabus.txt", "subject": "Physics"})
+    settings.answer_cache_enabled = False
+    rng = random.Random(7)
+    with TestClient(main.app) as client:
+        def ask():
+            response = client.post("/ask", json={
+                "question": random_question(rng), "session_id": "bench", "subject": "Physics",
+            })
+            assert response.status_code == 200, response.text
+
+        with quiet():
+            stats = measure(ask, repeat=30)
+    return {"ask_endpoint[stub LLM]": stats}
+
+
+BENCHMARKS = {
+    "chunk_text": bench_chunk_text,
+    "retrieve": bench_retrieve,
+    "build_prompt": bench_build_prompt,
+    "memory": bench_memory,
+    "insights": bench_insights,
+    "ask": bench_ask,
+}
+
+SIZES = {
+    "full": {"corpus_mb": 2.0, "memory_rows": [10_000, 100_000], "insight_rows": [10_000, 100_000, 1_000_000]},
+    "quick": {"corpus_mb": 0.25, "memory_rows": [10_000], "insight_rows": [10_000]},
+}
+
+
+# ─── Reporting ───────────────────────────────────────────────────────────────
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print median-time changes vs `baseline`; return the regressed names."""
+    regressions = []
+    print(f"\n  {'benchmark':<58}{'before':>11}{'after':>11}{'change':>9}")
+    for name, stats in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        change = stats["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<58}{old['median_ms']:>9.3f}ms{stats['median_ms']:>9.3f}ms{change:>+8.0%}{flag}")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline backend micro-benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small tables for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run a subset")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    sizes = SIZES["quick" if args.quick else "full"]
+    commit = git_commit()
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": "quick" if args.quick else "full",
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="neuralnotes-bench-") as workdir:
+        # main.py opens its stores relative to the working directory
+        os.chdir(workdir)
+        for name in args.only or BENCHMARKS:
+            print(f"▶ {name}", flush=True)
+            results = BENCHMARKS[name](workdir, sizes)
+            for label, stats in results.items():
+                print(f"  {label:<58}{stats['median_ms']:>10.3f} ms (median)")
+            report["results"].update(results)
+        os.chdir(BACKEND)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✦ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
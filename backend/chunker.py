@@ -0,0 +1,310 @@
+"""
+Chunker
+Offset-based chunking engine. Chunks are located by character offsets into
+the source text and cut out with a single slice, instead of re-joining word
+lists. Works on a whole string or on a stream of text pieces (PDF pages,
+file blocks) with memory bounded by the chunk window.
+
+Strategies (Config.chunk_strategy):
+  - sentence: sliding window of whole sentences, `chunk_overlap` words shared
+              between neighbours; over-long sentences fall back to fixed windows
+  - heading:  like sentence, but a heading line (markdown '#', ALL CAPS,
+              "Chapter 3: ...", short "Title:" lines) always starts a new chunk
+  - fixed:    fixed windows of `chunk_size` whitespace tokens, ignoring sentences
+"""
+
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+HEADING_MAX_CHARS = 100
+HEADING_MAX_WORDS = 12
+
+WORD_RE = re.compile(r"\S+")
+SENTENCE_END_RE = re.compile(r"[.!?](?=\s)")
+HEADING_LINE_RE = re.compile(r"^[^\S\n]*(\S[^\n]{0,%d})$" % (HEADING_MAX_CHARS - 1), re.MULTILINE)
+SECTION_RE = re.compile(r"(chapter|unit|section|module|part|lesson)\s+(\d+|[ivxlc]+)\b", re.IGNORECASE)
+WHITESPACE = " \t\n\r\f\v"
+
+STRATEGIES = ("sentence", "heading", "fixed")
+
+# Boundary kinds, in the order they apply when they share an offset
+HEADING_END, HEADING_START, SENTENCE_END = 0, 1, 2
+
+
+class Chunk(str):
+    """Chunk text that also carries its [start, end) offsets in the source."""
+
+    def __new__(cls, text: str, start: int, end: int):
+        chunk = super().__new__(cls, text)
+        chunk.start = start
+        chunk.end = end
+        return chunk
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > HEADING_MAX_CHARS or len(line.split()) > HEADING_MAX_WORDS:
+        return False
+    if line.startswith("#"):
+        return True
+    if line[-1] in ".!?":
+        return False
+    return (
+        line.endswith(":")
+        or bool(SECTION_RE.match(line))
+        or (line.upper() == line and any(c.isalpha() for c in line))
+    )
+
+
+class _Source:
+    """The not-yet-discarded tail of the source text, from absolute `base`."""
+
+    def __init__(self):
+        self.text = ""
+        self.base = 0
+
+    def append(self, piece: str):
+        self.text += piece
+
+    def slice(self, start: int, end: int) -> str:
+        return self.text[start - self.base:end - self.base]
+
+    def discard_before(self, offset: int):
+        # Keep one character before `offset` so line starts stay detectable.
+        # Only trim once the dead prefix dominates, so trimming stays O(n).
+        dead = offset - 1 - self.base
+        if dead > 65536 and dead * 2 > len(self.text):
+            self.text = self.text[dead:]
+            self.base += dead
+
+
+class Chunker:
+    """
+    All window arithmetic is done on offsets and per-sentence word counts;
+    individual words are only located (with precompiled skip patterns)
+    where a window boundary falls inside a sentence.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "sentence",
+        chunk_size: int = 250,
+        chunk_overlap: int = 50,
+        min_words: int = 20,
+        max_carry_chars: int = 100_000,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown chunk strategy: {strategy}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be >= 0 and smaller than chunk_size")
+        self.strategy = strategy
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_words = min_words
+        self.max_carry_chars = max_carry_chars
+        step = chunk_size - chunk_overlap
+        # Match exactly `chunk_size` words / skip `step` words plus trailing space
+        self._window_re = re.compile(r"(?:\S+\s+){%d}\S+" % (chunk_size - 1))
+        self._step_re = re.compile(r"(?:\S+\s+){%d}" % step)
+
+    @classmethod
+    def from_config(cls, config) -> "Chunker":
+        return cls(
+            strategy=config.chunk_strategy,
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            min_words=config.chunk_min_words,
+        )
+
+    def chunk(self, text: str) -> List[Chunk]:
+        return list(self.iter_chunks([text]))
+
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[Chunk]:
+        """
+        Chunk the concatenation of `pieces`. Offsets refer to that
+        concatenation, so pieces must carry their own separators.
+        """
+        return _Run(self).chunks(pieces)
+
+
+class _Run:
+    """State of one chunking pass. Every offset is absolute."""
+
+    def __init__(self, chunker: Chunker):
+        self.c = chunker
+        self.source = _Source()
+        self.step = chunker.chunk_size - chunker.chunk_overlap
+        self.chunk_start = self.chunk_end = self.chunk_words = 0
+        self.open_start = 0       # where the open sentence's text begins
+        self.counted_to = 0       # open sentence words are counted up to here
+        self.open_words = 0
+        self.long_sentence = False
+        self.headings_only = False  # the open chunk holds nothing but headings
+        self.out: List[Chunk] = []
+
+    # ─── Driver ──────────────────────────────────────────────────────────────
+
+    def chunks(self, pieces: Iterable[str]) -> Iterator[Chunk]:
+        for stop, final in self._regions(pieces):
+            self._scan(stop, final)
+            yield from self.out
+            self.out.clear()
+            first = self.chunk_start if self.chunk_words else self.open_start
+            self.source.discard_before(min(first, self.open_start))
+
+    def _regions(self, pieces: Iterable[str]) -> Iterator[Tuple[int, bool]]:
+        """
+        Yield absolute offsets up to which the text can be scanned: after the
+        last newline of what has arrived, or after the last whitespace once
+        the open line is too long to be a heading. No word or heading line
+        straddles a region end.
+        """
+        source = self.source
+        self.done = 0
+        line_start = 0   # absolute start of the last (open) line
+        for piece in pieces:
+            if not piece:
+                continue
+            source.append(piece)
+            buf, base = source.text, source.base
+            pos = self.done - base
+            newline = buf.rfind("\n", pos)
+            if newline != -1:
+                line_start = base + newline + 1
+            if base + len(buf) - line_start <= HEADING_MAX_CHARS:
+                cut = line_start - base   # the open line could still be a heading
+            else:
+                cut = max(buf.rfind(ch, pos) for ch in WHITESPACE) + 1
+            if cut <= pos:
+                if len(buf) - pos <= self.c.max_carry_chars:
+                    continue
+                cut = len(buf)   # no whitespace at all: don't buffer forever
+            yield base + cut, False
+            self.done = base + cut
+        yield source.base + len(source.text), True
+
+    def _scan(self, stop: int, final: bool):
+        buf, base = self.source.text, self.source.base
+        pos = self.done - base
+        end = stop - base
+        events = []
+        if self.c.strategy != "fixed":
+            events.extend((m.end() + base, SENTENCE_END) for m in SENTENCE_END_RE.finditer(buf, pos, end))
+        if self.c.strategy == "heading":
+            for m in HEADING_LINE_RE.finditer(buf, pos, end):
+                if m.end() == end and not final and buf[end - 1] != "\n":
+                    continue   # line continues in the next piece
+                line = m.group(1).rstrip()
+                if is_heading(line):
+                    events.append((m.start(1) + base, HEADING_START))
+                    events.append((m.start(1) + len(line) + base, HEADING_END))
+            events.sort()
+
+        for offset, kind in events:
+            words = self._close_sentence(offset)
+            if kind == HEADING_START:
+                # A new section never shares a chunk (or overlap) with the
+                # previous one; consecutive headings stay together.
+                if not self.headings_only:
+                    self._flush_chunk()
+                self.headings_only = True
+            elif kind == SENTENCE_END and words:
+                self.headings_only = False
+        if final:
+            self._close_sentence(stop)
+            self._flush_chunk()
+        else:
+            self._grow(stop)
+
+    # ─── Windowing ───────────────────────────────────────────────────────────
+
+    def _count(self, start: int, end: int) -> int:
+        return len(self.source.slice(start, end).split())
+
+    def _first_word(self, start: int) -> int:
+        base = self.source.base
+        return WORD_RE.search(self.source.text, start - base).start() + base
+
+    def _last_word_end(self, end: int) -> int:
+        text, base = self.source.text, self.source.base
+        i = end - base
+        while i > 0 and text[i - 1].isspace():
+            i -= 1
+        return i + base
+
+    def _emit(self, start: int, end: int, words: int):
+        if words > self.c.min_words:
+            self.out.append(Chunk(self.source.slice(start, end), start, end))
+
+    def _flush_chunk(self):
+        if self.chunk_words:
+            self._emit(self.chunk_start, self.chunk_end, self.chunk_words)
+        self.chunk_words = 0
+
+    def _window_end(self, start: int) -> int:
+        return self.c._window_re.match(self.source.text, start - self.source.base).end() + self.source.base
+
+    def _skip_step(self, start: int) -> int:
+        return self.c._step_re.match(self.source.text, start - self.source.base).end() + self.source.base
+
+    def _grow(self, stop: int):
+        """Count the open sentence up to `stop`; emit windows once it is over-long."""
+        self.open_words += self._count(self.counted_to, stop)
+        self.counted_to = stop
+        size = self.c.chunk_size
+        while self.open_words > size:
+            if not self.long_sentence:
+                self._flush_chunk()
+                self.long_sentence = True
+            start = self._first_word(self.open_start)
+            self._emit(start, self._window_end(start), size)
+            self.open_start = self._skip_step(start)
+            self.open_words -= self.step
+
+    def _close_sentence(self, end: int) -> int:
+        """Add the open sentence, ending at `end`, to the window. Returns its word count."""
+        words = self.open_words + self._count(self.counted_to, end)
+        start = self.open_start
+        self.open_start = self.counted_to = end
+        self.open_words = 0
+        long_sentence, self.long_sentence = self.long_sentence, False
+        if words == 0:
+            return 0
+        closed = words
+        start = self._first_word(start)
+        end = self._last_word_end(end)
+        size, overlap = self.c.chunk_size, self.c.chunk_overlap
+
+        if long_sentence or words > size:
+            # Over-long sentence: fixed windows stepping by size - overlap
+            self._flush_chunk()
+            while True:
+                if words <= size:
+                    self._emit(start, end, words)
+                else:
+                    self._emit(start, self._window_end(start), size)
+                if words <= self.step:
+                    break
+                start = self._skip_step(start)
+                words -= self.step
+        elif self.chunk_words and self.chunk_words + words > size:
+            prev_start, prev_end, prev_words = self.chunk_start, self.chunk_end, self.chunk_words
+            self._flush_chunk()
+            kept = min(overlap, prev_words)
+            self.chunk_start = self._overlap_start(prev_start, prev_end, prev_words) if kept else start
+            self.chunk_end = end
+            self.chunk_words = kept + words
+        else:
+            if not self.chunk_words:
+                self.chunk_start = start
+            self.chunk_end = end
+            self.chunk_words += words
+        return closed
+
+    def _overlap_start(self, start: int, end: int, words: int) -> int:
+        """Offset of the first of the last `chunk_overlap` words in [start, end)."""
+        overlap = self.c.chunk_overlap
+        if words <= overlap:
+            return start
+        prefix = self.source.slice(start, end).rsplit(None, overlap)[0]
+        return self._first_word(start + len(prefix))
@@ -22,25 +22,104 @@ class Config:
     # ── AI Model ──────────────────────────────────────────────────────────────
     gemini_model: str = "gemini-flash-lite-latest"
     max_tokens: int = 1500
+    llm_temperature: float = 0.7
+    llm_single_flight: bool = True      # identical concurrent prompts share one LLM call
 
     # ── RAG ───────────────────────────────────────────────────────────────────
     chroma_persist_dir: str = os.environ.get("CHROMA_STORE_PATH", "./chroma_store")
-    embedding_model: str = "models/gemini-embedding-001"
-    chunk_size: int = 400          # words
-    chunk_overlap: int = 80        # words
+    embedding_provider: str = os.environ.get("EMBEDDING_PROVIDER", "auto")   # auto | gemini | onnx | ollama
+    embedding_model: str = "models/gemini-embedding-001"   # gemini provider
+    local_embedding_batch_size: int = 32                   # onnx provider (all-MiniLM-L6-v2)
+    ollama_embedding_model: str = "nomic-embed-text"       # ollama provider
+    ollama_host: str = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+    chunk_strategy: str = "sentence"   # sentence | heading | fixed
+    chunk_size: int = 250          # words
+    chunk_overlap: int = 50        # words
+    chunk_min_words: int = 20      # shorter chunks are dropped
     retrieval_top_k: int = 5
+    context_token_budget: int = 2000    # retrieved text per prompt (~4 chars/token); 0 = unlimited
     retrieval_threshold: float = 0.25   # cosine similarity minimum
+    hybrid_retrieval: bool = True       # fuse BM25 lexical hits with dense hits
+    retrieval_candidates: int = 20      # per-retriever candidates before fusion
+    rrf_k: int = 60                     # reciprocal rank fusion constant
+    lexical_min_coverage: float = 0.5   # share of query terms a lexical hit must contain
+    lexical_index_file: str = "lexical_index.db"   # inside the chroma dir
+    document_catalog_file: str = "document_catalog.db"   # inside the chroma dir
+    embedding_timeout_s: float = 3.0    # query embedding budget before lexical fallback
+    query_embedding_workers: int = 4    # threads for query embeddings (held by calls past their timeout)
+    shard_query_workers: int = 4        # threads fanning a query out across subject shards
+    shard_query_timeout_s: float = 2.0  # fan-out deadline before lexical fallback
+    embedding_cache_size: int = 10000   # in-process LRU entries
+    embedding_cache_file: str = "embedding_cache.db"   # inside the chroma dir
+    embedding_batch_size: int = 64      # chunks per embed request
+    embedding_concurrency: int = 4      # batches embedded in parallel
+    embedding_max_attempts: int = 4     # per batch, including the first try
+    embedding_backoff_s: float = 1.0    # initial retry backoff (exponential)
+
+    # ── Answer Cache ──────────────────────────────────────────────────────────
+    answer_cache_enabled: bool = True
+    answer_cache_threshold: float = 0.95   # cosine similarity to reuse an answer
+    answer_cache_ttl_s: float = 3600.0
+    answer_cache_size: int = 2000
+
+    # ── SQLite (memory + insights) ────────────────────────────────────────────
+    sqlite_busy_timeout_s: float = 5.0   # wait for a competing writer before failing
+    sqlite_synchronous: str = "NORMAL"   # WAL + NORMAL: durable except on power loss
+    sqlite_cache_mb: int = 16            # page cache per connection
+    sqlite_mmap_mb: int = 64             # memory-mapped reads per connection
+    write_behind_enabled: bool = True    # batch turn/question inserts off the request path
+    write_behind_flush_ms: int = 50      # max time a row waits before its batch commits
+    write_behind_max_batch: int = 256    # rows per transaction
 
     # ── Memory ────────────────────────────────────────────────────────────────
     memory_db_path: str = "./studyai_memory.db"
     memory_history_window: int = 6      # turns to inject into prompt
+    history_cache_enabled: bool = True
+    history_cache_turns: int = 10       # recent turns kept per session (get_history default)
+    history_cache_budget_mb: int = 64   # all sessions together; idle sessions evicted first
+    weak_topic_threshold: int = 2       # earlier asks of a topic before it is treated as weak
+    weak_topic_decay_s: float = 7 * 24 * 3600   # a repeat after this long starts the count over; 0 = never
+    topic_cache_sessions: int = 10000   # sessions whose topic counters are kept in memory
 
     # ── Insights ──────────────────────────────────────────────────────────────
     insights_db_path: str = "./studyai_insights.db"
 
+    # ── Follow-ups ────────────────────────────────────────────────────────────
+    follow_up_cache_size: int = 1000      # tickets kept for deferred fetch
+    follow_up_concurrency: int = 2        # max concurrent follow-up LLM calls
+    follow_up_max_wait_s: float = 30.0    # long-poll ceiling for /follow-ups
+
+    # ── Quiz Pool ─────────────────────────────────────────────────────────────
+    quiz_pool_batch: int = 5                  # questions per generation call
+    quiz_pool_low_watermark: int = 6          # unseen questions left before a background refill
+    quiz_pool_max_per_topic: int = 60         # pooled questions per topic; oldest dropped first
+    quiz_pool_max_sessions: int = 10000       # sessions whose served questions are remembered
+    quiz_pool_max_topics: int = 1000          # topics whose questions are kept in memory
+    quiz_pool_refill_concurrency: int = 1     # background generations at once
+    quiz_pool_warm_topics: int = 10           # topics kept warm (top asked + indexed docs)
+    quiz_pool_warm_interval_s: float = 600.0  # 0 = no background warming
+    quiz_context_token_budget: int = 800      # syllabus text given to quiz generation
+    quiz_max_questions: int = 10
+
+    # ── Storage Executors ─────────────────────────────────────────────────────
+    # Thread pools that keep blocking storage calls off the event loop
+    rag_executor_workers: int = 4        # Chroma queries + embedding API calls
+    memory_executor_workers: int = 1     # conversation memory SQLite
+    insights_executor_workers: int = 1   # insight tracker SQLite
+    quiz_executor_workers: int = 1       # quiz pool SQLite
+
     # ── Upload ────────────────────────────────────────────────────────────────
     max_upload_size_mb: int = 50
     allowed_extensions: tuple = (".pdf", ".txt", ".md")
+    upload_spool_dir: Optional[str] = None   # None = system temp dir
+    pdf_workers: int = 2                # processes extracting PDF pages
+    pdf_pages_per_task: int = 8         # pages per extraction task
+    ingestion_workers: int = 2          # documents ingested concurrently
+    ingestion_queue_size: int = 32      # queued uploads before 503
+    ingestion_job_history: int = 500    # finished jobs kept for /jobs polling
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+    server_timing_header: bool = True    # per-stage breakdown on every response
 
     # ── Server ────────────────────────────────────────────────────────────────
     host: str = os.environ.get("HOST", "0.0.0.0")
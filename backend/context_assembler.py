@@ -0,0 +1,138 @@
+"""
+Context Assembler
+Turns retrieved chunks into the SYLLABUS block of the prompt. Neighbouring
+chunks of a document repeat `chunk_overlap` words of each other, so chunks
+with consecutive `chunk_index` are stitched into one span with the repeated
+words removed, exact duplicates are dropped, and chunks are admitted in
+score order until the token budget is spent.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4        # rough average for English prose
+MIN_OVERLAP_WORDS = 3      # shorter matches are treated as coincidence
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def overlap_chars(head: str, tail: str) -> int:
+    """
+    Length of the prefix of `tail` that repeats the end of `head` (whole
+    words, at least MIN_OVERLAP_WORDS, else 0). The remainder, tail[n:], is
+    what `tail` adds after `head`. Neighbouring chunks are slices of the same
+    source text, so the repeated span matches character for character.
+    """
+    head = head.rstrip()
+    words = tail.split(None, 1)
+    if not head or not words:
+        return 0
+    lead = len(tail) - len(tail.lstrip())
+    first = words[0]
+    pos = head.find(first, max(0, len(head) - len(tail)))
+    while pos != -1:   # leftmost match = longest overlap
+        end = lead + len(head) - pos
+        if (
+            (pos == 0 or head[pos - 1].isspace())
+            and tail.startswith(head[pos:], lead)
+            and (end == len(tail) or tail[end].isspace())
+        ):
+            if len(head[pos:].split(None, MIN_OVERLAP_WORDS)) < MIN_OVERLAP_WORDS:
+                return 0   # any later match is shorter still
+            return end
+        pos = head.find(first, pos + 1)
+    return 0
+
+
+def assemble_context(chunks: List[Dict], budget_tokens: int = 0) -> Dict:
+    """
+    `chunks` in score order (as returned by RAGEngine.retrieve). A chunk is
+    admitted if the text it adds, net of overlap with neighbours already
+    admitted, fits the remaining `budget_tokens` (0 = unlimited); the best
+    chunk is always admitted, truncated if it alone exceeds the budget.
+
+    Returns the context text, its estimated tokens, the tokens of the raw
+    chunks, and how many tokens de-duplication and the budget removed
+    (`tokens_saved` is both together).
+    """
+    tokens_in = sum(estimate_tokens(c["text"]) for c in chunks)
+    selected: Dict[object, Dict[int, Tuple[int, str]]] = {}   # doc -> index -> (rank, text)
+    seen = set()
+    used = over_budget = 0
+
+    for rank, chunk in enumerate(chunks):
+        text = chunk["text"]
+        if text in seen:
+            continue
+        doc = chunk.get("doc_id")
+        index = chunk.get("chunk_index")
+        if doc is None or index is None:
+            doc, index = ("chunk", rank), 0   # no position: stands alone
+        members = selected.setdefault(doc, {})
+        cost = _novel_tokens(text, members.get(index - 1), members.get(index + 1))
+        if budget_tokens and used + cost > budget_tokens:
+            if used:
+                over_budget += estimate_tokens(text)
+                continue
+            text = _truncate(text, budget_tokens)
+            over_budget += estimate_tokens(chunk["text"]) - estimate_tokens(text)
+            cost = estimate_tokens(text)
+        seen.add(chunk["text"])
+        members[index] = (rank, text)
+        used += cost
+
+    spans = []
+    for members in selected.values():
+        for run in _runs(members):
+            spans.append((min(rank for rank, _ in run), _stitch([text for _, text in run])))
+    spans.sort()
+    text = "\n".join(span for _, span in spans)
+    tokens = estimate_tokens(text)
+    return {
+        "text": text,
+        "spans": len(spans),
+        "tokens": tokens,
+        "tokens_in": tokens_in,
+        "tokens_saved": max(0, tokens_in - tokens),
+        "tokens_deduplicated": max(0, tokens_in - tokens - over_budget),
+        "tokens_over_budget": over_budget,
+    }
+
+
+# ─── Internals ───────────────────────────────────────────────────────────────
+
+def _novel_tokens(text: str, left: Optional[Tuple[int, str]], right: Optional[Tuple[int, str]]) -> int:
+    novel = len(text)
+    if left is not None:
+        novel -= overlap_chars(left[1], text)
+    if right is not None:
+        novel -= overlap_chars(text, right[1])
+    return math.ceil(max(0, novel) / CHARS_PER_TOKEN)
+
+
+def _truncate(text: str, budget_tokens: int) -> str:
+    limit = budget_tokens * CHARS_PER_TOKEN
+    cut = text.rfind(" ", 0, limit + 1)
+    return text[:cut if cut > 0 else limit]
+
+
+def _runs(members: Dict[int, Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+    """Members grouped into runs of consecutive chunk_index, in document order."""
+    runs: List[List[Tuple[int, str]]] = []
+    previous = None
+    for index in sorted(members):
+        if previous is None or index != previous + 1:
+            runs.append([])
+        runs[-1].append(members[index])
+        previous = index
+    return runs
+
+
+def _stitch(texts: List[str]) -> str:
+    out = texts[0]
+    for previous, text in zip(texts, texts[1:]):
+        n = overlap_chars(previous, text)
+        out += text[n:] if n else " " + text
+    return out
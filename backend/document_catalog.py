@@ -0,0 +1,87 @@
+"""
+Document Catalog
+Persistent per-document registry (one row per document, not per chunk), so
+RAGEngine can restore its document list at startup without reading the
+metadata of every chunk in the vector store.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+
+COLUMNS = ("doc_id", "filename", "subject", "chunk_count", "uploaded_at", "file_hash", "failed_chunks")
+
+
+class DocumentCatalog:
+    """
+    SQLite table of registry entries. Each write is its own transaction;
+    `replace_all` swaps the whole catalog atomically (used by repair).
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                filename TEXT,
+                subject TEXT,
+                chunk_count INTEGER,
+                uploaded_at TEXT,
+                file_hash TEXT,
+                failed_chunks INTEGER DEFAULT 0
+            )
+        """)
+        self.conn.commit()
+
+    def upsert(self, entry: Dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO documents VALUES ({','.join('?' * len(COLUMNS))})",
+                self._row(entry)
+            )
+
+    def remove(self, doc_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def replace_all(self, entries: Iterable[Dict]):
+        rows = [self._row(e) for e in entries]
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM documents")
+            self.conn.executemany(
+                f"INSERT INTO documents VALUES ({','.join('?' * len(COLUMNS))})", rows
+            )
+
+    def all(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM documents ORDER BY uploaded_at, doc_id"
+            ).fetchall()
+        entries = []
+        for row in rows:
+            entry = dict(zip(COLUMNS, row))
+            if not entry["failed_chunks"]:
+                entry.pop("failed_chunks")
+            entries.append(entry)
+        return entries
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @staticmethod
+    def _row(entry: Dict) -> tuple:
+        return (
+            entry["doc_id"],
+            entry.get("filename", "unknown"),
+            entry.get("subject", "General"),
+            entry.get("chunk_count", 0),
+            entry.get("uploaded_at", ""),
+            entry.get("file_hash", ""),
+            entry.get("failed_chunks", 0),
+        )
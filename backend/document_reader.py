@@ -0,0 +1,86 @@
+"""
+Document Reader
+Incremental text extraction for spooled uploads. PDF pages are extracted
+in parallel worker processes, but only a bounded window of page ranges is
+in flight at once, so memory stays flat regardless of document size.
+"""
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterator, List
+
+
+def extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """Worker-process entry point: extract pages [start, end) of a PDF."""
+    import pypdf
+
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def create_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn keeps workers lightweight (only this module and pypdf are
+    # imported) and avoids forking a threaded server process.
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def iter_pdf_pages(
+    path: str,
+    pool: Executor,
+    pages_per_task: int = 8,
+    max_in_flight: int = 4,
+) -> Iterator[str]:
+    """Yield page texts in document order, extracted `pages_per_task` at a time."""
+    import pypdf
+
+    try:
+        page_count = len(pypdf.PdfReader(path).pages)
+    except Exception as e:
+        raise ValueError(f"PDF extraction failed: {e}")
+
+    ranges = iter(
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    )
+    in_flight = deque()
+    for start, end in ranges:
+        in_flight.append(pool.submit(extract_page_range, path, start, end))
+        if len(in_flight) >= max_in_flight:
+            break
+
+    while in_flight:
+        try:
+            pages = in_flight.popleft().result()
+        except Exception as e:
+            for future in in_flight:
+                future.cancel()
+            raise ValueError(f"PDF extraction failed: {e}")
+        next_range = next(ranges, None)
+        if next_range is not None:
+            in_flight.append(pool.submit(extract_page_range, path, *next_range))
+        yield from pages
+
+
+def iter_text_blocks(path: str, block_chars: int = 1 << 20) -> Iterator[str]:
+    """
+    Yield a UTF-8 text file in blocks of roughly `block_chars` characters.
+    Blocks end on whitespace so no word is split across two blocks.
+    """
+    carry = ""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            block = f.read(block_chars)
+            if not block:
+                break
+            block = carry + block
+            cut = max(block.rfind(" "), block.rfind("\n"))
+            if cut == -1:
+                carry = block
+                continue
+            carry = block[cut + 1:]
+            yield block[:cut + 1]
+    if carry:
+        yield carry
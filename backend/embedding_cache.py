@@ -0,0 +1,169 @@
+"""
+Embedding Cache
+Two-tier cache for embedding vectors: an in-process LRU in front of a
+persistent SQLite table, so repeated queries and re-indexed chunks skip
+the embedding API entirely — even across restarts. Entries are addressed
+by content hash, so a re-uploaded document reuses the vector of every
+chunk that did not change.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+class EmbeddingCache:
+    """
+    Keys are derived from (KEY_VERSION, model, task_type, content hash), so
+    the same text embedded for retrieval_query vs retrieval_document, or by
+    another model, never collides. Bumping KEY_VERSION orphans every stored
+    row instead of reusing vectors keyed under an older normalization.
+
+      - Tier 1: OrderedDict LRU bounded by `max_entries`
+      - Tier 2: SQLite table `embeddings` (float32 BLOBs), unbounded
+    """
+
+    KEY_VERSION = 2   # 1: content hash also casefolded the text
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    task_type TEXT,
+                    vector BLOB,
+                    created_at TEXT
+                )
+            """)
+            self.conn.commit()
+
+    # ─── Keys ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # Whitespace only: embeddings are case-sensitive
+        return " ".join(text.split())
+
+    @classmethod
+    def content_hash(cls, text: str) -> str:
+        """Stable hash of a text's content; also stored on chunk metadata."""
+        return hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def make_key(cls, text: str, task_type: str, model: str) -> str:
+        raw = f"v{cls.KEY_VERSION}\x1f{model}\x1f{task_type}\x1f{cls.content_hash(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ─── Lookup / Store ──────────────────────────────────────────────────────
+
+    def get_many(self, texts: List[str], task_type: str, model: str) -> List[Optional[List[float]]]:
+        keys = [self.make_key(t, task_type, model) for t in texts]
+        found: List[Optional[List[float]]] = [None] * len(keys)
+        disk_lookup: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    found[i] = vec
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup and self.conn is not None:
+                for key, vec in self._load(list(disk_lookup)).items():
+                    self._remember(key, vec)
+                    for i in disk_lookup.pop(key):
+                        found[i] = vec
+                        self.disk_hits += 1
+
+            self.misses += sum(len(idx) for idx in disk_lookup.values())
+        return found
+
+    def put_many(self, texts: List[str], vectors: List[List[float]], task_type: str, model: str):
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        with self._lock:
+            for text, vec in zip(texts, vectors):
+                vec = list(vec)
+                key = self.make_key(text, task_type, model)
+                self._remember(key, vec)
+                rows.append((key, model, task_type, array("f", vec).tobytes(), now))
+            if rows and self.conn is not None:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?,?,?,?,?)", rows
+                )
+                self.conn.commit()
+
+    def get_or_embed(
+        self,
+        texts: List[str],
+        task_type: str,
+        model: str,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+    ) -> List[List[float]]:
+        """Return vectors for `texts`, calling `embed_fn` only for cache misses."""
+        vectors = self.get_many(texts, task_type, model)
+        missing: Dict[str, List[int]] = {}
+        for i, vec in enumerate(vectors):
+            if vec is None:
+                missing.setdefault(texts[i], []).append(i)
+
+        if missing:
+            to_embed = list(missing)
+            embedded = embed_fn(to_embed)
+            self.put_many(to_embed, embedded, task_type, model)
+            for text, vec in zip(to_embed, embedded):
+                for i in missing[text]:
+                    vectors[i] = list(vec)
+        return vectors
+
+    # ─── Stats ───────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._lru),
+            "max_entries": self.max_entries,
+        }
+
+    # ─── Internals (caller holds the lock) ───────────────────────────────────
+
+    def _remember(self, key: str, vec: List[float]):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _load(self, keys: List[str]) -> Dict[str, List[float]]:
+        out = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                out[key] = array("f", blob).tolist()
+        return out
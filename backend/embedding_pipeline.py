@@ -0,0 +1,121 @@
+"""
+Embedding Pipeline
+Embeds document chunks in bounded, concurrent, retried batches and hands
+each batch to a sink (the vector store) as soon as it is ready.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from tenacity import (
+    Retrying,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+SinkFn = Callable[[int, List[str], List[List[float]]], None]
+ProgressFn = Callable[[int, int], None]
+
+
+class EmbeddingPipeline:
+    """
+    Splits chunks into batches of `batch_size`, embeds up to
+    `max_concurrency` batches at once, retries each failed batch with
+    exponential backoff, and writes finished batches immediately — so a
+    bad batch never discards the ones already stored.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        batch_size: int = 64,
+        max_concurrency: int = 4,
+        max_attempts: int = 4,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 30.0,
+        non_retryable: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.embed_fn = embed_fn
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        # Errors that will fail identically on every attempt (bad credentials,
+        # invalid input) are surfaced immediately instead of backing off.
+        self.non_retryable = non_retryable
+
+    def run(
+        self,
+        chunks: Iterable[str],
+        sink: SinkFn,
+        on_progress: Optional[ProgressFn] = None,
+    ) -> Dict:
+        """
+        Embed `chunks` and call `sink(start_index, texts, vectors)` per batch.
+        Sinks run on the calling thread, in completion order.
+
+        `chunks` may be a lazy iterator: it is consumed batch by batch and at
+        most 2 × max_concurrency batches are held in memory at once. Progress
+        is reported as (stored, total) — total is the number of chunks seen
+        so far when the input length is not known up front.
+
+        Returns {"stored": int, "total": int, "failed": [{"start", "size", "error"}]}.
+        """
+        known_total = len(chunks) if isinstance(chunks, (list, tuple)) else None
+        stored, seen, failed = 0, 0, []
+        in_flight = {}
+
+        def collect(return_when):
+            nonlocal stored
+            done, _ = wait(list(in_flight), return_when=return_when)
+            for future in done:
+                start, texts = in_flight.pop(future)
+                try:
+                    vectors = future.result()
+                    sink(start, texts, vectors)
+                    stored += len(texts)
+                except Exception as e:
+                    print(f"[Embed] Batch at chunk {start} ({len(texts)} chunks) failed: {e}")
+                    failed.append({"start": start, "size": len(texts), "error": str(e)})
+                if on_progress:
+                    on_progress(stored, known_total if known_total is not None else seen)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for start, texts in self._batches(chunks):
+                seen += len(texts)
+                while len(in_flight) >= 2 * self.max_concurrency:
+                    collect(FIRST_COMPLETED)
+                in_flight[pool.submit(self._embed_with_retry, texts)] = (start, texts)
+            while in_flight:
+                collect(FIRST_COMPLETED)
+
+        failed.sort(key=lambda f: f["start"])
+        return {"stored": stored, "total": seen, "failed": failed}
+
+    def _batches(self, chunks: Iterable[str]) -> Iterator[Tuple[int, List[str]]]:
+        it = iter(chunks)
+        start = 0
+        while True:
+            batch = list(islice(it, self.batch_size))
+            if not batch:
+                return
+            yield start, batch
+            start += len(batch)
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_exponential_jitter(multiplier=self.backoff_initial, max=self.backoff_max),
+            retry=retry_if_not_exception_type(self.non_retryable),
+            reraise=True,
+        )
+        for attempt in retrying:
+            with attempt:
+                vectors = self.embed_fn(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+                return vectors
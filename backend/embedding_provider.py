@@ -0,0 +1,162 @@
+"""
+Embedding Providers
+Pluggable text-embedding backends selected from Config:
+
+  - gemini: Google Gemini embedding API (default when GEMINI_API_KEY is set)
+  - onnx:   all-MiniLM-L6-v2 run in-process on CPU via onnxruntime
+  - ollama: a local Ollama server's /api/embed endpoint
+
+All providers embed a whole batch per call and return plain float lists.
+"""
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Type
+
+from config import Config, settings
+
+
+class EmbeddingProviderError(RuntimeError):
+    """A provider cannot serve embeddings at all (missing model, bad config)."""
+
+
+class EmbeddingProvider(ABC):
+    """
+    Base class. `model_id` namespaces cached vectors and vector collections,
+    so switching provider or model never mixes incompatible embeddings.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}/{self.model}"
+
+    @property
+    def non_retryable(self) -> Tuple[Type[BaseException], ...]:
+        """Exceptions that retrying a batch cannot fix."""
+        return (EmbeddingProviderError,)
+
+    @abstractmethod
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """One vector per text, in order."""
+
+    def close(self):
+        pass
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    name = "gemini"
+
+    def __init__(self, model: str, api_key: str):
+        import google.generativeai as genai
+        super().__init__(model)
+        self._genai = genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        else:
+            print("[Embeddings] WARNING: GEMINI_API_KEY not found. Embeddings will fail.")
+
+    @property
+    def model_id(self) -> str:
+        # Bare model name: keeps vectors cached before providers existed valid
+        return self.model
+
+    @property
+    def non_retryable(self):
+        from google.api_core import exceptions as google_exceptions
+        from google.auth import exceptions as google_auth_exceptions
+        return (
+            EmbeddingProviderError,
+            google_auth_exceptions.GoogleAuthError,
+            google_exceptions.InvalidArgument,
+            google_exceptions.PermissionDenied,
+            google_exceptions.Unauthenticated,
+        )
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        res = self._genai.embed_content(model=self.model, content=texts, task_type=task_type)
+        return res['embedding']
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """
+    In-process CPU embeddings using the ONNX build of all-MiniLM-L6-v2 that
+    ships with chromadb. The model (~80 MB) is fetched once into
+    ~/.cache/chroma on first use; after that no network is needed.
+    """
+
+    name = "onnx"
+    MODEL = "all-MiniLM-L6-v2"
+
+    def __init__(self, batch_size: int = 32):
+        super().__init__(self.MODEL)
+        self.batch_size = batch_size
+        self._fn = None
+        self._load_lock = threading.Lock()
+
+    def _model(self):
+        with self._load_lock:
+            if self._fn is None:
+                try:
+                    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+                    fn = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+                    fn(["warm up"])   # forces download + session creation
+                except Exception as e:
+                    raise EmbeddingProviderError(f"ONNX embedding model unavailable: {e}") from e
+                self._fn = fn
+        return self._fn
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        fn = self._model()
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend([float(x) for x in v] for v in fn(texts[start:start + self.batch_size]))
+        return vectors
+
+
+class OllamaEmbeddingProvider(EmbeddingProvider):
+    name = "ollama"
+
+    def __init__(self, model: str, host: str):
+        from ollama import Client
+        super().__init__(model)
+        self._client = Client(host=host)
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        response = self._client.embed(model=self.model, input=texts)
+        return [list(v) for v in response["embeddings"]]
+
+
+def collection_suffix(provider: EmbeddingProvider) -> str:
+    """Chroma-safe slug of the provider's model id ('' for the original Gemini model)."""
+    if provider.model_id == "models/gemini-embedding-001":
+        return ""
+    return re.sub(r"[^a-zA-Z0-9]+", "-", provider.model_id).strip("-").lower()
+
+
+def create_embedding_provider(config: Optional[Config] = None) -> EmbeddingProvider:
+    """
+    Build the provider named by `config.embedding_provider`. "auto" uses
+    Gemini when an API key is configured and the local ONNX model otherwise.
+    """
+    config = config or settings
+    choice = config.embedding_provider.lower()
+    if choice == "auto":
+        choice = "gemini" if config.gemini_api_key else "onnx"
+
+    if choice == "gemini":
+        provider = GeminiEmbeddingProvider(config.embedding_model, config.gemini_api_key)
+    elif choice == "onnx":
+        provider = OnnxEmbeddingProvider(config.local_embedding_batch_size)
+    elif choice == "ollama":
+        provider = OllamaEmbeddingProvider(config.ollama_embedding_model, config.ollama_host)
+    else:
+        raise ValueError(f"Unknown embedding provider: {config.embedding_provider}")
+
+    print(f"[Embeddings] Using {provider.name} embedding model: {provider.model}")
+    return provider
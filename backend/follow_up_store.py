@@ -0,0 +1,86 @@
+"""
+Follow-up Store
+Computes follow-up suggestions off the /ask critical path and keeps the
+results in a bounded in-memory cache until the client fetches them.
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class FollowUpStore:
+    """
+    Bounded ticket → suggestions cache fed by background tasks.
+
+    Generation runs under its own semaphore so follow-up calls can never
+    occupy more than `max_concurrency` LLM slots, leaving the rest for
+    primary answers. The oldest tickets are evicted once `max_entries`
+    is exceeded; an evicted ticket's generation is cancelled, since
+    nobody can fetch its result.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_concurrency: int = 2):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set = set()
+
+    def submit(self, generate: Callable[[], Awaitable[List[str]]]) -> str:
+        """Schedule `generate()` in the background and return its ticket."""
+        ticket = uuid.uuid4().hex[:12]
+        task = asyncio.create_task(self._run(ticket, generate))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._entries[ticket] = {
+            "status": "pending",
+            "suggestions": [],
+            "ready": asyncio.Event(),
+            "task": task,
+        }
+        self._evict()
+        return ticket
+
+    async def _run(self, ticket: str, generate: Callable[[], Awaitable[List[str]]]):
+        async with self._semaphore:
+            try:
+                suggestions = await generate()
+                status = "ready"
+            except Exception as e:
+                print(f"[FollowUps] Generation failed for {ticket}: {e}")
+                suggestions, status = [], "failed"
+
+        entry = self._entries.get(ticket)
+        if entry is None:  # evicted while generating
+            return
+        entry["suggestions"] = suggestions
+        entry["status"] = status
+        entry["ready"].set()
+
+    def get(self, ticket: str) -> Optional[Dict]:
+        entry = self._entries.get(ticket)
+        if entry is None:
+            return None
+        return {"status": entry["status"], "follow_up_suggestions": entry["suggestions"]}
+
+    async def wait(self, ticket: str, timeout: float) -> Optional[Dict]:
+        """Long-poll: block up to `timeout` seconds for the ticket to resolve."""
+        entry = self._entries.get(ticket)
+        if entry is None:
+            return None
+        if timeout > 0 and not entry["ready"].is_set():
+            try:
+                await asyncio.wait_for(entry["ready"].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(ticket)
+
+    def pending_count(self) -> int:
+        return sum(1 for e in self._entries.values() if e["status"] == "pending")
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            _, entry = self._entries.popitem(last=False)
+            entry["task"].cancel()   # frees its semaphore slot if generating
+            entry["ready"].set()     # long-pollers return (ticket now unknown)
@@ -0,0 +1,153 @@
+"""
+Session History Cache
+Write-through cache of each active session's most recent turns, so
+get_history on the /ask and /insights paths is served from memory instead
+of re-reading and re-materializing answer text from SQLite.
+"""
+
+import itertools
+import sys
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional
+
+ENTRY_OVERHEAD_BYTES = 400   # dict + deque slot + small strings, roughly
+
+
+def entry_size(entry: Dict) -> int:
+    return ENTRY_OVERHEAD_BYTES + sum(
+        sys.getsizeof(v) for v in (entry["question"], entry["answer"], entry["topic"])
+    )
+
+
+class _Ring:
+    __slots__ = ("turns", "bytes", "complete")
+
+    def __init__(self, capacity: int):
+        self.turns: Deque[Dict] = deque(maxlen=capacity)
+        self.bytes = 0
+        self.complete = False   # holds every turn the session has (fewer than capacity)
+
+
+class HistoryCache:
+    """
+    Per-session ring buffer of the last `turns_per_session` turns under a
+    global byte budget; the least recently used sessions are evicted first.
+
+    No stale reads: every write for a cached session is appended here in
+    the same critical section as the write itself (callers hold `lock`),
+    and a cache fill only installs if no write to that session happened
+    while it was reading the database (`begin_fill` / `finish_fill`).
+    All writes must go through the owning ConversationMemory.
+    """
+
+    def __init__(self, turns_per_session: int = 10, budget_bytes: int = 64 * 1024 * 1024):
+        self.capacity = turns_per_session
+        self.budget_bytes = budget_bytes
+        self.lock = threading.RLock()
+        self._rings: "OrderedDict[str, _Ring]" = OrderedDict()
+        self._fills: Dict[str, int] = {}
+        self._tokens = itertools.count(1)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def get(self, session_id: str, last_n: int) -> Optional[List[Dict]]:
+        """The last `last_n` turns if the cache can answer, else None."""
+        with self.lock:
+            if last_n > self.capacity:
+                self.bypassed += 1
+                return None
+            ring = self._rings.get(session_id)
+            if ring is None or (len(ring.turns) < last_n and not ring.complete):
+                self.misses += 1
+                return None
+            self._rings.move_to_end(session_id)
+            self.hits += 1
+            turns = list(ring.turns)
+        return [dict(t) for t in turns[-last_n:]] if last_n > 0 else []
+
+    def begin_fill(self, session_id: str) -> int:
+        """Register a database read for `session_id`; returns its token."""
+        with self.lock:
+            token = next(self._tokens)
+            self._fills[session_id] = token
+            return token
+
+    def finish_fill(self, session_id: str, token: int, history: List[Dict]):
+        """Install `history` (the session's newest `capacity` turns) unless a write raced it."""
+        with self.lock:
+            if self._fills.get(session_id) != token:
+                return
+            del self._fills[session_id]
+            self._drop(session_id)
+            ring = _Ring(self.capacity)
+            for entry in history[-self.capacity:]:
+                entry = dict(entry)
+                ring.turns.append(entry)
+                ring.bytes += entry_size(entry)
+            ring.complete = len(history) < self.capacity
+            self._rings[session_id] = ring
+            self.bytes += ring.bytes
+            self._enforce_budget(keep=session_id)
+
+    def append(self, session_id: str, entry: Dict):
+        """Write-through for a new turn; call while holding `lock` around the write."""
+        with self.lock:
+            self._fills.pop(session_id, None)   # an in-flight fill may predate this write
+            ring = self._rings.get(session_id)
+            if ring is None:
+                return
+            if len(ring.turns) == ring.turns.maxlen:
+                evicted = entry_size(ring.turns[0])
+                ring.bytes -= evicted
+                self.bytes -= evicted
+                ring.complete = False
+            entry = dict(entry)
+            ring.turns.append(entry)
+            size = entry_size(entry)
+            ring.bytes += size
+            self.bytes += size
+            self._rings.move_to_end(session_id)
+            self._enforce_budget(keep=session_id)
+
+    def invalidate(self, session_id: str):
+        with self.lock:
+            self._fills.pop(session_id, None)
+            self._drop(session_id)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "sessions": len(self._rings),
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+                "budget_bytes": self.budget_bytes,
+                "turns_per_session": self.capacity,
+            }
+
+    # ─── Internals (caller holds the lock) ───────────────────────────────────
+
+    def _drop(self, session_id: str):
+        ring = self._rings.pop(session_id, None)
+        if ring is not None:
+            self.bytes -= ring.bytes
+
+    def _enforce_budget(self, keep: str):
+        while self.bytes > self.budget_bytes and len(self._rings) > 1:
+            oldest = next(iter(self._rings))
+            if oldest == keep:
+                self._rings.move_to_end(oldest)
+                continue
+            self._drop(oldest)
+            self.evictions += 1
+        if self.bytes > self.budget_bytes:
+            self._drop(keep)   # a single session larger than the whole budget
+            self.evictions += 1
@@ -0,0 +1,159 @@
+"""
+Ingestion Queue
+Runs document ingestion (parsing, chunking, embedding, storing) on a
+bounded worker pool off the request path and tracks per-job status.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+class QueueFullError(Exception):
+    """Raised when the ingestion backlog is at capacity."""
+
+
+class IngestionJob:
+    """Mutable status record for one upload; updated from worker threads."""
+
+    def __init__(self, filename: str, subject: str, payload: Dict[str, Any]):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.filename = filename
+        self.subject = subject
+        self.payload = payload
+        self.status = "queued"          # queued | running | done | failed
+        self.stage = "queued"           # queued → parsing → chunking → embedding ⇄ storing → done
+        self.progress = {"done": 0, "total": 0}
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at: Optional[str] = None
+        self.stage_seconds: Dict[str, float] = {}
+        self._stage_started = time.perf_counter()
+
+    def set_stage(self, stage: str):
+        self._end_stage()
+        self.stage = stage
+
+    def _end_stage(self):
+        now = time.perf_counter()
+        elapsed = now - self._stage_started
+        self.stage_seconds[self.stage] = self.stage_seconds.get(self.stage, 0.0) + elapsed
+        self._stage_started = now
+
+    def set_progress(self, done: int, total: int):
+        self.progress = {"done": done, "total": total}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "subject": self.subject,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionQueue:
+    """
+    asyncio.Queue drained by `workers` tasks. Each job's `handler(job)` is
+    blocking (PDF parsing, embedding) and runs in a worker thread, so the
+    event loop stays free for interactive requests.
+
+    Finished jobs are kept for status polling up to `history_size`.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[IngestionJob], Dict[str, Any]],
+        workers: int = 2,
+        max_pending: int = 32,
+        history_size: int = 500,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    def submit(self, filename: str, subject: str, payload: Dict[str, Any]) -> IngestionJob:
+        self._ensure_workers()
+        job = IngestionJob(filename, subject, payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Ingestion queue is full, try again shortly")
+        self._jobs[job.job_id] = job
+        self._trim_history()
+        return job
+
+    def record_completed(self, filename: str, subject: str, result: Dict[str, Any]) -> IngestionJob:
+        """Register a job that needed no work (e.g. a duplicate upload)."""
+        job = IngestionJob(filename, subject, {})
+        job.status = job.stage = "done"
+        job.result = result
+        job.finished_at = job.created_at
+        self._jobs[job.job_id] = job
+        self._trim_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def pending_count(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # ─── Internals ───────────────────────────────────────────────────────────
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._tasks = [
+                asyncio.create_task(self._worker(i)) for i in range(self.workers)
+            ]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.result = await asyncio.to_thread(self.handler, job)
+                job.status = "done"
+            except Exception as e:
+                print(f"[Ingest] Job {job.job_id} failed during {job.stage}: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.payload = {}  # release upload bytes
+                job.finished_at = datetime.now(timezone.utc).isoformat()
+                job._end_stage()  # credit the time to the last real stage, not "done"
+                if job.status == "done":
+                    job.stage = "done"
+                for stage, seconds in job.stage_seconds.items():
+                    metrics.observe_stage("ingestion", stage, seconds)
+                self._queue.task_done()
+
+    def _trim_history(self):
+        while len(self._jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            self._jobs.pop(oldest_id)
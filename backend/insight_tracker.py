@@ -2,24 +2,70 @@
 Insight Tracker
 Tracks frequently asked topics, confusion reports, and learning history.
 Uses SQLite for persistence.
+
+Question keywords are normalized into `keywords` / `question_keywords`,
+and per-session and global keyword counts are kept as aggregate tables
+updated in the same transaction as each question. Top-topic queries read
+the aggregates through (count DESC) indexes, so their cost does not grow
+with the number of questions asked.
+
+Questions are recorded through a write-behind queue and committed in
+batches; per-session reads wait on a barrier for that session's queued
+questions, global reads for the whole queue.
 """
 
 import sqlite3
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import Dict, Iterable, List, Tuple
 from collections import Counter
 import json
 
+from config import settings
+from sqlite_db import SQLiteDatabase
+from write_behind import WriteBehindQueue
+
 DB_PATH = "./studyai_insights.db"
 
+BACKFILL_BATCH = 10_000
+
 
 class InsightTracker:
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        self._init_db()
+        self.db = SQLiteDatabase(DB_PATH)
+        self.db.migrate([self._migration_1_keyword_tables, self._migration_2_session_indexes])
+        self.writes = None
+        if settings.write_behind_enabled:
+            self.writes = WriteBehindQueue(
+                "insights", self.db, self._insert_questions,
+                flush_interval_s=settings.write_behind_flush_ms / 1000,
+                max_batch=settings.write_behind_max_batch,
+            )
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's connection."""
+        return self.db.connection()
 
-    def _init_db(self):
-        self.conn.execute("""
+    def close(self):
+        """Flush queued questions, then close every connection."""
+        if self.writes is not None:
+            self.writes.close()
+        self.db.close()
+
+    def _read_own_writes(self, session_id: str = None):
+        """Wait until queued questions (of one session, or all) are committed."""
+        if self.writes is None:
+            return
+        if session_id is None:
+            self.writes.flush()
+        else:
+            self.writes.barrier(session_id)
+
+    # ─── Schema migrations (index + 1 = PRAGMA user_version) ─────────────────
+
+    def _migration_1_keyword_tables(self, conn: sqlite3.Connection):
+        """Base tables, plus normalized keyword tables and aggregates backfilled from questions."""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS questions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 session_id TEXT,
@@ -29,7 +75,7 @@ class InsightTracker:
                 timestamp TEXT
             )
         """)
-        self.conn.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS confusion_reports (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 session_id TEXT,
@@ -38,7 +84,7 @@ class InsightTracker:
                 timestamp TEXT
             )
         """)
-        self.conn.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS documents (
                 doc_id TEXT PRIMARY KEY,
                 filename TEXT,
@@ -46,15 +92,137 @@ class InsightTracker:
                 added_at TEXT
             )
         """)
-        self.conn.commit()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS keywords (
+                id INTEGER PRIMARY KEY,
+                keyword TEXT UNIQUE NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS question_keywords (
+                question_id INTEGER NOT NULL,
+                keyword_id INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS keyword_counts (
+                keyword_id INTEGER PRIMARY KEY,
+                count INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_keyword_counts (
+                session_id TEXT NOT NULL,
+                keyword_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (session_id, keyword_id)
+            )
+        """)
+        backfilled = self._backfill_keywords()
+        # Indexes after the backfill: one sort instead of per-row upkeep
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_question_keywords_question ON question_keywords(question_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_keyword_counts_top ON keyword_counts(count DESC, keyword_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_session_keyword_counts_top "
+            "ON session_keyword_counts(session_id, count DESC, keyword_id)"
+        )
+        if backfilled:
+            print(f"[Insights] Backfilled keyword aggregates for {backfilled} questions")
+
+    def _migration_2_session_indexes(self, conn: sqlite3.Connection):
+        """Per-session lookups; (session_id, subject) also covers get_subjects."""
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_session ON questions(session_id, subject)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_confusion_reports_session ON confusion_reports(session_id, topic)"
+        )
+
+    # ─── Keyword aggregates ──────────────────────────────────────────────────
+
+    def rebuild_keyword_aggregates(self) -> int:
+        """Recompute the keyword tables from `questions.keywords` (repair / bulk loads)."""
+        self._read_own_writes()
+        with self.conn:
+            for table in ("question_keywords", "keyword_counts", "session_keyword_counts"):
+                self.conn.execute(f"DELETE FROM {table}")
+            return self._backfill_keywords()
+
+    def _backfill_keywords(self) -> int:
+        """Index every question's stored keywords in batches; caller owns the transaction."""
+        last_id, total = 0, 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT id, session_id, keywords FROM questions WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, BACKFILL_BATCH)
+            ).fetchall()
+            if not rows:
+                return total
+            self._index_keywords(
+                (qid, session_id, json.loads(keywords or "[]")) for qid, session_id, keywords in rows
+            )
+            last_id = rows[-1][0]
+            total += len(rows)
+
+    def _index_keywords(self, questions: Iterable[Tuple[int, str, List[str]]]):
+        """Add (question_id, session_id, keywords) rows to the keyword tables and aggregates."""
+        links, global_counts, session_counts = [], Counter(), Counter()
+        questions = list(questions)
+        ids = self._keyword_ids({k for _, _, keywords in questions for k in keywords})
+        for question_id, session_id, keywords in questions:
+            for keyword in keywords:
+                keyword_id = ids[keyword]
+                links.append((question_id, keyword_id))
+                global_counts[keyword_id] += 1
+                session_counts[(session_id, keyword_id)] += 1
+        self.conn.executemany("INSERT INTO question_keywords VALUES (?, ?)", links)
+        self.conn.executemany(
+            "INSERT INTO keyword_counts VALUES (?, ?) "
+            "ON CONFLICT(keyword_id) DO UPDATE SET count = count + excluded.count",
+            global_counts.items()
+        )
+        self.conn.executemany(
+            "INSERT INTO session_keyword_counts VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id, keyword_id) DO UPDATE SET count = count + excluded.count",
+            ((session_id, keyword_id, n) for (session_id, keyword_id), n in session_counts.items())
+        )
+
+    def _keyword_ids(self, keywords) -> Dict[str, int]:
+        # Sorted so ids (the tie-breaker for equal counts) are deterministic
+        keywords = sorted(keywords)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO keywords (keyword) VALUES (?)", ((k,) for k in keywords)
+        )
+        ids = {}
+        for start in range(0, len(keywords), 500):
+            batch = keywords[start:start + 500]
+            ids.update(self.conn.execute(
+                f"SELECT keyword, id FROM keywords WHERE keyword IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return ids
 
     def record_question(self, session_id: str, question: str, subject: str = None):
-        keywords = self._extract_keywords(question)
-        self.conn.execute(
-            "INSERT INTO questions (session_id, question, subject, keywords, timestamp) VALUES (?,?,?,?,?)",
-            (session_id, question, subject or "General", json.dumps(keywords), datetime.now(timezone.utc).isoformat())
+        row = (
+            session_id, question, subject or "General",
+            self._extract_keywords(question), datetime.now(timezone.utc).isoformat(),
         )
-        self.conn.commit()
+        if self.writes is None:
+            with self.db.transaction() as conn:
+                self._insert_questions(conn, [row])
+        else:
+            self.writes.submit(row, key=session_id)
+
+    def _insert_questions(self, conn: sqlite3.Connection, rows: List[tuple]):
+        indexed = []
+        for session_id, question, subject, keywords, timestamp in rows:
+            cur = conn.execute(
+                "INSERT INTO questions (session_id, question, subject, keywords, timestamp) VALUES (?,?,?,?,?)",
+                (session_id, question, subject, json.dumps(keywords), timestamp)
+            )
+            indexed.append((cur.lastrowid, session_id, keywords))
+        self._index_keywords(indexed)
 
     def report_confusion(self, session_id: str, topic: str, level: int):
         self.conn.execute(
@@ -70,15 +238,30 @@ class InsightTracker:
         )
         self.conn.commit()
 
+    def update_document(self, doc_id: str, filename: str, subject: str):
+        """Refresh a replaced document's details, keeping its original added_at."""
+        cur = self.conn.execute(
+            "UPDATE documents SET filename = ?, subject = ? WHERE doc_id = ?",
+            (filename, subject, doc_id)
+        )
+        if cur.rowcount == 0:
+            self.add_document(doc_id, filename, subject)
+            return
+        self.conn.commit()
+
+    def remove_document(self, doc_id: str):
+        self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        self.conn.commit()
+
     def get_frequent_topics(self, session_id: str) -> List[Dict]:
+        self._read_own_writes(session_id)
         rows = self.conn.execute(
-            "SELECT keywords FROM questions WHERE session_id = ?", (session_id,)
+            """SELECT k.keyword, c.count FROM session_keyword_counts c
+               JOIN keywords k ON k.id = c.keyword_id
+               WHERE c.session_id = ? ORDER BY c.count DESC, c.keyword_id LIMIT 8""",
+            (session_id,)
         ).fetchall()
-        all_keywords = []
-        for row in rows:
-            all_keywords.extend(json.loads(row[0]))
-        counts = Counter(all_keywords).most_common(8)
-        return [{"topic": k, "count": v} for k, v in counts]
+        return [{"topic": k, "count": v} for k, v in rows]
 
     def get_confusion_areas(self, session_id: str) -> List[Dict]:
         rows = self.conn.execute(
@@ -88,24 +271,33 @@ class InsightTracker:
         return [{"topic": r[0], "avg_confusion": round(r[1], 1), "reports": r[2]} for r in rows]
 
     def get_question_count(self, session_id: str) -> int:
+        self._read_own_writes(session_id)
         row = self.conn.execute(
             "SELECT COUNT(*) FROM questions WHERE session_id = ?", (session_id,)
         ).fetchone()
         return row[0] if row else 0
 
     def get_subjects(self, session_id: str) -> List[str]:
+        self._read_own_writes(session_id)
         rows = self.conn.execute(
             "SELECT DISTINCT subject FROM questions WHERE session_id = ?", (session_id,)
         ).fetchall()
         return [r[0] for r in rows if r[0]]
 
-    def get_global_top_topics(self) -> List[Dict]:
-        rows = self.conn.execute("SELECT keywords FROM questions").fetchall()
-        all_keywords = []
-        for row in rows:
-            all_keywords.extend(json.loads(row[0]))
-        counts = Counter(all_keywords).most_common(10)
-        return [{"topic": k, "count": v} for k, v in counts]
+    def get_global_top_topics(self, fresh: bool = False) -> List[Dict]:
+        """
+        Top keywords across all sessions, as committed. Questions still in
+        the write-behind queue show up within one flush interval; pass
+        `fresh` to flush them first.
+        """
+        if fresh:
+            self._read_own_writes()
+        rows = self.conn.execute(
+            """SELECT k.keyword, c.count FROM keyword_counts c
+               JOIN keywords k ON k.id = c.keyword_id
+               ORDER BY c.count DESC, c.keyword_id LIMIT 10"""
+        ).fetchall()
+        return [{"topic": k, "count": v} for k, v in rows]
 
     def _extract_keywords(self, question: str) -> List[str]:
         stop_words = {"what","is","are","how","why","can","does","the","a","an","explain",
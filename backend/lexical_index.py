@@ -0,0 +1,198 @@
+"""
+Lexical Index
+SQLite-backed inverted index with BM25 scoring. Complements the dense
+Chroma index with exact-term matching (formula names, chapter codes) and
+keeps retrieval working when the embedding API is slow or down.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+
+STOP_WORDS = {
+    "what", "is", "are", "how", "why", "can", "does", "the", "a", "an", "explain",
+    "define", "tell", "me", "about", "do", "please", "give", "show", "describe",
+    "and", "or", "to", "of", "in", "on", "at", "for", "with", "this", "that", "it",
+    "be", "by", "as", "was", "were", "from", "its", "into", "if", "then", "which",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class LexicalIndex:
+    """
+    Inverted index over chunk text.
+
+      - chunks:   chunk_id → doc_id, subject, filename, chunk_index, length, text
+      - postings: (term, chunk_id) → term frequency
+
+    Scores with Okapi BM25 (k1, b). Document-frequency and length stats are
+    computed from the tables, so the index is always consistent with the
+    chunks it holds.
+    """
+
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                doc_id TEXT,
+                subject TEXT,
+                filename TEXT,
+                chunk_index INTEGER,
+                length INTEGER,
+                text TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT,
+                chunk_id TEXT,
+                tf INTEGER,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(doc_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings(chunk_id)")
+        self.conn.commit()
+        self._stats: Optional[Tuple[int, float]] = None
+
+    # ─── Maintenance ─────────────────────────────────────────────────────────
+
+    def add_chunks(self, rows: Iterable[Tuple[str, str, Dict]]):
+        """Index (chunk_id, text, metadata) rows; existing ids are replaced."""
+        chunk_rows, posting_rows, ids = [], [], []
+        for chunk_id, text, meta in rows:
+            terms = tokenize(text)
+            ids.append(chunk_id)
+            chunk_rows.append((
+                chunk_id, meta.get("doc_id"), meta.get("subject", "General"),
+                meta.get("filename", "Unknown"), meta.get("chunk_index", 0), len(terms), text,
+            ))
+            posting_rows.extend((term, chunk_id, tf) for term, tf in Counter(terms).items())
+        with self._lock:
+            self._delete_ids(ids)
+            self.conn.executemany("INSERT INTO chunks VALUES (?,?,?,?,?,?,?)", chunk_rows)
+            self.conn.executemany("INSERT INTO postings VALUES (?,?,?)", posting_rows)
+            self.conn.commit()
+            self._stats = None
+
+    def update_chunks(self, updates: Iterable[Tuple[str, Dict]]):
+        """Apply metadata changes (chunk_index, subject, filename) to indexed chunks."""
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE chunks SET chunk_index = ?, subject = ?, filename = ? WHERE chunk_id = ?",
+                [(m.get("chunk_index", 0), m.get("subject", "General"), m.get("filename", "Unknown"), cid)
+                 for cid, m in updates]
+            )
+            self.conn.commit()
+
+    def remove_chunks(self, chunk_ids: List[str]):
+        with self._lock:
+            self._delete_ids(chunk_ids)
+            self.conn.commit()
+            self._stats = None
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            ids = [r[0] for r in self.conn.execute(
+                "SELECT chunk_id FROM chunks WHERE doc_id = ?", (doc_id,)
+            ).fetchall()]
+            self._delete_ids(ids)
+            self.conn.commit()
+            self._stats = None
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.commit()
+            self._stats = None
+
+    def count(self) -> int:
+        return self._corpus_stats()[0]
+
+    # ─── Search ──────────────────────────────────────────────────────────────
+
+    def search(self, query: str, subject: Optional[str] = None, top_k: int = 20) -> List[Dict]:
+        """
+        BM25 top-k. Each hit carries `bm25` and `coverage` (fraction of the
+        distinct query terms it contains).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        n_docs, avg_len = self._corpus_stats()
+        if n_docs == 0:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            df = dict(self.conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term",
+                terms
+            ).fetchall())
+            sql = (
+                f"SELECT p.term, p.chunk_id, p.tf, c.length FROM postings p "
+                f"JOIN chunks c ON c.chunk_id = p.chunk_id WHERE p.term IN ({placeholders})"
+            )
+            params: list = list(terms)
+            if subject:
+                sql += " AND c.subject = ?"
+                params.append(subject)
+            rows = self.conn.execute(sql, params).fetchall()
+
+        scores: Dict[str, float] = {}
+        matched: Dict[str, int] = {}
+        for term, chunk_id, tf, length in rows:
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / (avg_len or 1))
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            matched[chunk_id] = matched.get(chunk_id, 0) + 1
+
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        if not best:
+            return []
+        ids = [cid for cid, _ in best]
+        with self._lock:
+            meta = {r[0]: r for r in self.conn.execute(
+                f"SELECT chunk_id, doc_id, subject, filename, chunk_index, text FROM chunks "
+                f"WHERE chunk_id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()}
+        return [{
+            "chunk_id": cid,
+            "doc_id": meta[cid][1],
+            "subject": meta[cid][2],
+            "filename": meta[cid][3],
+            "chunk_index": meta[cid][4],
+            "text": meta[cid][5],
+            "bm25": round(score, 4),
+            "coverage": round(matched[cid] / len(terms), 4),
+        } for cid, score in best if cid in meta]
+
+    # ─── Internals ───────────────────────────────────────────────────────────
+
+    def _corpus_stats(self) -> Tuple[int, float]:
+        if self._stats is None:
+            with self._lock:
+                n, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+            self._stats = (n, total / n if n else 0.0)
+        return self._stats
+
+    def _delete_ids(self, chunk_ids: List[str]):
+        # Caller holds the lock and commits
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            self.conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders})", batch)
+            self.conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
@@ -1,16 +1,51 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from typing import Optional, List
+import asyncio
+import hashlib
 import json
+import os
 import random
+import tempfile
 
 from rag_engine import RAGEngine
 from memory_manager import ConversationMemory
 from insight_tracker import InsightTracker
-from ai_client import AIClient
-
-app = FastAPI(title="NeuralNotes Backend")
+from ai_client import AIClient, LLMStreamError
+from follow_up_store import FollowUpStore
+from answer_cache import SemanticAnswerCache
+from ingestion_queue import IngestionJob, IngestionQueue, QueueFullError
+from async_storage import AsyncStore, InstrumentedExecutor
+from context_assembler import assemble_context
+from quiz_pool import QuizBank, QuizPool, QuizUnavailableError, normalize_topic
+from document_reader import iter_text_blocks
+from config import settings
+import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmer = None
+    if settings.quiz_pool_warm_interval_s > 0:
+        warmer = asyncio.create_task(_warm_quiz_pools())
+    yield
+    if warmer is not None:
+        warmer.cancel()
+    await quiz_pool.shutdown()
+    await ingestion_queue.shutdown()
+    for executor in storage_executors.values():
+        executor.shutdown()
+    rag_engine.close()
+    memory_manager.close()
+    insight_tracker.close()
+    quiz_bank.close()
+
+
+app = FastAPI(title="NeuralNotes Backend", lifespan=lifespan)
 
 @app.get("/")
 async def root():
@@ -21,12 +56,52 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+app.add_middleware(
+    metrics.MetricsMiddleware,
+    routes=app.routes,
+    server_timing=settings.server_timing_header,
 )
 
 rag_engine = RAGEngine()
 memory_manager = ConversationMemory()
 insight_tracker = InsightTracker()
 ai_client = AIClient()
+follow_up_store = FollowUpStore(
+    max_entries=settings.follow_up_cache_size,
+    max_concurrency=settings.follow_up_concurrency,
+)
+answer_cache = SemanticAnswerCache(
+    threshold=settings.answer_cache_threshold,
+    ttl_seconds=settings.answer_cache_ttl_s,
+    max_entries=settings.answer_cache_size,
+)
+rag_engine.add_corpus_listener(answer_cache.invalidate_subject)
+quiz_bank = QuizBank(
+    max_per_topic=settings.quiz_pool_max_per_topic,
+    max_sessions=settings.quiz_pool_max_sessions,
+    max_topics=settings.quiz_pool_max_topics,
+)
+
+# Async facades: handlers await these so blocking SQLite / Chroma / embedding
+# calls run on per-resource thread pools instead of the event loop.
+storage_executors = {
+    "rag": InstrumentedExecutor("rag", settings.rag_executor_workers),
+    "memory": InstrumentedExecutor("memory", settings.memory_executor_workers),
+    "insights": InstrumentedExecutor("insights", settings.insights_executor_workers),
+    "quiz": InstrumentedExecutor("quiz", settings.quiz_executor_workers),
+}
+rag_store = AsyncStore(rag_engine, storage_executors["rag"])
+memory_store = AsyncStore(memory_manager, storage_executors["memory"])
+insight_store = AsyncStore(insight_tracker, storage_executors["insights"])
+quiz_pool = QuizPool(
+    AsyncStore(quiz_bank, storage_executors["quiz"]),
+    generate=lambda topic, count: _generate_quiz_questions(topic, count),
+    batch_size=settings.quiz_pool_batch,
+    low_watermark=settings.quiz_pool_low_watermark,
+    max_concurrency=settings.quiz_pool_refill_concurrency,
+)
 
 # ── Pydantic Models ──────────────────────────────────────────────────────────
 
@@ -37,6 +112,7 @@ class AskRequest(BaseModel):
     student_level: str = "intermediate"
     explanation_mode: str = "detailed"
     subject: Optional[str] = None
+    defer_follow_ups: bool = False
 
 
 class QuizRequest(BaseModel):
@@ -55,7 +131,7 @@ class ConfusionRequest(BaseModel):
 
 
 def _build_prompt(
-    question, context_chunks, history, level, mode, is_weak_subject=False
+    question, context, history, level, mode, is_weak_subject=False
 ):
     level_map = {
         "beginner": "Simple language, analogies, no jargon.",
@@ -77,11 +153,7 @@ def _build_prompt(
 - Use a Markdown TABLE to compare concepts.
 """
 
-    context = (
-        "\n".join([c["text"] for c in context_chunks])
-        if context_chunks
-        else "Use Web Search."
-    )
+    context = context or "Use Web Search."
 
     return f"""You are NeuralNotes. Use Syllabus and Google Search.
 {struggle_protocol}
@@ -117,83 +189,453 @@ async def create_session(req: dict):
     session_id = str(random.randint(1000, 9999))
     student_name = req.get("student_name", "Student")
     subject = req.get("subject")
-    memory_manager.init_session(session_id, student_name, subject)
+    await memory_store.init_session(session_id, student_name, subject)
     return {"session_id": session_id, "student_name": student_name}
 
 
-@app.post("/ask")
-async def ask_question(req: AskRequest):
-    history = memory_manager.get_history(req.session_id)
+async def _prepare_answer(req: AskRequest) -> dict:
+    """
+    Shared pre-generation work for /ask and /ask/stream.
+
+    Returns a plan dict: either `cached` holds a stored answer for a
+    near-duplicate question, or `prompt` is ready for the LLM.
+    """
+    with metrics.stage("history"):
+        history = await memory_store.get_history(req.session_id)
     topic = memory_manager._extract_topic(req.question)
 
-    # Threshold = 3 questions (2 previous + current)
-    topic_count = sum(1 for h in history if h.get("topic") == topic)
-    is_weak = topic_count >= 2
-
-    retrieved = rag_engine.retrieve(req.question, subject_filter=req.subject)
-    prompt = _build_prompt(
-        req.question,
-        retrieved["chunks"],
-        history,
-        req.student_level,
-        req.explanation_mode,
-        is_weak,
+    # Weak once the student has asked about this topic `weak_topic_threshold`
+    # times before (per-session counters, not a scan of recent history)
+    with metrics.stage("topic_count"):
+        is_weak = await memory_store.is_weak_topic(req.session_id, topic)
+
+    plan = {
+        "is_weak": is_weak, "cached": None, "prompt": None, "sources": [], "cache_key": None,
+        "context_tokens_saved": 0,
+    }
+
+    with metrics.stage("query_embedding"):
+        cache_key = await _answer_cache_key(req, is_weak)
+    if cache_key is not None:
+        with metrics.stage("answer_cache"):
+            cached = answer_cache.lookup(*cache_key)
+        if cached is not None:
+            plan["cached"] = cached
+            plan["sources"] = cached["sources"]
+            return plan
+    plan["cache_key"] = cache_key
+
+    with metrics.stage("retrieve"):
+        retrieved = await rag_store.retrieve(req.question, subject_filter=req.subject)
+    with metrics.stage("build_prompt"):
+        context = assemble_context(retrieved["chunks"], settings.context_token_budget)
+        plan["prompt"] = _build_prompt(
+            req.question,
+            context["text"],
+            history,
+            req.student_level,
+            req.explanation_mode,
+            is_weak,
+        )
+    plan["sources"] = _format_sources(retrieved["chunks"])
+    plan["context_tokens_saved"] = context["tokens_saved"]
+    metrics.CONTEXT_TOKENS.inc(context["tokens"], outcome="sent")
+    metrics.CONTEXT_TOKENS.inc(context["tokens_deduplicated"], outcome="deduplicated")
+    metrics.CONTEXT_TOKENS.inc(context["tokens_over_budget"], outcome="over_budget")
+    return plan
+
+
+async def _answer_cache_key(req: AskRequest, is_weak: bool):
+    """(embedding, context, corpus_version) for the answer cache, or None."""
+    if not settings.answer_cache_enabled:
+        return None
+    try:
+        embedding = await asyncio.wait_for(
+            rag_store.embed_query(req.question), timeout=settings.embedding_timeout_s
+        )
+    except Exception as e:
+        print(f"[AnswerCache] Skipping lookup, query embedding failed: {e or type(e).__name__}")
+        return None
+    context = (req.subject, req.student_level, req.explanation_mode, is_weak)
+    return embedding, context, rag_engine.corpus_version(req.subject)
+
+
+def _remember_answer(plan: dict, answer: str, web_sources: list):
+    if plan["cache_key"] is None or answer.startswith(("[Gemini Error]", "[Ollama Error]")):
+        return
+    answer_cache.store(*plan["cache_key"], {
+        "answer": answer,
+        "web_sources": web_sources,
+        "sources": plan["sources"],
+    })
+
+
+def _format_sources(chunks):
+    return [
+        {"filename": c["filename"], "excerpt": c["text"][:150]}
+        for c in chunks[:2]
+    ]
+
+
+def _defer_follow_ups(question: str, answer: str) -> str:
+    """Queue follow-up generation in the background; returns a ticket."""
+    return follow_up_store.submit(
+        lambda: _generate_follow_ups(question, answer, ai_client)
     )
 
-    ai_res = await ai_client.complete(prompt)
-    follow_ups = await _generate_follow_ups(req.question, ai_res["text"], ai_client)
 
-    memory_manager.add_turn(req.session_id, req.question, ai_res["text"])
-    insight_tracker.record_question(req.session_id, req.question, req.subject)
+def _sse(event: str, data) -> str:
+    """Encode one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    return {
+
+@app.post("/ask")
+async def ask_question(req: AskRequest):
+    plan = await _prepare_answer(req)
+
+    if plan["cached"] is not None:
+        ai_res = {"text": plan["cached"]["answer"], "web_sources": plan["cached"]["web_sources"]}
+    else:
+        with metrics.stage("llm"):
+            ai_res = await ai_client.complete(plan["prompt"])
+        _remember_answer(plan, ai_res["text"], ai_res["web_sources"])
+
+    with metrics.stage("memory_write"):
+        await memory_store.add_turn(req.session_id, req.question, ai_res["text"])
+    with metrics.stage("insight_write"):
+        await insight_store.record_question(req.session_id, req.question, req.subject)
+
+    response = {
         "answer": ai_res["text"],
         "web_sources": ai_res["web_sources"],
-        "follow_up_suggestions": follow_ups,
-        "is_weak": is_weak,
-        "sources": [
-            {"filename": c["filename"], "excerpt": c["text"][:150]}
-            for c in retrieved["chunks"][:2]
-        ],
+        "is_weak": plan["is_weak"],
+        "sources": plan["sources"],
+        "from_cache": plan["cached"] is not None,
+        "context_tokens_saved": plan["context_tokens_saved"],
     }
+    if req.defer_follow_ups:
+        response["follow_up_suggestions"] = []
+        response["follow_up_ticket"] = _defer_follow_ups(req.question, ai_res["text"])
+    else:
+        with metrics.stage("follow_ups"):
+            response["follow_up_suggestions"] = await _generate_follow_ups(
+                req.question, ai_res["text"], ai_client
+            )
+    return response
+
+
+@app.post("/ask/stream")
+async def ask_question_stream(req: AskRequest):
+    """
+    Streaming variant of /ask (Server-Sent Events).
+
+    Emits `token` events while the answer is generated, then `sources`,
+    `meta` (is_weak) and `follow_ups` as trailing events, and finally `done`.
+    A cached answer is sent as a single `token` event. If the model fails
+    mid-answer the stream ends with an `error` event instead, and the
+    partial answer is neither cached nor saved to memory.
+    """
+    plan = await _prepare_answer(req)
+
+    async def event_stream():
+        if plan["cached"] is not None:
+            answer = plan["cached"]["answer"]
+            web_sources = plan["cached"]["web_sources"]
+            yield _sse("token", {"text": answer})
+        else:
+            parts = []
+            try:
+                with metrics.stage("llm"):
+                    async for piece in ai_client.stream(plan["prompt"]):
+                        parts.append(piece)
+                        yield _sse("token", {"text": piece})
+            except LLMStreamError as e:
+                print(f"[Stream] Answer failed after {len(parts)} fragments: {e}")
+                yield _sse("error", {"error": str(e)})
+                return
+            answer = "".join(parts)
+            web_sources = []
+            _remember_answer(plan, answer, web_sources)
+
+        # Persist as soon as the answer is complete so a client that
+        # disconnects before the trailing events still leaves a record.
+        with metrics.stage("memory_write"):
+            await memory_store.add_turn(req.session_id, req.question, answer)
+        with metrics.stage("insight_write"):
+            await insight_store.record_question(req.session_id, req.question, req.subject)
+
+        yield _sse("sources", {"sources": plan["sources"], "web_sources": web_sources})
+        yield _sse("meta", {
+            "is_weak": plan["is_weak"],
+            "from_cache": plan["cached"] is not None,
+            "context_tokens_saved": plan["context_tokens_saved"],
+        })
+
+        if req.defer_follow_ups:
+            ticket = _defer_follow_ups(req.question, answer)
+            yield _sse("follow_ups", {"follow_up_suggestions": [], "follow_up_ticket": ticket})
+        else:
+            with metrics.stage("follow_ups"):
+                follow_ups = await _generate_follow_ups(req.question, answer, ai_client)
+            yield _sse("follow_ups", {"follow_up_suggestions": follow_ups})
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/follow-ups/{ticket}")
+async def get_follow_ups(ticket: str, wait: float = 0.0):
+    """
+    Fetch deferred follow-up suggestions. With `wait` > 0 this long-polls
+    until the suggestions are ready or the timeout elapses.
+    """
+    wait = max(0.0, min(wait, settings.follow_up_max_wait_s))
+    result = await follow_up_store.wait(ticket, wait)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired follow-up ticket")
+    return result
 
 
 @app.post("/generate-quiz")
 async def generate_quiz(req: QuizRequest):
-    prompt = f"Create a BASIC {req.num_questions}-question MCQ quiz on {req.topic}. Return ONLY raw JSON: {{'title': '...', 'questions': [{{'questionText': '...', 'options': [], 'correctAnswerIndex': 0, 'explanation': '...'}}]}}"
-    res = await ai_client.complete(prompt)
+    """
+    Serve a quiz from the topic's pre-generated pool (no question repeats
+    within a session); a cold topic is generated inline once.
+    """
+    num_questions = max(1, min(req.num_questions, settings.quiz_max_questions))
     try:
-        clean = res["text"].strip().replace("```json", "").replace("```", "")
-        return json.loads(clean)
-    except:
+        with metrics.stage("quiz_pool"):
+            quiz = await quiz_pool.get_quiz(req.session_id, req.topic, num_questions)
+    except QuizUnavailableError:
+        metrics.QUIZ_REQUESTS.inc(source="failed")
         raise HTTPException(status_code=500, detail="Quiz failed")
+    metrics.QUIZ_REQUESTS.inc(source="pool" if quiz["from_pool"] else "generated")
+    return quiz
+
+
+async def _generate_quiz_questions(topic: str, count: int) -> str:
+    """Raw LLM output for `count` questions on `topic`, grounded in the syllabus."""
+    retrieved = await rag_store.retrieve(topic)
+    context = assemble_context(retrieved["chunks"], settings.quiz_context_token_budget)["text"]
+    grounding = f"Base the questions on this syllabus text:\n{context}\n" if context else ""
+    prompt = (
+        f"Create {count} BASIC multiple-choice questions on {topic}.\n{grounding}"
+        'Return ONLY a raw JSON object, no markdown, exactly like this: {"questions": [{"questionText": "...", '
+        '"options": ["...", "...", "...", "..."], "correctAnswerIndex": 0, "explanation": "..."}]}\n'
+        "Each question has 4 distinct options; correctAnswerIndex is the 0-based index of the correct one."
+    )
+    with metrics.stage("llm"):
+        res = await ai_client.complete(prompt)
+    return res["text"]
+
+
+async def _quiz_topics() -> List[str]:
+    """Likely quiz topics: the most asked-about keywords, then indexed documents."""
+    topics = [t["topic"] for t in await insight_store.get_global_top_topics()]
+    for doc in rag_engine.list_documents():
+        if doc.get("subject") and doc["subject"] != "General":
+            topics.append(doc["subject"])
+        title = os.path.splitext(doc.get("filename") or "")[0].replace("_", " ").replace("-", " ")
+        topics.append(title)
+    unique = list(dict.fromkeys(t for t in map(normalize_topic, topics) if t))
+    return unique[:settings.quiz_pool_warm_topics]
+
+
+async def _warm_quiz_pools():
+    """Background loop keeping the likely topics' pools above the watermark."""
+    while True:
+        try:
+            await quiz_pool.warm(await _quiz_topics())
+        except Exception as e:
+            print(f"[QuizPool] Warm-up failed: {e}")
+        await asyncio.sleep(settings.quiz_pool_warm_interval_s)
 
 
 # ── Knowledge Base Endpoints ─────────────────────────────────────────────────
 
 
-@app.post("/upload")
-async def upload_document(subject: str, file: UploadFile = File(...)):
+UPLOAD_BLOCK_BYTES = 1024 * 1024
+
+
+def _ingest(job: IngestionJob) -> dict:
+    """Ingestion worker body; runs in a thread, off the event loop."""
+    path = job.payload["path"]
+    file_hash = job.payload["file_hash"]
     try:
-        content = await file.read()
-        if file.filename.lower().endswith(".pdf"):
-            text = rag_engine.extract_pdf_text(content)
+        # A byte-identical copy may have been indexed while this job queued
+        duplicate = rag_engine.find_duplicate(file_hash, job.subject)
+        if duplicate is not None and not job.payload.get("replace_doc_id"):
+            return _document_result(duplicate, duplicate=True)
+
+        job.set_stage("parsing")
+        if job.filename.lower().endswith(".pdf"):
+            pages = rag_engine.iter_pdf_pages(path)
         else:
-            text = content.decode("utf-8")
+            pages = iter_text_blocks(path)
+
+        replace_id = job.payload.get("replace_doc_id")
+        if replace_id:
+            changes = rag_engine.replace_document(
+                replace_id,
+                pages,
+                {"filename": job.filename, "subject": job.subject, "file_hash": file_hash},
+                on_progress=job.set_progress,
+                on_stage=job.set_stage,
+            )
+            insight_tracker.update_document(replace_id, job.filename, job.subject)
+            return {**_document_result(rag_engine.get_document(replace_id)), "changes": changes}
+
+        doc_id = rag_engine.add_document_stream(
+            pages,
+            {
+                "filename": job.filename,
+                "subject": job.subject,
+                "uploaded_at": datetime.now(timezone.utc).isoformat(),
+                "file_hash": file_hash,
+            },
+            on_progress=job.set_progress,
+            on_stage=job.set_stage,
+        )
+    finally:
+        os.remove(path)
+
+    insight_tracker.add_document(doc_id, job.filename, job.subject)
+    return _document_result(rag_engine.get_document(doc_id))
 
-        doc_id = rag_engine.add_document(
-            text, {"filename": file.filename, "subject": subject}
+
+def _document_result(entry: dict, duplicate: bool = False) -> dict:
+    return {
+        "doc_id": entry["doc_id"],
+        "filename": entry["filename"],
+        "subject": entry["subject"],
+        "chunk_count": entry["chunk_count"],
+        "failed_chunks": entry.get("failed_chunks", 0),
+        "uploaded_at": entry["uploaded_at"],
+        "duplicate": duplicate,
+    }
+
+
+def _check_extension(filename: str):
+    if not filename.lower().endswith(settings.allowed_extensions):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Use: {', '.join(settings.allowed_extensions)}",
         )
 
-        insight_tracker.add_document(doc_id, file.filename, subject)
-        return {
-            "doc_id": doc_id,
-            "filename": file.filename,
-            "subject": subject,
-            "chunk_count": rag_engine.get_chunk_count(doc_id),
-        }
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+
+async def _spool_upload(file: UploadFile):
+    """
+    Copy the upload to a temp file block by block, enforcing
+    max_upload_size_mb without ever holding the whole file in memory.
+    Returns (path, sha256 of the bytes).
+    """
+    digest = hashlib.sha256()
+    limit = settings.max_upload_size_mb * 1024 * 1024
+    suffix = os.path.splitext(file.filename)[1].lower()
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix, dir=settings.upload_spool_dir)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = await file.read(UPLOAD_BLOCK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > limit:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds {settings.max_upload_size_mb} MB limit",
+                    )
+                digest.update(block)
+                await run_in_threadpool(out.write, block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+ingestion_queue = IngestionQueue(
+    _ingest,
+    workers=settings.ingestion_workers,
+    max_pending=settings.ingestion_queue_size,
+    history_size=settings.ingestion_job_history,
+)
+
+
+@app.post("/upload", status_code=202)
+async def upload_document(subject: str, file: UploadFile = File(...)):
+    """
+    Queue a document for background ingestion. Poll /jobs/{job_id} for
+    stage and progress; the finished job's `result` holds the doc entry.
+    A byte-identical re-upload to the same subject completes immediately
+    with the existing document (`result.duplicate` is true).
+    """
+    _check_extension(file.filename)
+    with metrics.stage("spool"):
+        path, file_hash = await _spool_upload(file)
+
+    with metrics.stage("dedupe"):
+        duplicate = rag_engine.find_duplicate(file_hash, subject)
+    if duplicate is not None:
+        os.remove(path)
+        job = ingestion_queue.record_completed(
+            file.filename, subject, _document_result(duplicate, duplicate=True)
+        )
+        return job.to_dict()
+
+    try:
+        with metrics.stage("enqueue"):
+            job = ingestion_queue.submit(
+                file.filename, subject, {"path": path, "file_hash": file_hash}
+            )
+    except QueueFullError as e:
+        os.remove(path)
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+
+@app.put("/documents/{doc_id}", status_code=202)
+async def replace_document(doc_id: str, subject: Optional[str] = None, file: UploadFile = File(...)):
+    """
+    Replace a document's content in place (same doc_id). Only chunks whose
+    content changed are re-embedded; runs as an ingestion job like /upload.
+    """
+    entry = rag_engine.get_document(doc_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    _check_extension(file.filename)
+    subject = subject or entry["subject"]
+    path, file_hash = await _spool_upload(file)
+
+    if file_hash == entry.get("file_hash") and subject == entry["subject"]:
+        os.remove(path)
+        job = ingestion_queue.record_completed(
+            file.filename, subject, _document_result(entry, duplicate=True)
+        )
+        return job.to_dict()
+
+    try:
+        job = ingestion_queue.submit(
+            file.filename,
+            subject,
+            {"path": path, "file_hash": file_hash, "replace_doc_id": doc_id},
+        )
+    except QueueFullError as e:
+        os.remove(path)
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
 
 
 @app.get("/documents")
@@ -203,7 +645,8 @@ async def list_documents():
 
 @app.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str):
-    rag_engine.delete_document(doc_id)
+    await rag_store.delete_document(doc_id)
+    await insight_store.remove_document(doc_id)
     return {"status": "success"}
 
 
@@ -213,23 +656,119 @@ async def delete_document(doc_id: str):
 @app.get("/insights/{session_id}")
 async def get_insights(session_id: str):
     return {
-        "total_questions": insight_tracker.get_question_count(session_id),
-        "frequently_asked": insight_tracker.get_frequent_topics(session_id),
-        "subjects_covered": insight_tracker.get_subjects(session_id),
-        "confusion_areas": insight_tracker.get_confusion_areas(session_id),
-        "learning_history": memory_manager.get_history(session_id),
+        "total_questions": await insight_store.get_question_count(session_id),
+        "frequently_asked": await insight_store.get_frequent_topics(session_id),
+        "subjects_covered": await insight_store.get_subjects(session_id),
+        "confusion_areas": await insight_store.get_confusion_areas(session_id),
+        "learning_history": await memory_store.get_history(session_id),
     }
 
 
 @app.post("/confusion")
 async def report_confusion(req: ConfusionRequest):
-    insight_tracker.report_confusion(req.session_id, req.topic, req.confusion_level)
+    await insight_store.report_confusion(req.session_id, req.topic, req.confusion_level)
     return {"status": "success"}
 
 
 @app.get("/global-insights")
 async def get_global_insights():
-    return {"frequent_topics": insight_tracker.get_global_top_topics()}
+    return {"frequent_topics": await insight_store.get_global_top_topics()}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "embedding": rag_engine.embedding_cache.stats(),
+        "answer": answer_cache.stats(),
+        "history": memory_manager.history_cache.stats() if memory_manager.history_cache else None,
+        "topics": memory_manager.topic_counters.stats(),
+        "quiz_pool": {**quiz_bank.stats(), **quiz_pool.stats()},
+    }
+
+
+@app.get("/storage/stats")
+async def storage_stats():
+    """Queue depth and wait/run times of the storage executors."""
+    return {name: ex.stats() for name, ex in storage_executors.items()}
+
+
+def _runtime_metrics():
+    """Scrape-time metric families built from the components' stats()."""
+    caches = {"embedding": rag_engine.embedding_cache.stats(), "answer": answer_cache.stats()}
+    embedding = caches["embedding"]
+    lookups = [
+        ({"cache": "embedding", "result": "memory_hit"}, embedding["memory_hits"]),
+        ({"cache": "embedding", "result": "disk_hit"}, embedding["disk_hits"]),
+        ({"cache": "embedding", "result": "miss"}, embedding["misses"]),
+        ({"cache": "answer", "result": "hit"}, caches["answer"]["hits"]),
+        ({"cache": "answer", "result": "miss"}, caches["answer"]["misses"]),
+    ]
+    entries = [
+        ({"cache": "embedding"}, embedding["memory_entries"]),
+        ({"cache": "answer"}, caches["answer"]["entries"]),
+    ]
+    if memory_manager.history_cache:
+        history = caches["history"] = memory_manager.history_cache.stats()
+        lookups += [
+            ({"cache": "history", "result": "hit"}, history["hits"]),
+            ({"cache": "history", "result": "miss"}, history["misses"]),
+            ({"cache": "history", "result": "bypass"}, history["bypassed"]),
+        ]
+        entries.append(({"cache": "history"}, history["sessions"]))
+    topics = caches["topics"] = memory_manager.topic_counters.stats()
+    lookups += [
+        ({"cache": "topics", "result": "hit"}, topics["hits"]),
+        ({"cache": "topics", "result": "miss"}, topics["misses"]),
+    ]
+    entries.append(({"cache": "topics"}, topics["sessions"]))
+    yield ("neuralnotes_cache_lookups_total", "counter", "Cache lookups by cache and result.", lookups)
+    yield ("neuralnotes_cache_hit_ratio", "gauge", "Share of cache lookups served from cache.", [
+        ({"cache": name}, stats["hit_rate"]) for name, stats in caches.items()
+    ])
+    yield ("neuralnotes_cache_entries", "gauge", "Entries held in memory per cache.", entries)
+    executors = {name: ex.stats() for name, ex in storage_executors.items()}
+    yield ("neuralnotes_storage_queue_depth", "gauge", "Storage calls waiting for a worker thread.", [
+        ({"pool": name}, stats["queue_depth"]) for name, stats in executors.items()
+    ])
+    yield ("neuralnotes_storage_active", "gauge", "Storage calls currently running.", [
+        ({"pool": name}, stats["active"]) for name, stats in executors.items()
+    ])
+    writes = {
+        name: store.writes.stats()
+        for name, store in (("memory", memory_manager), ("insights", insight_tracker))
+        if store.writes is not None
+    }
+    yield ("neuralnotes_write_behind_pending", "gauge", "Rows queued for a batched commit.", [
+        ({"store": name}, stats["pending"]) for name, stats in writes.items()
+    ])
+    yield ("neuralnotes_write_behind_rows_total", "counter", "Rows committed by the write-behind writer.", [
+        ({"store": name}, stats["rows"]) for name, stats in writes.items()
+    ])
+    yield ("neuralnotes_write_behind_batches_total", "counter", "Transactions committed by the write-behind writer.", [
+        ({"store": name}, stats["batches"]) for name, stats in writes.items()
+    ])
+    yield ("neuralnotes_ingestion_pending", "gauge", "Uploads queued for ingestion.", [
+        ({}, ingestion_queue.pending_count())
+    ])
+    yield ("neuralnotes_follow_ups_pending", "gauge", "Deferred follow-up generations in progress.", [
+        ({}, follow_up_store.pending_count())
+    ])
+    quiz = quiz_bank.stats()
+    yield ("neuralnotes_quiz_pool_questions", "gauge", "Quiz questions pooled across loaded topics.", [
+        ({}, quiz["questions"])
+    ])
+    yield ("neuralnotes_quiz_pool_refills_pending", "gauge", "Background quiz pool refills queued or running.", [
+        ({}, quiz_pool.stats()["refills_pending"])
+    ])
+
+
+metrics.REGISTRY.add_collector(_runtime_metrics)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of latency histograms, caches and queues."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/health")
@@ -1,6 +1,15 @@
 """
 Conversation Memory Manager
 Handles multi-turn dialogue history using SQLite for lightweight persistence.
+
+New turns go through a write-behind queue and are committed in batches.
+Until a turn is committed it is kept in a per-session pending overlay that
+get_history merges in, so a session always reads its own writes. Recent
+turns of active sessions are also served from a write-through
+HistoryCache without touching SQLite.
+
+Every turn also bumps a persisted (session, topic) counter, cached per
+session in TopicCounters, which weak-subject detection reads in O(1).
 """
 
 import sqlite3
@@ -8,6 +17,15 @@ import json
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
 import os
+import threading
+import time
+from contextlib import nullcontext
+
+from config import settings
+from history_cache import HistoryCache
+from sqlite_db import SQLiteDatabase
+from topic_counters import TopicCounters, current
+from write_behind import WriteBehindQueue
 
 
 DB_PATH = "./studyai_memory.db"
@@ -21,11 +39,45 @@ class ConversationMemory:
     """
 
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        self._init_db()
+        self.db = SQLiteDatabase(DB_PATH)
+        self.db.migrate([
+            self._migration_1_tables,
+            self._migration_2_session_index,
+            self._migration_3_topic_counts,
+        ])
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[str, List[Dict]] = {}   # session -> turns not yet committed
+        self.writes = None
+        if settings.write_behind_enabled:
+            self.writes = WriteBehindQueue(
+                "memory", self.db, self._insert_turns, self._settle_turns,
+                flush_interval_s=settings.write_behind_flush_ms / 1000,
+                max_batch=settings.write_behind_max_batch,
+            )
+        self.history_cache = None
+        if settings.history_cache_enabled:
+            self.history_cache = HistoryCache(
+                turns_per_session=settings.history_cache_turns,
+                budget_bytes=settings.history_cache_budget_mb * 1024 * 1024,
+            )
+        self.topic_counters = TopicCounters(
+            max_sessions=settings.topic_cache_sessions,
+            decay_s=settings.weak_topic_decay_s,
+        )
 
-    def _init_db(self):
-        self.conn.execute("""
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's connection."""
+        return self.db.connection()
+
+    def close(self):
+        """Flush queued turns, then close every connection."""
+        if self.writes is not None:
+            self.writes.close()
+        self.db.close()
+
+    def _migration_1_tables(self, conn: sqlite3.Connection):
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS sessions (
                 session_id TEXT PRIMARY KEY,
                 student_name TEXT,
@@ -33,7 +85,7 @@ class ConversationMemory:
                 created_at TEXT
             )
         """)
-        self.conn.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS turns (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 session_id TEXT,
@@ -45,7 +97,29 @@ class ConversationMemory:
                 FOREIGN KEY(session_id) REFERENCES sessions(session_id)
             )
         """)
-        self.conn.commit()
+
+    def _migration_2_session_index(self, conn: sqlite3.Connection):
+        # get_history walks this index backwards: newest turns of one session
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_turns_session ON turns(session_id, id)")
+
+    def _migration_3_topic_counts(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS topic_counts (
+                session_id TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (session_id, topic)
+            ) WITHOUT ROWID
+        """)
+        # Existing history counts in full; decay applies from the next ask on
+        conn.execute("""
+            INSERT OR IGNORE INTO topic_counts (session_id, topic, count, last_seen)
+            SELECT session_id, topic, COUNT(*), COALESCE(MAX(julianday(timestamp) - 2440587.5) * 86400, 0)
+            FROM turns
+            WHERE session_id IS NOT NULL AND topic IS NOT NULL
+            GROUP BY session_id, topic
+        """)
 
     def init_session(self, session_id: str, student_name: str, subject: Optional[str]):
         self.conn.execute(
@@ -63,23 +137,131 @@ class ConversationMemory:
         return {"session_id": row[0], "student_name": row[1], "subject": row[2], "created_at": row[3]}
 
     def add_turn(self, session_id: str, question: str, answer: str, turn_type: str = "answered"):
-        topic = self._extract_topic(question)
-        self.conn.execute(
-            "INSERT INTO turns (session_id, question, answer, turn_type, topic, timestamp) VALUES (?,?,?,?,?,?)",
-            (session_id, question, answer, turn_type, topic, datetime.now(timezone.utc).isoformat())
-        )
-        self.conn.commit()
+        now = time.time()
+        turn = {
+            "session_id": session_id,
+            "question": question,
+            "answer": answer,
+            "type": turn_type,
+            "topic": self._extract_topic(question),
+            "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+            "seen_at": now,
+            "rowid": None,
+        }
+        cache = self.history_cache
+        # The write and its cache updates form one critical section, so no
+        # reader can fill a cache from a snapshot that misses this turn.
+        with cache.lock if cache else nullcontext(), self.topic_counters.lock:
+            if self.writes is None:
+                with self.db.transaction() as conn:
+                    self._insert_turns(conn, [turn])
+            else:
+                with self._pending_lock:
+                    self._pending.setdefault(session_id, []).append(turn)
+                self.writes.submit(turn, key=session_id)
+            if cache:
+                cache.append(session_id, self._history_entry(turn))
+            self.topic_counters.record(session_id, turn["topic"], now)
+
+    def topic_count(self, session_id: str, topic: str) -> int:
+        """How many earlier turns of this session asked about `topic`, after decay."""
+        now = time.time()
+        count = self.topic_counters.get(session_id, topic, now)
+        if count is not None:
+            return count
+        token = self.topic_counters.begin_fill(session_id)
+        if self.writes is not None:
+            self.writes.barrier(session_id)   # counters live in the database only
+        counters = {
+            row[0]: (row[1], row[2])
+            for row in self.conn.execute(
+                "SELECT topic, count, last_seen FROM topic_counts WHERE session_id = ?", (session_id,)
+            )
+        }
+        self.topic_counters.finish_fill(session_id, token, counters)
+        return current(counters.get(topic), now, self.topic_counters.decay_s)
+
+    def is_weak_topic(self, session_id: str, topic: str) -> bool:
+        return self.topic_count(session_id, topic) >= settings.weak_topic_threshold
 
     def get_history(self, session_id: str, last_n: int = 10) -> List[Dict]:
+        cache = self.history_cache
+        if cache is None:
+            return self._read_history(session_id, last_n)
+        history = cache.get(session_id, last_n)
+        if history is not None:
+            return history
+        if last_n > cache.capacity:
+            return self._read_history(session_id, last_n)
+        token = cache.begin_fill(session_id)
+        history = self._read_history(session_id, cache.capacity)
+        cache.finish_fill(session_id, token, history)
+        return history[-last_n:] if last_n > 0 else []
+
+    def _read_history(self, session_id: str, last_n: int) -> List[Dict]:
+        """Newest `last_n` turns from SQLite plus turns still queued for commit."""
+        with self._pending_lock:
+            pending = list(self._pending.get(session_id, ()))
         rows = self.conn.execute(
-            "SELECT question, answer, turn_type, topic, timestamp FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            "SELECT id, question, answer, turn_type, topic, timestamp FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
             (session_id, last_n)
         ).fetchall()
         rows.reverse()
-        return [
-            {"question": r[0], "answer": r[1], "type": r[2], "topic": r[3], "timestamp": r[4]}
+        history = [
+            {"question": r[1], "answer": r[2], "type": r[3], "topic": r[4], "timestamp": r[5]}
             for r in rows
         ]
+        if pending:
+            # A pending turn whose row is already in this read's snapshot has
+            # an id no newer than the newest row read; anything else is unseen.
+            newest = rows[-1][0] if rows else 0
+            history.extend(
+                self._history_entry(t) for t in pending if t["rowid"] is None or t["rowid"] > newest
+            )
+            history = history[-last_n:]
+        return history
+
+    def _insert_turns(self, conn: sqlite3.Connection, turns: List[Dict]):
+        try:
+            for turn in turns:
+                cur = conn.execute(
+                    "INSERT INTO turns (session_id, question, answer, turn_type, topic, timestamp) VALUES (?,?,?,?,?,?)",
+                    (turn["session_id"], turn["question"], turn["answer"], turn["type"], turn["topic"], turn["timestamp"])
+                )
+                turn["rowid"] = cur.lastrowid
+                conn.execute(
+                    """INSERT INTO topic_counts (session_id, topic, count, last_seen) VALUES (?, ?, 1, ?)
+                       ON CONFLICT (session_id, topic) DO UPDATE SET
+                           count = CASE WHEN ? > 0 AND excluded.last_seen - last_seen > ?
+                                        THEN 1 ELSE count + 1 END,
+                           last_seen = excluded.last_seen""",
+                    (turn["session_id"], turn["topic"], turn["seen_at"], self.topic_counters.decay_s,
+                     self.topic_counters.decay_s)
+                )
+        except BaseException:
+            for turn in turns:   # rolled back: those ids were never written
+                turn["rowid"] = None
+            raise
+
+    def _settle_turns(self, turns: List[Dict]):
+        """Write-behind callback: the batch is committed, drop it from the overlay."""
+        with self._pending_lock:
+            for turn in turns:
+                pending = self._pending.get(turn["session_id"])
+                if pending is None:
+                    continue
+                pending[:] = [t for t in pending if t is not turn]
+                if not pending:
+                    del self._pending[turn["session_id"]]
+        for turn in turns:
+            if turn["rowid"] is None:   # dropped by the writer, never persisted
+                if self.history_cache:
+                    self.history_cache.invalidate(turn["session_id"])
+                self.topic_counters.invalidate(turn["session_id"])
+
+    @staticmethod
+    def _history_entry(turn: Dict) -> Dict:
+        return {k: turn[k] for k in ("question", "answer", "type", "topic", "timestamp")}
 
     def get_session_count(self) -> int:
         row = self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
@@ -0,0 +1,323 @@
+"""
+Metrics
+Dependency-free Prometheus instrumentation: counters, gauges and
+histograms rendered in the text exposition format for GET /metrics.
+
+Request handlers time their stages with `stage("retrieve")`. Each stage
+is observed into a histogram labelled by route, and also collected for
+the current request so MetricsMiddleware can send a per-request
+breakdown in the `Server-Timing` response header. The request's timings
+travel in a ContextVar, so stages timed inside storage executor threads
+(which run with a copy of the caller's context) are attributed too.
+"""
+
+import bisect
+import contextvars
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (name, type, help, [(labels, value)]) — what collectors yield
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Sample lines in the text exposition format."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1])) for k, s in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Holds metrics plus collectors: callables evaluated at scrape time that
+    yield (name, type, help, samples) families from existing stats() dicts.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"[Metrics] Collector failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(l)} {_format_value(v)}" for l, v in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "neuralnotes_request_duration_seconds",
+    "HTTP request latency until the response starts.",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "neuralnotes_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ("route",),
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "neuralnotes_stage_duration_seconds",
+    "Latency of individual stages within a request or ingestion job.",
+    ("route", "stage"),
+))
+LLM_REQUESTS = REGISTRY.register(Counter(
+    "neuralnotes_llm_requests_total",
+    "LLM calls by backend, mode (complete/stream) and outcome.",
+    ("backend", "mode", "outcome"),
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "neuralnotes_llm_tokens_total",
+    "LLM tokens as reported by the backend, by direction (prompt/completion).",
+    ("backend", "direction"),
+))
+LLM_COALESCED = REGISTRY.register(Counter(
+    "neuralnotes_llm_coalesced_total",
+    "LLM calls served by joining an identical in-flight call instead of calling upstream.",
+    ("mode",),
+))
+QUIZ_REQUESTS = REGISTRY.register(Counter(
+    "neuralnotes_quiz_requests_total",
+    "Quiz requests by source: served from the pool, generated inline, or failed.",
+    ("source",),
+))
+CONTEXT_TOKENS = REGISTRY.register(Counter(
+    "neuralnotes_context_tokens_total",
+    "Estimated retrieved-context tokens: sent, removed as duplicate overlap, or cut by the budget.",
+    ("outcome",),
+))
+
+
+# ─── Per-request stage timing ────────────────────────────────────────────────
+
+class RequestTimings:
+    """Stages timed so far for one request, in completion order."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.stages: List[Tuple[str, float]] = []
+        self.closed = False
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def observe_stage(route: str, name: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, route=route, stage=name)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as stage `name` of the current request."""
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        if timings is None or timings.closed:
+            observe_stage("background", name, seconds)
+        else:
+            observe_stage(timings.route, name, seconds)
+            timings.stages.append((name, seconds))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: in-flight gauge, request latency histogram and the
+    Server-Timing header. For streaming responses the header is sent
+    before the body, so it covers only the stages finished by then; the
+    later stages still land in the histograms.
+
+    Requests are labelled by route template ("/jobs/{job_id}"), never by
+    raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, routes: Sequence = (), server_timing: bool = True):
+        self.app = app
+        self.routes = routes
+        self.server_timing = server_timing
+
+    def _route(self, scope) -> str:
+        from starlette.routing import Match
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        timings = RequestTimings(route)
+        token = _current.set(timings)
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc(route=route)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"], route=route, status=message["status"],
+                )
+                if self.server_timing and timings.stages:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timings.closed = True
+            REQUESTS_IN_FLIGHT.dec(route=route)
+            _current.reset(token)
@@ -0,0 +1,33 @@
+"""
+migrate_shards.py — Moves chunks from the old single vector collection into
+per-subject shards. Vectors are copied as-is, nothing is re-embedded.
+Run once before starting the upgraded server: python migrate_shards.py
+
+The server also performs this migration on startup if it finds the old
+collection; running it ahead of time just keeps that out of the boot path.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from rag_engine import RAGEngine
+
+
+def migrate():
+    print("\n🔀 NeuralNotes — Sharding vector store by subject")
+    print("=" * 40)
+
+    # RAGEngine migrates the old collection while it starts up
+    rag = RAGEngine()
+
+    for subject in sorted(rag.list_subjects()):
+        print(f"  {rag.shard_name(subject)}: {rag.count_chunks(subject)} chunks ({subject})")
+    print(f"\n  Total chunks in store: {rag.count_chunks()}")
+    rag.close()
+    print("\n✦ Migration complete.\n")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,300 @@
+"""
+Quiz Pool
+Pre-generated, validated quiz questions per syllabus topic. /generate-quiz
+is served from the pool instead of waiting on (and then failing to parse)
+a fresh LLM generation; a session never gets the same question twice, and
+a topic is refilled in the background once a session has fewer than
+`low_watermark` unseen questions left.
+
+  - QuizBank:  SQLite-backed question bank plus per-session seen sets
+  - QuizPool:  async serving, inline generation for a cold topic, and
+               background refills
+"""
+
+import ast
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlite_db import SQLiteDatabase
+
+DB_PATH = "./studyai_quiz_pool.db"
+
+MIN_OPTIONS, MAX_OPTIONS = 2, 6
+
+
+class QuizUnavailableError(Exception):
+    """No unseen question could be served or generated for the topic."""
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", "", topic.lower()).split())
+
+
+# ─── Parsing and validation ──────────────────────────────────────────────────
+
+def validate_question(raw: Any) -> Optional[Dict]:
+    """A well-formed multiple-choice question in the API shape, or None."""
+    if not isinstance(raw, dict):
+        return None
+    text = raw.get("questionText") or raw.get("question")
+    options = raw.get("options")
+    answer = raw.get("correctAnswerIndex", raw.get("answer"))
+    if not isinstance(text, str) or not text.strip():
+        return None
+    if not isinstance(options, list) or not MIN_OPTIONS <= len(options) <= MAX_OPTIONS:
+        return None
+    if not all(isinstance(o, (str, int, float)) and str(o).strip() for o in options):
+        return None
+    options = [str(o).strip() for o in options]
+    if len({o.lower() for o in options}) != len(options):
+        return None
+    if isinstance(answer, str):
+        answer = options.index(answer.strip()) if answer.strip() in options else (
+            int(answer) if answer.strip().isdigit() else None
+        )
+    if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer < len(options):
+        return None
+    return {
+        "questionText": text.strip(),
+        "options": options,
+        "correctAnswerIndex": answer,
+        "explanation": str(raw.get("explanation") or "").strip(),
+    }
+
+
+def parse_quiz(text: str) -> List[Dict]:
+    """
+    Valid questions from raw LLM output: code fences and surrounding prose
+    are ignored, Python-style quoting is accepted, and malformed questions
+    are dropped. Raises ValueError if nothing usable is left.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("no JSON in model output")
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    body = text[start:end + 1]
+    try:
+        data = json.loads(body)
+    except ValueError:
+        try:
+            data = ast.literal_eval(body)
+        except (ValueError, SyntaxError) as e:
+            raise ValueError(f"unparseable quiz: {e}") from None
+    if isinstance(data, dict):
+        data = data.get("questions", [])
+    questions = [q for q in map(validate_question, data if isinstance(data, list) else []) if q]
+    if not questions:
+        raise ValueError("no valid questions in model output")
+    return questions
+
+
+def _fingerprint(question: Dict) -> str:
+    return hashlib.sha1(normalize_topic(question["questionText"]).encode("utf-8")).hexdigest()
+
+
+# ─── Question bank ───────────────────────────────────────────────────────────
+
+class QuizBank:
+    """
+    Questions per normalized topic, newest last, at most
+    `max_per_topic` (oldest dropped first). A topic's questions are loaded
+    into memory on first use and the last `max_topics` topics stay resident
+    (the rest are reloaded from SQLite); `take` serves questions the
+    session has not seen yet and records them as seen (last `max_sessions`
+    sessions).
+    Blocking: call through the storage executor.
+    """
+
+    def __init__(self, max_per_topic: int = 60, max_sessions: int = 10000, max_topics: int = 1000):
+        self.max_per_topic = max_per_topic
+        self.max_sessions = max_sessions
+        self.max_topics = max_topics
+        self.db = SQLiteDatabase(DB_PATH)
+        self.db.migrate([self._migration_1_tables])
+        self._lock = threading.Lock()
+        self._topics: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._seen: "OrderedDict[str, Set[int]]" = OrderedDict()
+
+    def _migration_1_tables(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS quiz_questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                question TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (topic, fingerprint)
+            )
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def size(self, topic: str) -> int:
+        with self._lock:
+            return len(self._load(topic))
+
+    def take(self, topic: str, session_id: str, n: int) -> Tuple[List[Dict], int]:
+        """Up to `n` questions unseen by the session, and how many unseen remain."""
+        with self._lock:
+            seen = self._seen.get(session_id)
+            if seen is None:
+                seen = self._seen[session_id] = set()
+                while len(self._seen) > self.max_sessions:
+                    self._seen.popitem(last=False)
+            self._seen.move_to_end(session_id)
+            unseen = [q for q in self._load(topic) if q["id"] not in seen]
+            picked = random.sample(unseen, min(n, len(unseen)))
+            seen.update(q["id"] for q in picked)
+            return [q["question"] for q in picked], len(unseen) - len(picked)
+
+    def add(self, topic: str, questions: List[Dict]) -> int:
+        """Store new questions (duplicates of pooled ones are skipped); returns how many."""
+        with self._lock:
+            bank = self._load(topic)
+            added = []
+            with self.db.transaction() as conn:
+                for question in questions:
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO quiz_questions (topic, fingerprint, question, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (topic, _fingerprint(question), json.dumps(question), time.time())
+                    )
+                    if cur.rowcount:
+                        added.append({"id": cur.lastrowid, "question": question})
+                evicted = (bank + added)[:max(0, len(bank) + len(added) - self.max_per_topic)]
+                conn.executemany("DELETE FROM quiz_questions WHERE id = ?", [(q["id"],) for q in evicted])
+            bank.extend(added)
+            del bank[:len(evicted)]
+            return len(added)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "questions": sum(len(b) for b in self._topics.values()),
+                "sessions": len(self._seen),
+            }
+
+    def _load(self, topic: str) -> List[Dict]:
+        # caller holds self._lock
+        bank = self._topics.get(topic)
+        if bank is None:
+            rows = self.db.connection().execute(
+                "SELECT id, question FROM quiz_questions WHERE topic = ? ORDER BY id", (topic,)
+            ).fetchall()
+            bank = self._topics[topic] = [{"id": r[0], "question": json.loads(r[1])} for r in rows]
+            while len(self._topics) > self.max_topics:
+                self._topics.popitem(last=False)
+        self._topics.move_to_end(topic)
+        return bank
+
+
+# ─── Pool ────────────────────────────────────────────────────────────────────
+
+class QuizPool:
+    """
+    `bank` is a QuizBank behind an AsyncStore. `generate(topic, count)`
+    returns raw LLM output for `count` questions on `topic`. Refills run
+    in the background, at most `max_concurrency` at a time and one per topic.
+    """
+
+    def __init__(
+        self,
+        bank,
+        generate: Callable[[str, int], Awaitable[str]],
+        batch_size: int = 5,
+        low_watermark: int = 6,
+        max_attempts: int = 2,
+        max_concurrency: int = 1,
+    ):
+        self.bank = bank
+        self.generate = generate
+        self.batch_size = batch_size
+        self.low_watermark = low_watermark
+        self.max_attempts = max_attempts
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._refilling: Dict[str, asyncio.Task] = {}
+        self.served_from_pool = 0
+        self.generated_inline = 0
+        self.invalid_generations = 0
+
+    async def get_quiz(self, session_id: str, topic: str, num_questions: int) -> Dict:
+        key = normalize_topic(topic) or "general"
+        questions, left = await self.bank.take(key, session_id, num_questions)
+        inline = len(questions) < num_questions
+        if inline:
+            # Cold topic, or this session has seen everything: generate now
+            await self._fill(key, max(self.batch_size, num_questions - len(questions)))
+            more, left = await self.bank.take(key, session_id, num_questions - len(questions))
+            questions += more
+        if left < self.low_watermark:
+            self.schedule_refill(key)
+        if not questions:
+            raise QuizUnavailableError(f"no quiz questions available for '{topic}'")
+        if inline:
+            self.generated_inline += 1
+        else:
+            self.served_from_pool += 1
+        return {"title": f"{topic.strip()} Quiz", "topic": key, "questions": questions, "from_pool": not inline}
+
+    async def warm(self, topics: List[str]):
+        """Schedule a refill for every topic whose pool is below the watermark."""
+        for topic in topics:
+            key = normalize_topic(topic)
+            if key and await self.bank.size(key) < self.low_watermark:
+                self.schedule_refill(key)
+
+    def schedule_refill(self, topic: str):
+        if topic in self._refilling:
+            return
+        task = asyncio.create_task(self._refill(topic))
+        self._refilling[topic] = task
+        task.add_done_callback(lambda _: self._refilling.pop(topic, None))
+
+    async def shutdown(self):
+        tasks = list(self._refilling.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "served_from_pool": self.served_from_pool,
+            "generated_inline": self.generated_inline,
+            "invalid_generations": self.invalid_generations,
+            "refills_pending": len(self._refilling),
+        }
+
+    # ─── Internals ───────────────────────────────────────────────────────────
+
+    async def _refill(self, topic: str):
+        try:
+            async with self._semaphore:
+                added = await self._fill(topic, self.batch_size)
+            print(f"[QuizPool] Refilled '{topic}' with {added} questions")
+        except Exception as e:
+            print(f"[QuizPool] Refill for '{topic}' failed: {e}")
+
+    async def _fill(self, topic: str, count: int) -> int:
+        """Generate, validate and store `count` questions; returns how many were added."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                questions = parse_quiz(await self.generate(topic, count))
+            except ValueError as e:
+                self.invalid_generations += 1
+                print(f"[QuizPool] Generation {attempt}/{self.max_attempts} for '{topic}' rejected: {e}")
+                continue
+            added = await self.bank.add(topic, questions)
+            if added:
+                return added
+        return 0
@@ -4,118 +4,578 @@ Handles document ingestion, chunking, embedding, and retrieval.
 """
 
 import uuid
+import hashlib
 import io
+import threading
+import os
 import re
-from typing import List, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Any, Callable, Iterable, Iterator
 import chromadb
 from chromadb.config import Settings
-import google.generativeai as genai
 from config import settings
+from embedding_cache import EmbeddingCache
+from embedding_provider import EmbeddingProvider, collection_suffix, create_embedding_provider
+from embedding_pipeline import EmbeddingPipeline
+from document_reader import create_pdf_pool, iter_pdf_pages
+from lexical_index import LexicalIndex
+from document_catalog import DocumentCatalog
+from chunker import Chunk, Chunker
+import metrics
 
 class RAGEngine:
     """
     Core Retrieval-Augmented Generation engine.
     
     Architecture:
-      - Embedding model: Google Gemini (models/embedding-001) - API based to save memory
-      - Vector store: ChromaDB (persistent, local SQLite backend)
-      - Chunking: Sliding window with overlap for context preservation
-      - Retrieval: Cosine similarity with subject-level filtering
+      - Embedding model: pluggable provider from Config — Google Gemini API,
+        in-process ONNX (CPU) or a local Ollama server
+      - Vector store: ChromaDB (persistent, local SQLite backend), one
+        collection (shard) per subject
+      - Chunking: offset-based Chunker (sentence window / heading-aware /
+        fixed token) configured from Config; chunks record char offsets
+      - Retrieval: Cosine similarity with subject-level filtering, fused with
+        BM25 lexical matches by reciprocal rank fusion
+      - Embedding cache: in-process LRU + persistent SQLite tier
     """
 
-    CHUNK_SIZE = 250      # Reduced chunk size for granular, highly accurate retrieval
-    CHUNK_OVERLAP = 50    # Overlap to preserve context boundaries
-    EMBEDDING_MODEL = "models/gemini-embedding-001"
+    COLLECTION_NAME = "syllabus_docs_v3"
+
+    def __init__(
+        self,
+        persist_dir: str = "./chroma_store",
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_provider: Optional[EmbeddingProvider] = None,
+    ):
+        self.embedding_provider = embedding_provider or create_embedding_provider()
 
-    def __init__(self, persist_dir: str = "./chroma_store"):
         print("[RAG] Initializing ChromaDB...")
         self.client = chromadb.PersistentClient(
             path=persist_dir,
             settings=Settings(anonymized_telemetry=False)
         )
-        self.collection = self.client.get_or_create_collection(name="syllabus_docs_v3")
+        # Vectors from different models are incompatible: each gets its own
+        # collection namespace. Within it, every subject is its own shard.
+        suffix = collection_suffix(self.embedding_provider)
+        self.collection_prefix = f"{self.COLLECTION_NAME}_{suffix}" if suffix else self.COLLECTION_NAME
+        self._shards: Dict[str, Any] = {}
+        self._shards_lock = threading.Lock()
+        for collection in self.client.list_collections():
+            meta = collection.metadata or {}
+            if meta.get("shard_of") == self.collection_prefix:
+                self._shards[meta["subject"]] = collection
+
+        self.embedding_cache = embedding_cache or EmbeddingCache(
+            db_path=os.path.join(persist_dir, settings.embedding_cache_file),
+            max_entries=settings.embedding_cache_size,
+        )
+        self.embedding_pipeline = EmbeddingPipeline(
+            lambda batch: self._embed(batch, task_type="retrieval_document"),
+            batch_size=settings.embedding_batch_size,
+            max_concurrency=settings.embedding_concurrency,
+            max_attempts=settings.embedding_max_attempts,
+            backoff_initial=settings.embedding_backoff_s,
+            non_retryable=self.embedding_provider.non_retryable,
+        )
 
-        print(f"[RAG] Using Gemini Embedding model: {self.EMBEDDING_MODEL}")
-        if settings.gemini_api_key:
-            genai.configure(api_key=settings.gemini_api_key)
-        else:
-            print("[RAG] WARNING: GEMINI_API_KEY not found. Embeddings will fail.")
-        
         print("[RAG] Ready.")
 
-        # In-memory doc registry
+        self.chunker = Chunker.from_config(settings)
+
+        # PDF page-extraction worker processes, created on first use
+        self._pdf_pool = None
+
+        # Lexical (BM25) index kept in sync with the collection
+        self.lexical_index = LexicalIndex(os.path.join(persist_dir, settings.lexical_index_file))
+        # Query embeddings run on their own pool so they can be timed out.
+        # A timed-out call keeps its worker until the provider returns, so
+        # an outage can saturate this pool; once every slot is held, new
+        # queries go straight to the lexical fallback instead of queuing.
+        self._embed_pool = ThreadPoolExecutor(
+            max_workers=settings.query_embedding_workers, thread_name_prefix="rag-embed"
+        )
+        self._embed_slots = threading.BoundedSemaphore(settings.query_embedding_workers)
+        # Shard fan-out gets its own threads so stuck embedding calls
+        # cannot starve vector search.
+        self._shard_pool = ThreadPoolExecutor(
+            max_workers=settings.shard_query_workers, thread_name_prefix="rag-shard"
+        )
+
+        # In-memory doc registry, plus (subject, file_hash) → doc_id for
+        # upload dedupe. Worker threads write both while request handlers
+        # read them on the event loop, so access goes through the lock.
         self._doc_registry: Dict[str, Dict] = {}
+        self._by_file_hash: Dict[tuple, str] = {}
+        self._registry_lock = threading.Lock()
+
+        # Corpus versions: bumped whenever a subject's documents change, so
+        # derived caches can tell stale results apart from current ones.
+        self._corpus_version = 0
+        self._subject_versions: Dict[str, int] = {}
+        self._corpus_listeners: List[Callable[[str], None]] = []
         
-        # Restore doc registry from ChromaDB to persist state across restarts
-        try:
-            results = self.collection.get(include=["metadatas"])
-            if results and results.get("metadatas"):
-                for meta in results["metadatas"]:
-                    if not meta:
+        self.migrate_legacy_collection()
+
+        # Restore the doc registry from the catalog; fall back to a full
+        # chunk scan only when the catalog disagrees with the shards.
+        self.catalog = DocumentCatalog(os.path.join(persist_dir, settings.document_catalog_file))
+        self._load_registry(self.catalog.all())
+        cataloged = sum(e["chunk_count"] for e in self._doc_registry.values())
+        if cataloged != self.count_chunks():
+            print(f"[RAG] Catalog lists {cataloged} chunks, store has {self.count_chunks()}")
+            self.rebuild_catalog()
+
+        if self.lexical_index.count() != self.count_chunks():
+            self.rebuild_lexical_index()
+
+    # ─── Catalog ─────────────────────────────────────────────────────────────
+
+    def _register(self, entry: Dict):
+        self.catalog.upsert(entry)
+        with self._registry_lock:
+            self._unindex_file_hash(self._doc_registry.get(entry["doc_id"]))
+            self._doc_registry[entry["doc_id"]] = entry
+            if entry.get("file_hash"):
+                self._by_file_hash[(entry["subject"], entry["file_hash"])] = entry["doc_id"]
+
+    def _load_registry(self, entries: Iterable[Dict]):
+        with self._registry_lock:
+            self._doc_registry = {e["doc_id"]: e for e in entries}
+            self._by_file_hash = {
+                (e["subject"], e["file_hash"]): e["doc_id"]
+                for e in self._doc_registry.values() if e.get("file_hash")
+            }
+
+    def _unindex_file_hash(self, entry: Optional[Dict]):
+        # caller holds self._registry_lock
+        if entry and self._by_file_hash.get((entry["subject"], entry.get("file_hash"))) == entry["doc_id"]:
+            del self._by_file_hash[(entry["subject"], entry["file_hash"])]
+
+    def rebuild_catalog(self, page_size: int = 1000) -> int:
+        """
+        Repair: rebuild the document catalog from chunk metadata in every
+        shard. Returns the number of documents found.
+        """
+        print("[RAG] Rebuilding document catalog from the vector store...")
+        registry: Dict[str, Dict] = {}
+        for collection in list(self._shards.values()):
+            offset = 0
+            while True:
+                page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+                if not page["ids"]:
+                    break
+                offset += len(page["ids"])
+                for meta in page["metadatas"]:
+                    doc_id = (meta or {}).get("doc_id")
+                    if not doc_id:
                         continue
-                    doc_id = meta.get("doc_id")
-                    if doc_id and doc_id not in self._doc_registry:
-                        self._doc_registry[doc_id] = {
+                    entry = registry.get(doc_id)
+                    if entry is None:
+                        registry[doc_id] = {
                             "doc_id": doc_id,
                             "filename": meta.get("filename", "unknown"),
                             "subject": meta.get("subject", "General"),
-                            "chunk_count": meta.get("chunk_total", 0),
-                            "uploaded_at": meta.get("uploaded_at", "")
+                            "chunk_count": 1,
+                            "uploaded_at": meta.get("uploaded_at", ""),
+                            "file_hash": meta.get("file_hash", "")
                         }
-        except Exception as e:
-            print(f"[RAG] Failed to restore doc registry: {e}")
+                        continue
+                    entry["chunk_count"] += 1
+                    if entry["file_hash"] != meta.get("file_hash", ""):
+                        # Chunks from different versions of a replaced document:
+                        # the source bytes are no longer known, disable dedup.
+                        entry["file_hash"] = ""
+
+        self.catalog.replace_all(registry.values())
+        self._load_registry(registry.values())
+        print(f"[RAG] Catalog holds {len(registry)} documents")
+        return len(registry)
+
+    # ─── Shards ──────────────────────────────────────────────────────────────
+
+    def shard_name(self, subject: str) -> str:
+        """Chroma-safe, collision-free collection name for a subject."""
+        slug = re.sub(r"[^a-z0-9]+", "-", subject.lower()).strip("-")[:48] or "subject"
+        digest = hashlib.sha1(subject.encode("utf-8")).hexdigest()[:8]
+        return f"{self.collection_prefix}__{slug}-{digest}"
+
+    def shard(self, subject: str, create: bool = False):
+        """The collection holding `subject`'s chunks (None if absent and not created)."""
+        collection = self._shards.get(subject)
+        if collection is None and create:
+            with self._shards_lock:
+                collection = self._shards.get(subject)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(
+                        name=self.shard_name(subject),
+                        metadata={"shard_of": self.collection_prefix, "subject": subject},
+                    )
+                    self._shards[subject] = collection
+        return collection
+
+    def list_subjects(self) -> List[str]:
+        return list(self._shards)
+
+    def count_chunks(self, subject: Optional[str] = None) -> int:
+        """Stored chunks in one subject's shard, or across all shards."""
+        if subject is not None:
+            collection = self._shards.get(subject)
+            return collection.count() if collection is not None else 0
+        return sum(c.count() for c in list(self._shards.values()))
+
+    def migrate_legacy_collection(self, page_size: int = 500) -> int:
+        """
+        One-time move of chunks from the pre-sharding single collection into
+        per-subject shards. Vectors are copied, not re-embedded. Writes are
+        upserts and the old collection is dropped only after every page has
+        been copied, so an interrupted run is simply repeated. Returns the
+        number of chunks moved.
+        """
+        try:
+            legacy = self.client.get_collection(name=self.collection_prefix)
+        except Exception:
+            return 0
+
+        total = legacy.count()
+        print(f"[RAG] Migrating {total} chunks from '{legacy.name}' into subject shards...")
+        moved, offset = 0, 0
+        while True:
+            page = legacy.get(
+                include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if not page["ids"]:
+                break
+            by_subject: Dict[str, List[int]] = {}
+            for i, meta in enumerate(page["metadatas"]):
+                by_subject.setdefault((meta or {}).get("subject", "General"), []).append(i)
+            for subject, rows in by_subject.items():
+                self.shard(subject, create=True).upsert(
+                    ids=[page["ids"][i] for i in rows],
+                    embeddings=[page["embeddings"][i] for i in rows],
+                    documents=[page["documents"][i] for i in rows],
+                    metadatas=[page["metadatas"][i] for i in rows],
+                )
+            moved += len(page["ids"])
+            offset += len(page["ids"])
+
+        self.client.delete_collection(name=self.collection_prefix)
+        print(f"[RAG] Migrated {moved} chunks into {len(self._shards)} subject shards")
+        return moved
 
     # ─── Document Management ─────────────────────────────────────────────────
 
-    def add_document(self, text: str, metadata: Dict[str, Any]) -> str:
-        """Chunk, embed, and store a document. Returns doc_id."""
-        doc_id = str(uuid.uuid4())[:8]
-        chunks = self._chunk_text(text)
-
-        print(f"[RAG] Indexing doc {doc_id}: {len(chunks)} chunks from '{metadata.get('filename', '?')}'")
+    def add_document(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Chunk, embed, and store a document. Returns doc_id.
 
-        # Use Gemini API for embeddings
-        res = genai.embed_content(
-            model=self.EMBEDDING_MODEL,
-            content=chunks,
-            task_type="retrieval_document"
-        )
-        embeddings = res['embedding']
+        Chunks are embedded in batches by the EmbeddingPipeline and written
+        to Chroma as each batch completes. If some batches still fail after
+        retries the stored part is kept and the registry entry records
+        `failed_chunks`; if nothing could be stored the error is raised.
+        `on_stage` is told when chunking, embedding and storing begin.
+        """
+        stage = on_stage or (lambda _: None)
+        stage("chunking")
+        chunks = self._chunk_text(text)
+        return self._index_chunks(chunks, metadata, on_progress, stage)
 
-        ids = [f"{doc_id}_{i}" for i in range(len(chunks))]
-        chunk_metadata = [{
-            **metadata,
-            "doc_id": doc_id,
-            "chunk_index": i,
-            "chunk_total": len(chunks)
-        } for i in range(len(chunks))]
-
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=chunks,
-            metadatas=chunk_metadata
-        )
+    def add_document_stream(
+        self,
+        pages: Iterable[str],
+        metadata: Dict[str, Any],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Like add_document, but consumes the text incrementally (e.g. PDF
+        pages). Pages are chunked and embedded as they arrive, so memory is
+        bounded by the in-flight window rather than the whole document.
+        """
+        stage = on_stage or (lambda _: None)
+        stage("chunking")
+        return self._index_chunks(self._chunk_pages(pages), metadata, on_progress, stage)
 
-        self._doc_registry[doc_id] = {
+    def _index_chunks(
+        self,
+        chunks: Iterable[Chunk],
+        metadata: Dict[str, Any],
+        on_progress: Optional[Callable[[int, int], None]],
+        stage: Callable[[str], None],
+    ) -> str:
+        doc_id = str(uuid.uuid4())[:8]
+        collection = self.shard(metadata.get("subject", "General"), create=True)
+        # chunk_total is only known up front for materialized chunk lists;
+        # streamed documents get it back-filled once the stream is drained.
+        known_total = len(chunks) if isinstance(chunks, list) else None
+        stored_ids: List[str] = []
+
+        print(f"[RAG] Indexing doc {doc_id} from '{metadata.get('filename', '?')}'")
+
+        def store_batch(start: int, batch: List[str], embeddings: List[List[float]]):
+            # Batches are written while later ones are still embedding, so
+            # the stage flips to "storing" for the duration of each write.
+            stage("storing")
+            ids = [f"{doc_id}_{start + i}" for i in range(len(batch))]
+            extra = {"chunk_total": known_total} if known_total is not None else {}
+            metadatas = [{
+                **metadata,
+                "doc_id": doc_id,
+                "chunk_index": start + i,
+                "content_hash": EmbeddingCache.content_hash(chunk),
+                "char_start": chunk.start,
+                "char_end": chunk.end,
+                **extra
+            } for i, chunk in enumerate(batch)]
+            collection.add(
+                ids=ids,
+                embeddings=embeddings,
+                documents=batch,
+                metadatas=metadatas
+            )
+            self.lexical_index.add_chunks(zip(ids, batch, metadatas))
+            stored_ids.extend(ids)
+            stage("embedding")
+
+        stage("embedding")
+        result = self.embedding_pipeline.run(chunks, store_batch, on_progress)
+        if result["total"] == 0:
+            raise ValueError("No indexable text found in document")
+        if result["stored"] == 0:
+            raise RuntimeError(f"Embedding failed for every batch: {result['failed'][0]['error']}")
+
+        failed_chunks = sum(f["size"] for f in result["failed"])
+        if failed_chunks:
+            print(f"[RAG] WARNING: doc {doc_id} stored partially, {failed_chunks} chunks failed")
+
+        stage("storing")
+        if known_total is None:
+            for start in range(0, len(stored_ids), 500):
+                batch_ids = stored_ids[start:start + 500]
+                collection.update(
+                    ids=batch_ids,
+                    metadatas=[{"chunk_total": result["total"]}] * len(batch_ids)
+                )
+
+        print(f"[RAG] Indexed doc {doc_id}: {result['stored']}/{result['total']} chunks")
+        self._register({
             "doc_id": doc_id,
             "filename": metadata.get("filename", "unknown"),
             "subject": metadata.get("subject", "General"),
-            "chunk_count": len(chunks),
-            "uploaded_at": metadata.get("uploaded_at", "")
-        }
+            "chunk_count": result["stored"],
+            "uploaded_at": metadata.get("uploaded_at", ""),
+            "file_hash": metadata.get("file_hash", ""),
+            **({"failed_chunks": failed_chunks} if failed_chunks else {}),
+        })
+        self._bump_corpus_version(metadata.get("subject", "General"))
         return doc_id
 
+    def replace_document(
+        self,
+        doc_id: str,
+        pages: Iterable[str],
+        metadata: Dict[str, Any],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Re-index a document in place, keeping its doc_id.
+
+        The new chunk list is diffed against the stored one by content hash:
+        unchanged chunks keep their vectors and are only renumbered (a
+        whitespace-only edit also rewrites the stored text), new chunks are
+        embedded and inserted, and chunks that disappeared are deleted. New chunks are inserted before anything is removed, so a
+        failed embedding leaves the previous version intact.
+
+        Returns counts of kept, renumbered, added, removed and failed chunks.
+        """
+        stage = on_stage or (lambda _: None)
+        old_entry = self._doc_registry.get(doc_id)
+        if old_entry is None:
+            raise KeyError(f"Unknown document {doc_id}")
+
+        stage("chunking")
+        chunks = list(self._chunk_pages(pages))
+        if not chunks:
+            raise ValueError("No indexable text found in document")
+        total = len(chunks)
+
+        subject = metadata.get("subject", old_entry["subject"])
+        old_shard = self.shard(old_entry["subject"], create=True)
+        target = self.shard(subject, create=True)
+        moving = target is not old_shard
+        existing = old_shard.get(
+            where={"doc_id": doc_id},
+            include=["metadatas", "documents", "embeddings"]
+        )
+        vectors = dict(zip(existing["ids"], existing["embeddings"]))
+        old_by_hash: Dict[str, List[tuple]] = {}
+        for chunk_id, meta, doc in zip(existing["ids"], existing["metadatas"], existing["documents"]):
+            # Hash the stored text rather than trusting meta["content_hash"]:
+            # chunks indexed under an older normalization must not match.
+            content_hash = EmbeddingCache.content_hash(doc)
+            old_by_hash.setdefault(content_hash, []).append((meta.get("chunk_index", -1), chunk_id, meta, doc))
+        for matches in old_by_hash.values():
+            matches.sort(key=lambda m: m[0])
+
+        def chunk_meta(index: int, chunk: Chunk, content_hash: str) -> Dict[str, Any]:
+            return {
+                **metadata,
+                "doc_id": doc_id,
+                "chunk_index": index,
+                "chunk_total": total,
+                "content_hash": content_hash,
+                "char_start": chunk.start,
+                "char_end": chunk.end,
+            }
+
+        kept_ids, kept_meta, kept_texts, rewritten, renumbered = [], [], {}, set(), 0
+        new_positions, new_texts = [], []
+        for index, chunk in enumerate(chunks):
+            content_hash = EmbeddingCache.content_hash(chunk)
+            matches = old_by_hash.get(content_hash)
+            if matches:
+                old_index, chunk_id, old_meta, old_text = matches.pop(0)
+                updated = chunk_meta(index, chunk, content_hash)
+                # Document-level provenance (file_hash) is not a reason to
+                # rewrite an otherwise unchanged chunk.
+                updated.pop("file_hash", None)
+                if old_index != index:
+                    renumbered += 1
+                if old_text != chunk:
+                    rewritten.add(chunk_id)   # same content hash, different whitespace
+                changed = moving or chunk_id in rewritten or any(
+                    old_meta.get(k) != v for k, v in updated.items()
+                )
+                kept_ids.append(chunk_id)
+                kept_meta.append(updated if changed else None)
+                kept_texts[chunk_id] = chunk
+            else:
+                new_positions.append(index)
+                new_texts.append(chunk)
+        removed_ids = [m[1] for matches in old_by_hash.values() for m in matches]
+
+        stage("embedding")
+        version = uuid.uuid4().hex[:6]
+
+        def store_batch(start: int, batch: List[str], embeddings: List[List[float]]):
+            stage("storing")
+            positions = new_positions[start:start + len(batch)]
+            ids = [f"{doc_id}_{version}_{i}" for i in positions]
+            metadatas = [
+                chunk_meta(i, chunk, EmbeddingCache.content_hash(chunk))
+                for i, chunk in zip(positions, batch)
+            ]
+            target.add(
+                ids=ids,
+                embeddings=embeddings,
+                documents=batch,
+                metadatas=metadatas
+            )
+            self.lexical_index.add_chunks(zip(ids, batch, metadatas))
+            stage("embedding")
+
+        result = {"stored": 0, "total": 0, "failed": []}
+        if new_texts:
+            result = self.embedding_pipeline.run(new_texts, store_batch, on_progress)
+            if result["stored"] == 0:
+                raise RuntimeError(f"Embedding failed for every batch: {result['failed'][0]['error']}")
+        failed_chunks = sum(f["size"] for f in result["failed"])
+
+        stage("storing")
+        updates = [(cid, meta) for cid, meta in zip(kept_ids, kept_meta) if meta is not None]
+        for start in range(0, len(updates), 500):
+            batch = updates[start:start + 500]
+            if moving:
+                # Subject changed: kept chunks move shards with their vectors
+                target.add(
+                    ids=[u[0] for u in batch],
+                    embeddings=[vectors[u[0]] for u in batch],
+                    documents=[kept_texts[u[0]] for u in batch],
+                    metadatas=[u[1] for u in batch],
+                )
+            elif rewritten:
+                # Pass the kept vectors along with the new text so Chroma
+                # does not re-embed it
+                target.update(
+                    ids=[u[0] for u in batch],
+                    embeddings=[vectors[u[0]] for u in batch],
+                    documents=[kept_texts[u[0]] for u in batch],
+                    metadatas=[u[1] for u in batch],
+                )
+            else:
+                target.update(ids=[u[0] for u in batch], metadatas=[u[1] for u in batch])
+        self.lexical_index.update_chunks([u for u in updates if u[0] not in rewritten])
+        self.lexical_index.add_chunks((cid, kept_texts[cid], meta) for cid, meta in updates if cid in rewritten)
+        stale_ids = existing["ids"] if moving else removed_ids
+        for start in range(0, len(stale_ids), 500):
+            old_shard.delete(ids=stale_ids[start:start + 500])
+        self.lexical_index.remove_chunks(removed_ids)
+
+        self._register({
+            "doc_id": doc_id,
+            "filename": metadata.get("filename", old_entry["filename"]),
+            "subject": subject,
+            "chunk_count": len(kept_ids) + result["stored"],
+            "uploaded_at": metadata.get("uploaded_at", old_entry["uploaded_at"]),
+            "file_hash": metadata.get("file_hash", ""),
+            **({"failed_chunks": failed_chunks} if failed_chunks else {}),
+        })
+        self._bump_corpus_version(subject)
+        if old_entry["subject"] != subject:
+            self._bump_corpus_version(old_entry["subject"])
+
+        summary = {
+            "kept": len(kept_ids),
+            "renumbered": renumbered,
+            "added": result["stored"],
+            "removed": len(removed_ids),
+            "failed": failed_chunks,
+        }
+        print(f"[RAG] Replaced doc {doc_id}: {summary}")
+        return summary
+
     def delete_document(self, doc_id: str):
         """Remove all chunks for a doc from the vector store."""
-        results = self.collection.get(where={"doc_id": doc_id})
-        if results["ids"]:
-            self.collection.delete(ids=results["ids"])
-        self._doc_registry.pop(doc_id, None)
+        with self._registry_lock:
+            entry = self._doc_registry.pop(doc_id, None)
+            self._unindex_file_hash(entry)
+        self.catalog.remove(doc_id)
+        # Unknown to the registry: look in every shard
+        subjects = [entry["subject"]] if entry else self.list_subjects()
+        for subject in subjects:
+            collection = self.shard(subject)
+            if collection is None:
+                continue
+            results = collection.get(where={"doc_id": doc_id}, include=[])
+            if results["ids"]:
+                collection.delete(ids=results["ids"])
+                if not entry:
+                    self._bump_corpus_version(subject)
+        self.lexical_index.remove_document(doc_id)
+        if entry:
+            self._bump_corpus_version(entry["subject"])
         print(f"[RAG] Deleted doc {doc_id}")
 
     def list_documents(self) -> List[Dict]:
-        return list(self._doc_registry.values())
+        with self._registry_lock:
+            return list(self._doc_registry.values())
+
+    def get_document(self, doc_id: str) -> Optional[Dict]:
+        return self._doc_registry.get(doc_id)
+
+    def find_duplicate(self, file_hash: str, subject: str) -> Optional[Dict]:
+        """Return an indexed document with byte-identical source in `subject`."""
+        if not file_hash:
+            return None
+        with self._registry_lock:
+            doc_id = self._by_file_hash.get((subject, file_hash))
+            return self._doc_registry.get(doc_id) if doc_id else None
 
     def get_document_count(self) -> int:
         return len(self._doc_registry)
@@ -123,6 +583,30 @@ class RAGEngine:
     def get_chunk_count(self, doc_id: str) -> int:
         return self._doc_registry.get(doc_id, {}).get("chunk_count", 0)
 
+    # ─── Corpus Versioning ───────────────────────────────────────────────────
+
+    def corpus_version(self, subject: Optional[str] = None) -> int:
+        """
+        Version of the corpus a query with this subject filter searches.
+        Unfiltered ("General") queries span every subject.
+        """
+        if not subject or subject.lower() == "general":
+            return self._corpus_version
+        return self._subject_versions.get(subject, 0)
+
+    def add_corpus_listener(self, callback: Callable[[str], None]):
+        """Register `callback(subject)` to run after a subject's documents change."""
+        self._corpus_listeners.append(callback)
+
+    def _bump_corpus_version(self, subject: str):
+        self._corpus_version += 1
+        self._subject_versions[subject] = self._subject_versions.get(subject, 0) + 1
+        for callback in self._corpus_listeners:
+            try:
+                callback(subject)
+            except Exception as e:
+                print(f"[RAG] Corpus listener failed: {e}")
+
     # ─── Retrieval ────────────────────────────────────────────────────────────
 
     def retrieve(
@@ -132,47 +616,95 @@ class RAGEngine:
         top_k: int = 5
     ) -> Dict[str, Any]:
         """
-        Semantic retrieval with optional subject filtering.
+        Hybrid retrieval with optional subject filtering.
         Returns ranked chunks with scores.
+
+        A subject filter searches only that subject's shard; None/"General"
+        fans out to every shard and merges by score.
+
+        Dense (embedding) and lexical (BM25) candidates are merged by
+        reciprocal rank fusion. If the query embedding fails or exceeds
+        `embedding_timeout_s`, or the shard fan-out exceeds
+        `shard_query_timeout_s`, lexical results are served on their own
+        (`mode: "lexical"`) instead of failing the request.
         """
-        if self.collection.count() == 0:
+        subject = subject_filter if subject_filter and subject_filter.lower() != "general" else None
+        if self.count_chunks(subject) == 0:
             return {"chunks": [], "query": query}
 
-        try:
-            # Use Gemini API for query embedding
-            res = genai.embed_content(
-                model=self.EMBEDDING_MODEL,
-                content=query,
-                task_type="retrieval_query"
-            )
-            query_embedding = res['embedding']
+        candidates = max(top_k, settings.retrieval_candidates)
 
-            where_filter = {}
-            if subject_filter and subject_filter.lower() != "general":
-                where_filter = {"subject": subject_filter}
+        lexical = []
+        if settings.hybrid_retrieval:
+            with metrics.stage("retrieve_lexical"):
+                lexical = [
+                    hit for hit in self.lexical_index.search(query, subject, candidates)
+                    if hit["coverage"] >= settings.lexical_min_coverage
+                ]
 
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(top_k, self.collection.count()),
-                where=where_filter if where_filter else None,
-                include=["documents", "metadatas", "distances"]
-            )
+        try:
+            dense = self._dense_search(query, subject, candidates)
         except Exception as e:
-            print(f"[RAG] Retrieval failed: {e}")
-            return {"chunks": [], "query": query, "error": str(e)}
+            if not lexical:
+                print(f"[RAG] Retrieval failed: {e}")
+                return {"chunks": [], "query": query, "error": str(e)}
+            print(f"[RAG] Dense retrieval unavailable ({e or type(e).__name__}); using lexical results")
+            chunks = [self._lexical_chunk(hit) for hit in lexical]
+            return {"chunks": chunks[:top_k], "query": query, "mode": "lexical"}
+
+        if not lexical:
+            return {"chunks": dense[:top_k], "query": query, "mode": "dense"}
+        return {"chunks": self._fuse(dense, lexical)[:top_k], "query": query, "mode": "hybrid"}
+
+    def _dense_search(self, query: str, subject: Optional[str], n_results: int) -> List[Dict]:
+        with metrics.stage("retrieve_embedding"):
+            if not self._embed_slots.acquire(blocking=False):
+                raise TimeoutError("every query embedding worker is busy with a slow call")
+            try:
+                future = self._embed_pool.submit(self.embed_query, query)
+            except Exception:
+                self._embed_slots.release()
+                raise
+            future.add_done_callback(lambda _: self._embed_slots.release())
+            query_embedding = future.result(timeout=settings.embedding_timeout_s)
+
+        with metrics.stage("retrieve_vector"):
+            shards = [self.shard(subject)] if subject else list(self._shards.values())
+            shards = [c for c in shards if c is not None and c.count() > 0]
+            if len(shards) == 1:
+                results = [self._query_shard(shards[0], query_embedding, n_results)]
+            else:
+                futures = [
+                    self._shard_pool.submit(self._query_shard, c, query_embedding, n_results)
+                    for c in shards
+                ]
+                done, pending = wait(futures, timeout=settings.shard_query_timeout_s)
+                if pending:
+                    for f in pending:
+                        f.cancel()
+                    raise TimeoutError(
+                        f"{len(pending)} of {len(futures)} shard queries exceeded "
+                        f"{settings.shard_query_timeout_s}s"
+                    )
+                results = [f.result() for f in futures]
 
         chunks = []
-        if results["documents"] and results["documents"][0]:
-            for doc, meta, dist in zip(
-                results["documents"][0],
-                results["metadatas"][0],
-                results["distances"][0]
+        for result in results:
+            if not (result["documents"] and result["documents"][0]):
+                continue
+            for chunk_id, doc, meta, dist in zip(
+                result["ids"][0],
+                result["documents"][0],
+                result["metadatas"][0],
+                result["distances"][0]
             ):
                 # Convert ChromaDB default L2 squared distance to cosine similarity
                 # For normalized embeddings: L2^2 = 2 - 2*cos(theta) => cos = 1 - L2^2 / 2
                 score = 1.0 - (dist / 2.0)
                 if score > 0.35:  # STRICT relevance threshold for 100% accuracy (no hallucinations)
                     chunks.append({
+                        "chunk_id": chunk_id,
+                        "doc_id": meta.get("doc_id"),
                         "text": doc,
                         "filename": meta.get("filename", "Unknown"),
                         "subject": meta.get("subject", "General"),
@@ -182,7 +714,73 @@ class RAGEngine:
 
         # Sort by score descending
         chunks.sort(key=lambda x: x["score"], reverse=True)
-        return {"chunks": chunks[:top_k], "query": query}
+        return chunks[:n_results]
+
+    @staticmethod
+    def _query_shard(collection, query_embedding: List[float], n_results: int) -> Dict:
+        return collection.query(
+            query_embeddings=[query_embedding],
+            n_results=min(n_results, collection.count()),
+            include=["documents", "metadatas", "distances"]
+        )
+
+    @staticmethod
+    def _lexical_chunk(hit: Dict) -> Dict:
+        # Lexical-only hits have no cosine score; query-term coverage is the
+        # closest bounded [0, 1] relevance signal.
+        return {
+            "chunk_id": hit["chunk_id"],
+            "doc_id": hit["doc_id"],
+            "text": hit["text"],
+            "filename": hit["filename"],
+            "subject": hit["subject"],
+            "chunk_index": hit["chunk_index"],
+            "score": hit["coverage"],
+        }
+
+    def _fuse(self, dense: List[Dict], lexical: List[Dict]) -> List[Dict]:
+        """Reciprocal rank fusion: rrf(d) = Σ 1 / (k + rank_i(d))."""
+        k = settings.rrf_k
+        fused: Dict[str, Dict] = {}
+        for rank, chunk in enumerate(dense, start=1):
+            fused[chunk["chunk_id"]] = {**chunk, "rrf_score": 1.0 / (k + rank)}
+        for rank, hit in enumerate(lexical, start=1):
+            entry = fused.setdefault(hit["chunk_id"], {**self._lexical_chunk(hit), "rrf_score": 0.0})
+            entry["rrf_score"] += 1.0 / (k + rank)
+        ranked = sorted(fused.values(), key=lambda c: c["rrf_score"], reverse=True)
+        for chunk in ranked:
+            chunk["rrf_score"] = round(chunk["rrf_score"], 6)
+        return ranked
+
+    def rebuild_lexical_index(self, page_size: int = 1000):
+        """(Re)build the BM25 index from every chunk stored in Chroma."""
+        print("[RAG] Building lexical index from the vector store...")
+        self.lexical_index.clear()
+        for collection in list(self._shards.values()):
+            offset = 0
+            while True:
+                page = collection.get(
+                    include=["documents", "metadatas"], limit=page_size, offset=offset
+                )
+                if not page["ids"]:
+                    break
+                self.lexical_index.add_chunks(zip(page["ids"], page["documents"], page["metadatas"]))
+                offset += len(page["ids"])
+        print(f"[RAG] Lexical index holds {self.lexical_index.count()} chunks")
+
+    # ─── Embeddings ──────────────────────────────────────────────────────────
+
+    def embed_query(self, query: str) -> List[float]:
+        """Cached query embedding, shared with retrieve()."""
+        return self._embed([query], task_type="retrieval_query")[0]
+
+    def _embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """Embed texts through the cache; only misses reach the provider."""
+        provider = self.embedding_provider
+        return self.embedding_cache.get_or_embed(
+            texts, task_type, provider.model_id,
+            lambda missing: provider.embed(missing, task_type)
+        )
 
     # ─── PDF Extraction ───────────────────────────────────────────────────────
 
@@ -196,51 +794,38 @@ class RAGEngine:
         except Exception as e:
             raise ValueError(f"PDF extraction failed: {e}")
 
+    def iter_pdf_pages(self, path: str) -> Iterator[str]:
+        """Extract a spooled PDF page by page using the worker process pool."""
+        if self._pdf_pool is None:
+            self._pdf_pool = create_pdf_pool(settings.pdf_workers)
+        pages = iter_pdf_pages(
+            path,
+            self._pdf_pool,
+            pages_per_task=settings.pdf_pages_per_task,
+            max_in_flight=2 * settings.pdf_workers,
+        )
+        # Same page separator as extract_pdf_text, so chunk offsets match it
+        for number, page in enumerate(pages):
+            yield f"\n\n{page}" if number else page
+
+    def close(self):
+        self._embed_pool.shutdown(wait=False, cancel_futures=True)
+        self._shard_pool.shutdown(wait=False, cancel_futures=True)
+        self.embedding_provider.close()
+        self.catalog.close()
+        if self._pdf_pool is not None:
+            self._pdf_pool.shutdown(cancel_futures=True)
+            self._pdf_pool = None
+
     # ─── Chunking ────────────────────────────────────────────────────────────
 
-    def _chunk_text(self, text: str) -> List[str]:
+    def _chunk_text(self, text: str) -> List[Chunk]:
+        """Chunk a whole document; each chunk carries its char offsets."""
+        return self.chunker.chunk(text)
+
+    def _chunk_pages(self, pages: Iterable[str]) -> Iterator[Chunk]:
         """
-        Sliding window chunking with sentence boundary awareness.
-        Preserves semantic units better than naive word splitting.
+        Streaming counterpart of _chunk_text over successive text pieces.
+        Offsets index the concatenation of the pieces.
         """
-        # Clean text
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Split into sentences first
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        chunks = []
-        current_chunk_words = []
-        current_len = 0
-
-        for sentence in sentences:
-            words = sentence.split()
-            word_count = len(words)
-
-            # If a single sentence exceeds CHUNK_SIZE, handle it gracefully by breaking it down
-            if word_count > self.CHUNK_SIZE:
-                if current_chunk_words:
-                    chunks.append(" ".join(current_chunk_words))
-                    current_chunk_words = []
-                    current_len = 0
-                
-                for i in range(0, word_count, self.CHUNK_SIZE - self.CHUNK_OVERLAP):
-                    chunk = words[i:i + self.CHUNK_SIZE]
-                    chunks.append(" ".join(chunk))
-                continue
-
-            if current_len + word_count > self.CHUNK_SIZE and current_chunk_words:
-                chunks.append(" ".join(current_chunk_words))
-                # Keep overlap
-                overlap_words = current_chunk_words[-self.CHUNK_OVERLAP:]
-                current_chunk_words = overlap_words + words
-                current_len = len(current_chunk_words)
-            else:
-                current_chunk_words.extend(words)
-                current_len += word_count
-
-        if current_chunk_words:
-            chunks.append(" ".join(current_chunk_words))
-
-        # Filter very short chunks
-        return [c for c in chunks if len(c.split()) > 20]
+        return self.chunker.iter_chunks(pages)
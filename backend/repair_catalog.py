@@ -0,0 +1,30 @@
+"""
+repair_catalog.py — Rebuilds the document catalog and the lexical index
+from the chunks stored in ChromaDB.
+Run when /documents disagrees with what retrieval finds: python repair_catalog.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from rag_engine import RAGEngine
+
+
+def repair():
+    print("\n🛠  NeuralNotes — Repairing document catalog")
+    print("=" * 40)
+
+    rag = RAGEngine()
+    documents = rag.rebuild_catalog()
+    rag.rebuild_lexical_index()
+
+    print(f"\n  Documents: {documents}")
+    print(f"  Total chunks in store: {rag.count_chunks()}")
+    rag.close()
+    print("\n✦ Repair complete.\n")
+
+
+if __name__ == "__main__":
+    repair()
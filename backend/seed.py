@@ -43,7 +43,7 @@ def seed():
         })
         print(f"  ✅ Indexed as doc_id={doc_id}")
 
-    print(f"\n  Total chunks in store: {rag.collection.count()}")
+    print(f"\n  Total chunks in store: {rag.count_chunks()}")
     print("\n✦ Seeding complete! Start the server and ask questions.\n")
 
 
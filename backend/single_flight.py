@@ -0,0 +1,105 @@
+"""
+Single-Flight
+Concurrent callers asking for the same key share one in-flight call. Used
+by AIClient so a classroom sending the same prompt at once costs one LLM
+call: `call` shares a result, `stream` fans one upstream stream out to
+every subscriber (late joiners replay what was already produced).
+
+Only calls that overlap in time are shared; once a call finishes its key
+is free again, so this is de-duplication, not caching.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class _SharedStream:
+    """One upstream stream, buffered for every subscriber."""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.pieces: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.abandoned = False
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]):
+        try:
+            async for piece in source:
+                self.pieces.append(piece)
+                self._wake()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                if position < len(self.pieces):
+                    position += 1
+                    yield self.pieces[position - 1]
+                elif self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self.abandoned = True   # everyone left: stop generating
+                self.task.cancel()
+
+
+class SingleFlight:
+    """
+    `on_shared(mode)` is called each time a caller joins an in-flight call
+    instead of starting its own. Must be used from a single event loop.
+    """
+
+    def __init__(self, on_shared: Optional[Callable[[str], None]] = None):
+        self.on_shared = on_shared
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, _SharedStream] = {}
+
+    async def call(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of `fn()`, shared with concurrent callers of the same key."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._release(self._calls, key, t))
+        elif self.on_shared:
+            self.on_shared("complete")
+        # Shielded: one caller giving up must not cancel the others' call
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """The pieces of `fn()`, shared with concurrent streams of the same key."""
+        shared = self._streams.get(key)
+        if shared is None or shared.abandoned:
+            shared = _SharedStream(fn())
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda t: self._release(self._streams, key, shared))
+        elif self.on_shared:
+            self.on_shared("stream")
+        async for piece in shared.subscribe():
+            yield piece
+
+    def in_flight(self) -> Dict[str, int]:
+        return {"complete": len(self._calls), "stream": len(self._streams)}
+
+    @staticmethod
+    def _release(registry: Dict, key: Hashable, value: Any):
+        if registry.get(key) is value:
+            del registry[key]
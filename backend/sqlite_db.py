@@ -0,0 +1,97 @@
+"""
+SQLite Database
+Shared access layer for the SQLite stores (conversation memory, insights):
+
+  - one connection per thread, created on first use, so concurrent readers
+    and the writer never share a connection or serialize on a lock
+  - WAL journal plus tuned pragmas, so reads never block behind a write
+  - versioned migrations tracked in PRAGMA user_version
+
+Connections are opened from a file path; ":memory:" would give every
+thread its own empty database and is not supported.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Sequence
+
+from config import settings
+
+Migration = Callable[[sqlite3.Connection], None]
+
+
+class SQLiteDatabase:
+    """
+    Per-thread connection pool over one database file. `connection()`
+    returns the calling thread's connection; `close()` closes them all.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=settings.sqlite_busy_timeout_s,
+            check_same_thread=False,   # only so close() can run on another thread
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_mb * 1024}")
+        conn.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_mb * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Commit on success, roll back on error (the thread's connection)."""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def schema_version(self) -> int:
+        return self.connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self, migrations: Sequence[Migration]) -> int:
+        """
+        Apply `migrations[v:]`, where v is the stored user_version; migration
+        i brings the schema to version i + 1. Each runs in its own
+        BEGIN IMMEDIATE transaction together with the version bump, so a
+        crash leaves the database at the last completed version and two
+        processes starting at once never apply the same step twice.
+        Returns the resulting version.
+        """
+        conn = self.connection()
+        for version, migration in enumerate(migrations, start=1):
+            if self.schema_version() >= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.schema_version() < version:   # re-check under the write lock
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return self.schema_version()
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
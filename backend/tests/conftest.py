@@ -0,0 +1,19 @@
+"""
+tests/conftest.py — Shared fixtures for the backend test suite
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fakes import HashEmbeddingProvider
+
+
+@pytest.fixture
+def fake_embed():
+    """Offline stand-in for RAGEngine._embed / EmbeddingProvider.embed."""
+    return HashEmbeddingProvider().embed
@@ -0,0 +1,54 @@
+"""
+tests/test_answer_cache.py — Unit tests for the semantic answer cache
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from answer_cache import SemanticAnswerCache
+
+CTX = ("Physics", "intermediate", "quick", False)
+
+
+class TestSemanticAnswerCache:
+    def test_near_duplicate_hit(self):
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], CTX, 1, {"answer": "F = ma", "sources": []})
+        hit = cache.lookup([0.99, 0.05, 0.0], CTX, 1)
+        assert hit is not None and hit["answer"] == "F = ma"
+        assert cache.lookup([0.0, 1.0, 0.0], CTX, 1) is None
+        assert cache.stats()["hits"] == 1
+
+    def test_context_and_version_must_match(self):
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], CTX, 1, {"answer": "x"})
+        assert cache.lookup([1.0, 0.0], ("Physics", "beginner", "quick", False), 1) is None
+        assert cache.lookup([1.0, 0.0], CTX, 2) is None
+
+    def test_ttl_expiry(self):
+        cache = SemanticAnswerCache(ttl_seconds=0)
+        cache.store([1.0, 0.0], CTX, 1, {"answer": "x"})
+        assert cache.lookup([1.0, 0.0], CTX, 1) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction(self):
+        cache = SemanticAnswerCache(max_entries=2)
+        cache.store([1.0, 0.0, 0.0], CTX, 1, {"answer": "a"})
+        cache.store([0.0, 1.0, 0.0], CTX, 1, {"answer": "b"})
+        cache.lookup([1.0, 0.0, 0.0], CTX, 1)   # touch "a"
+        cache.store([0.0, 0.0, 1.0], CTX, 1, {"answer": "c"})
+        assert cache.lookup([1.0, 0.0, 0.0], CTX, 1) is not None
+        assert cache.lookup([0.0, 1.0, 0.0], CTX, 1) is None
+
+    def test_invalidate_subject(self):
+        cache = SemanticAnswerCache()
+        cache.store([1.0, 0.0], CTX, 1, {"answer": "phys"})
+        cache.store([1.0, 0.0], (None, "intermediate", "quick", False), 1, {"answer": "general"})
+        cache.store([1.0, 0.0], ("Math", "intermediate", "quick", False), 1, {"answer": "math"})
+        cache.invalidate_subject("Physics")
+        assert cache.lookup([1.0, 0.0], CTX, 1) is None
+        assert cache.lookup([1.0, 0.0], ("General", "intermediate", "quick", False), 1) is None
+        assert cache.lookup([1.0, 0.0], ("Math", "intermediate", "quick", False), 1)["answer"] == "math"
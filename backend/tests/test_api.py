@@ -0,0 +1,160 @@
+"""
+tests/test_api.py — Endpoint tests against the FastAPI app with a stub LLM
+and offline embeddings (stores live in a temp directory)
+Run: pytest tests/ -v
+"""
+
+import json
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+from ai_client import LLMStreamError
+from config import settings
+
+
+class StubAIClient:
+    """Streams `pieces`, then raises `error` if set; complete() returns follow-ups."""
+
+    def __init__(self):
+        self.pieces = ["Force ", "equals ", "mass times acceleration."]
+        self.error = None
+
+    async def stream(self, prompt, max_tokens=1500):
+        for piece in self.pieces:
+            yield piece
+        if self.error:
+            raise LLMStreamError(self.error)
+
+    async def complete(self, prompt, max_tokens=1500):
+        return {"text": '["What is inertia?", "What is a newton?"]', "web_sources": []}
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    # main.py opens its stores relative to the working directory
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("api"))
+        mp.setattr(settings, "quiz_pool_warm_interval_s", 0)
+        import main
+        mp.setattr(main, "ai_client", StubAIClient())
+        with TestClient(main.app) as client:
+            yield main, client
+
+
+@pytest.fixture(autouse=True)
+def offline(api, monkeypatch, fake_embed):
+    main, _ = api
+    monkeypatch.setattr(main.rag_engine, "_embed", fake_embed)
+    main.ai_client.__init__()
+
+
+def events(response):
+    frames = []
+    for frame in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+class TestAskStream:
+    def test_event_order_and_persistence(self, api):
+        main, client = api
+        response = client.post("/ask/stream", json={"question": "What is Newton's second law?", "session_id": "s1"})
+        frames = events(response)
+        assert [e for e, _ in frames] == ["token"] * 3 + ["sources", "meta", "follow_ups", "done"]
+        assert "".join(d["text"] for e, d in frames if e == "token") == "Force equals mass times acceleration."
+        assert frames[-2][1]["follow_up_suggestions"] == ["What is inertia?", "What is a newton?"]
+
+        history = main.memory_manager.get_history("s1")
+        assert history[-1]["answer"] == "Force equals mass times acceleration."
+        # The finished answer is served from the answer cache next time
+        again = events(client.post("/ask/stream", json={"question": "What is Newton's second law?", "session_id": "s1b"}))
+        assert again[-3][1]["from_cache"] is True
+
+    def test_failure_mid_answer_ends_with_error_event(self, api):
+        main, client = api
+        main.ai_client.error = "[Gemini Error] quota exceeded"
+        response = client.post("/ask/stream", json={"question": "Why do satellites orbit Earth?", "session_id": "s2"})
+        frames = events(response)
+        assert [e for e, _ in frames] == ["token"] * 3 + ["error"]
+        assert frames[-1][1] == {"error": "[Gemini Error] quota exceeded"}
+
+        # Neither the partial answer nor the error is cached or remembered
+        assert main.memory_manager.get_history("s2") == []
+        main.ai_client.error = None
+        retry = events(client.post("/ask/stream", json={"question": "Why do satellites orbit Earth?", "session_id": "s2"}))
+        assert retry[-3][1]["from_cache"] is False
+
+
+def upload(client, text, subject="Physics", filename="notes.txt"):
+    return client.post(f"/upload?subject={subject}", files={"file": (filename, text.encode("utf-8"), "text/plain")})
+
+
+def poll(client, job_id):
+    for _ in range(400):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish: {job}")
+
+
+NOTES = " ".join(f"Lens {i} bends light through refraction at curved glass surfaces." for i in range(40))
+
+
+class TestIngestionJobs:
+    def test_upload_job_runs_to_done(self, api):
+        main, client = api
+        response = upload(client, NOTES, subject="Optics")
+        assert response.status_code == 202 and response.json()["status"] == "queued"
+
+        job = poll(client, response.json()["job_id"])
+        assert job["status"] == "done" and job["stage"] == "done"
+        assert job["result"]["chunk_count"] > 0 and job["result"]["duplicate"] is False
+        # Writes are timed as their own stage, not folded into embedding
+        stages = main.ingestion_queue.get(job["job_id"]).stage_seconds
+        assert {"parsing", "embedding", "storing"} <= set(stages)
+
+    def test_unindexable_upload_fails(self, api):
+        _, client = api
+        job = poll(client, upload(client, "too short", filename="empty.txt").json()["job_id"])
+        assert job["status"] == "failed"
+        assert "No indexable text" in job["error"]
+
+    def test_full_queue_is_503(self, api, monkeypatch):
+        main, client = api
+        spooled = []
+
+        def full(filename, subject, payload):
+            spooled.append(payload["path"])
+            raise main.QueueFullError("Ingestion queue is full, try again shortly")
+
+        monkeypatch.setattr(main.ingestion_queue, "submit", full)
+        response = upload(client, NOTES + " Extra.")
+        assert response.status_code == 503
+        assert not os.path.exists(spooled[0])
+
+    def test_unknown_job_is_404(self, api):
+        _, client = api
+        assert client.get("/jobs/missing").status_code == 404
+
+    def test_duplicate_upload_skips_ingestion(self, api, monkeypatch):
+        main, client = api
+        text = NOTES.replace("Lens", "Mirror")
+        first = poll(client, upload(client, text).json()["job_id"])
+
+        submitted = []
+        monkeypatch.setattr(main.ingestion_queue, "submit", lambda *args: submitted.append(args))
+        response = upload(client, text)
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "done" and job["result"]["duplicate"] is True
+        assert job["result"]["doc_id"] == first["result"]["doc_id"]
+        assert submitted == []
@@ -0,0 +1,89 @@
+"""
+tests/test_async_storage.py — Unit tests for the async storage facade
+Run: pytest tests/ -v
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from async_storage import AsyncStore, InstrumentedExecutor
+
+
+class BlockingComponent:
+    name = "component"
+
+    def __init__(self):
+        self.threads = set()
+
+    def slow_read(self, value, delay=0.02):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(delay)
+        return value * 2
+
+
+class TestAsyncStore:
+    def test_calls_run_off_the_loop(self):
+        component = BlockingComponent()
+        executor = InstrumentedExecutor("test", max_workers=2)
+        store = AsyncStore(component, executor)
+
+        async def scenario():
+            return await asyncio.gather(*(store.slow_read(i) for i in range(4)))
+
+        assert asyncio.run(scenario()) == [0, 2, 4, 6]
+        assert all(t.startswith("store-test") for t in component.threads)
+        assert store.name == "component"      # plain attributes pass through
+        executor.shutdown()
+
+    def test_wait_metrics_reflect_queueing(self):
+        executor = InstrumentedExecutor("single", max_workers=1)
+        store = AsyncStore(BlockingComponent(), executor)
+
+        async def scenario():
+            await asyncio.gather(*(store.slow_read(1, delay=0.02) for _ in range(3)))
+
+        asyncio.run(scenario())
+        stats = executor.stats()
+        assert stats["completed"] == 3
+        assert stats["queue_depth"] == 0
+        assert stats["max_wait_ms"] >= 20
+        executor.shutdown()
+
+    def test_errors_propagate_and_are_counted(self):
+        executor = InstrumentedExecutor("err", max_workers=1)
+
+        def boom():
+            raise KeyError("missing")
+
+        async def scenario():
+            try:
+                await executor.run(boom)
+            except KeyError:
+                return True
+
+        assert asyncio.run(scenario())
+        assert executor.stats()["failed"] == 1
+        executor.shutdown()
+
+    def test_cancelled_while_queued_leaves_the_queue(self):
+        executor = InstrumentedExecutor("cancel", max_workers=1)
+        store = AsyncStore(BlockingComponent(), executor)
+
+        async def scenario():
+            running = asyncio.ensure_future(store.slow_read(1, delay=0.05))
+            waiting = asyncio.ensure_future(store.slow_read(2))
+            await asyncio.sleep(0.01)
+            assert executor.stats()["queue_depth"] == 1
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            return await running
+
+        assert asyncio.run(scenario()) == 2
+        stats = executor.stats()
+        assert stats["queue_depth"] == 0 and stats["completed"] == 1
+        executor.shutdown()
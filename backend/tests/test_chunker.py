@@ -0,0 +1,61 @@
+"""
+tests/test_chunker.py — Offset-based chunking strategies
+Run: pytest tests/ -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from chunker import Chunker, is_heading
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'sample_syllabus.txt')
+
+
+@pytest.fixture(scope="module")
+def syllabus():
+    with open(SAMPLE, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestChunker:
+    @pytest.mark.parametrize("strategy", ["sentence", "heading", "fixed"])
+    def test_offsets_slice_the_source(self, syllabus, strategy):
+        chunks = Chunker(strategy, chunk_size=60, chunk_overlap=10).chunk(syllabus)
+        assert chunks
+        for chunk in chunks:
+            assert syllabus[chunk.start:chunk.end] == chunk
+            # A sentence window may carry the overlap on top of a full sentence
+            assert 20 < len(chunk.split()) <= 60 + 10
+
+    @pytest.mark.parametrize("strategy", ["sentence", "heading", "fixed"])
+    def test_stream_matches_whole_text(self, syllabus, strategy):
+        chunker = Chunker(strategy, chunk_size=60, chunk_overlap=10)
+        pieces = [syllabus[i:i + 101] for i in range(0, len(syllabus), 101)]
+        assert list(chunker.iter_chunks(pieces)) == chunker.chunk(syllabus)
+
+    def test_fixed_windows_overlap(self):
+        text = " ".join(f"w{i}" for i in range(100))
+        chunks = Chunker("fixed", chunk_size=40, chunk_overlap=10).chunk(text)
+        assert [c.split()[0] for c in chunks] == ["w0", "w30", "w60"]
+
+    def test_heading_starts_new_chunk(self):
+        body = "Energy is conserved in every closed system we study here. " * 4
+        text = f"Chapter 1: Energy\n{body}\nChapter 2: Momentum\n{body}"
+        chunks = Chunker("heading", chunk_size=200, chunk_overlap=20).chunk(text)
+        assert [c.split("\n")[0] for c in chunks] == ["Chapter 1: Energy", "Chapter 2: Momentum"]
+
+    def test_heading_detection(self):
+        assert is_heading("Chapter 3: Thermodynamics")
+        assert is_heading("Kepler's Laws:")
+        assert is_heading("PHYSICS SYLLABUS — CLASS 11 & 12")
+        assert not is_heading("Unit of force: Newton (N) = kg·m/s²")
+        assert not is_heading("This property is called inertia.")
+
+    def test_invalid_configuration(self):
+        with pytest.raises(ValueError):
+            Chunker("paragraph")
+        with pytest.raises(ValueError):
+            Chunker(chunk_size=50, chunk_overlap=50)
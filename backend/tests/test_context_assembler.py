@@ -0,0 +1,70 @@
+"""
+tests/test_context_assembler.py — Unit tests for prompt context assembly
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from chunker import Chunker
+from context_assembler import assemble_context, estimate_tokens, overlap_chars
+
+SENTENCES = " ".join(
+    f"Sentence number {i} talks about topic {i % 7} in some detail." for i in range(200)
+)
+
+
+def retrieved(chunks, indices, doc_id="d1"):
+    """Chunks `indices` of a document, in the given (score) order."""
+    return [{"text": chunks[i], "doc_id": doc_id, "chunk_index": i} for i in indices]
+
+
+class TestContextAssembler:
+    chunks = Chunker(chunk_size=60, chunk_overlap=15, min_words=1).chunk(SENTENCES)
+
+    def test_overlap_detection(self):
+        a, b = self.chunks[0], self.chunks[1]
+        n = overlap_chars(a, b)
+        assert n > 0
+        assert a + b[n:] == SENTENCES[a.start:b.end]
+        assert overlap_chars("the end of one", "the start of another") == 0
+
+    def test_adjacent_chunks_merge_without_repeats(self):
+        context = assemble_context(retrieved(self.chunks, [2, 0, 1]))
+        assert context["spans"] == 1
+        assert context["text"] == SENTENCES[self.chunks[0].start:self.chunks[2].end]
+        assert context["tokens_saved"] > 0
+        assert context["tokens_in"] - context["tokens"] == context["tokens_saved"]
+
+    def test_spans_in_score_order(self):
+        context = assemble_context(retrieved(self.chunks, [5, 0, 6]))
+        first, second = context["text"].split("\n")
+        assert first.startswith(self.chunks[5]) and first.endswith(self.chunks[6])
+        assert second == self.chunks[0]
+
+    def test_duplicates_and_other_documents(self):
+        chunks = retrieved(self.chunks, [0]) + retrieved(self.chunks, [0, 1], doc_id="copy")
+        context = assemble_context(chunks)
+        # The copy's chunk 0 is a duplicate; its chunk 1 does not join doc d1
+        assert context["text"] == f"{self.chunks[0]}\n{self.chunks[1]}"
+
+    def test_budget_admits_best_chunks_first(self):
+        chunks = retrieved(self.chunks, [3, 8, 4])
+        tail = self.chunks[4][overlap_chars(self.chunks[3], self.chunks[4]):]
+        context = assemble_context(chunks, budget_tokens=estimate_tokens(self.chunks[3]) + estimate_tokens(tail))
+        # Chunk 4 only costs its non-overlapping tail, so it fits after 8 is refused
+        assert self.chunks[8] not in context["text"]
+        assert context["text"] == SENTENCES[self.chunks[3].start:self.chunks[4].end]
+        assert context["tokens_over_budget"] == estimate_tokens(self.chunks[8])
+
+    def test_oversized_best_chunk_is_truncated(self):
+        context = assemble_context(retrieved(self.chunks, [0, 1]), budget_tokens=10)
+        assert context["tokens"] <= 10
+        assert self.chunks[0].startswith(context["text"])
+
+    def test_chunks_without_position_stand_alone(self):
+        context = assemble_context([{"text": "alpha beta"}, {"text": "gamma delta"}])
+        assert context["text"] == "alpha beta\ngamma delta"
+        assert assemble_context([])["text"] == ""
@@ -0,0 +1,52 @@
+"""
+tests/test_document_catalog.py — Persistent document catalog
+Run: pytest tests/ -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from document_catalog import DocumentCatalog
+
+TEXT = "Thermodynamics studies heat, work and the energy exchanged between systems. " * 6
+
+
+class TestDocumentCatalog:
+    def test_round_trip(self, tmp_path):
+        catalog = DocumentCatalog(str(tmp_path / "catalog.db"))
+        catalog.upsert({"doc_id": "a", "filename": "a.txt", "subject": "Physics", "chunk_count": 3})
+        catalog.upsert({"doc_id": "b", "filename": "b.txt", "subject": "Physics", "chunk_count": 2,
+                        "failed_chunks": 1})
+        catalog.remove("a")
+        [entry] = catalog.all()
+        assert entry["doc_id"] == "b" and entry["failed_chunks"] == 1
+
+
+class TestEngineCatalog:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch, fake_embed):
+        from rag_engine import RAGEngine
+        self.persist_dir = str(tmp_path / "chroma")
+        self.rag = RAGEngine(persist_dir=self.persist_dir)
+        monkeypatch.setattr(self.rag, "_embed", fake_embed)
+        self.doc_id = self.rag.add_document(TEXT, {"filename": "heat.txt", "subject": "Physics"})
+
+    def test_startup_reads_catalog_not_chunks(self, monkeypatch):
+        from rag_engine import RAGEngine
+        monkeypatch.setattr(RAGEngine, "rebuild_catalog", lambda self: pytest.fail("scanned chunks"))
+        reopened = RAGEngine(persist_dir=self.persist_dir)
+        assert reopened.get_document(self.doc_id)["filename"] == "heat.txt"
+
+    def test_repair_after_catalog_loss(self):
+        from rag_engine import RAGEngine
+        self.rag.catalog.replace_all([])
+        reopened = RAGEngine(persist_dir=self.persist_dir)
+        assert reopened.get_chunk_count(self.doc_id) == self.rag.get_chunk_count(self.doc_id)
+        assert reopened.catalog.count() == 1
+
+    def test_delete_updates_catalog(self):
+        self.rag.delete_document(self.doc_id)
+        assert self.rag.catalog.count() == 0
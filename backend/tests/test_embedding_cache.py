@@ -0,0 +1,79 @@
+"""
+tests/test_embedding_cache.py — Unit tests for the two-tier embedding cache
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from embedding_cache import EmbeddingCache
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+class TestEmbeddingCache:
+    def test_memory_hit_after_miss(self):
+        cache = EmbeddingCache()
+        embed = CountingEmbedder()
+        first = cache.get_or_embed(["What is force?"], "retrieval_query", "m", embed)
+        second = cache.get_or_embed(["  What is   force? "], "retrieval_query", "m", embed)
+        assert first == second
+        assert len(embed.calls) == 1
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_includes_task_and_model(self):
+        cache = EmbeddingCache()
+        embed = CountingEmbedder()
+        cache.get_or_embed(["force"], "retrieval_query", "m1", embed)
+        cache.get_or_embed(["force"], "retrieval_document", "m1", embed)
+        cache.get_or_embed(["force"], "retrieval_query", "m2", embed)
+        assert len(embed.calls) == 3
+
+    def test_only_misses_are_embedded(self):
+        cache = EmbeddingCache()
+        embed = CountingEmbedder()
+        cache.get_or_embed(["a b", "c d"], "retrieval_document", "m", embed)
+        vectors = cache.get_or_embed(["a b", "e f", "e f"], "retrieval_document", "m", embed)
+        assert embed.calls[-1] == ["e f"]
+        assert len(vectors) == 3 and vectors[1] == vectors[2]
+
+    def test_lru_bound(self):
+        cache = EmbeddingCache(max_entries=2)
+        embed = CountingEmbedder()
+        cache.get_or_embed(["one", "two", "three"], "t", "m", embed)
+        assert cache.stats()["memory_entries"] == 2
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        db = str(tmp_path / "emb.db")
+        embed = CountingEmbedder()
+        EmbeddingCache(db_path=db).get_or_embed(["persist me"], "t", "m", embed)
+
+        reopened = EmbeddingCache(db_path=db)
+        vec = reopened.get_or_embed(["persist me"], "t", "m", embed)[0]
+        assert len(embed.calls) == 1
+        assert vec == [10.0, 1.0, 0.5]
+        assert reopened.stats()["disk_hits"] == 1
+
+    def test_content_hash_ignores_whitespace_but_not_case(self):
+        assert EmbeddingCache.content_hash("F = ma\n") == EmbeddingCache.content_hash("F  = ma")
+        assert EmbeddingCache.content_hash("ph 7") != EmbeddingCache.content_hash("pH 7")
+        assert EmbeddingCache.content_hash("F = ma") != EmbeddingCache.content_hash("F = mv")
+
+    def test_rows_from_an_older_key_version_are_not_reused(self, tmp_path, monkeypatch):
+        db = str(tmp_path / "emb.db")
+        embed = CountingEmbedder()
+        monkeypatch.setattr(EmbeddingCache, "KEY_VERSION", 1)
+        EmbeddingCache(db_path=db).get_or_embed(["versioned"], "t", "m", embed)
+        monkeypatch.setattr(EmbeddingCache, "KEY_VERSION", 2)
+        EmbeddingCache(db_path=db).get_or_embed(["versioned"], "t", "m", embed)
+        assert len(embed.calls) == 2
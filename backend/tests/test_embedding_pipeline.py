@@ -0,0 +1,114 @@
+"""
+tests/test_embedding_pipeline.py — Unit tests for batched embedding ingestion
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from embedding_pipeline import EmbeddingPipeline
+
+
+def fake_embed(texts):
+    return [[float(len(t))] for t in texts]
+
+
+class TestEmbeddingPipeline:
+    def test_batches_and_sink_order_independent(self):
+        stored = {}
+        pipeline = EmbeddingPipeline(fake_embed, batch_size=3, max_concurrency=2)
+        chunks = [f"chunk {i}" for i in range(10)]
+
+        def sink(start, texts, vectors):
+            for i, (t, v) in enumerate(zip(texts, vectors)):
+                stored[start + i] = (t, v)
+
+        result = pipeline.run(chunks, sink)
+        assert result == {"stored": 10, "total": 10, "failed": []}
+        assert [stored[i][0] for i in range(10)] == chunks
+
+    def test_transient_failure_is_retried(self):
+        attempts = {"n": 0}
+
+        def flaky(texts):
+            attempts["n"] += 1
+            if attempts["n"] == 1:
+                raise ConnectionError("rate limited")
+            return fake_embed(texts)
+
+        pipeline = EmbeddingPipeline(flaky, batch_size=10, max_attempts=3, backoff_initial=0, backoff_max=0)
+        result = pipeline.run(["a", "b"], lambda *a: None)
+        assert result["stored"] == 2
+        assert attempts["n"] == 2
+
+    def test_bad_batch_keeps_others(self):
+        def poisoned(texts):
+            if "bad" in texts:
+                raise ValueError("invalid input")
+            return fake_embed(texts)
+
+        stored = []
+        progress = []
+        pipeline = EmbeddingPipeline(poisoned, batch_size=2, max_attempts=2, backoff_initial=0, backoff_max=0)
+        result = pipeline.run(
+            ["a", "b", "bad", "c", "d", "e"],
+            lambda start, texts, vectors: stored.extend(texts),
+            on_progress=lambda done, total: progress.append((done, total)),
+        )
+        assert result["stored"] == 4
+        assert result["failed"][0]["start"] == 2
+        assert sorted(stored) == ["a", "b", "d", "e"]
+        assert len(progress) == 3 and progress[-1][1] == 6
+
+    def test_concurrency_bound(self):
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+        barrier = threading.Event()
+
+        def slow(texts):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            barrier.wait(0.05)
+            with lock:
+                active["now"] -= 1
+            return fake_embed(texts)
+
+        EmbeddingPipeline(slow, batch_size=1, max_concurrency=3).run(list("abcdefgh"), lambda *a: None)
+        assert active["peak"] <= 3
+
+    def test_non_retryable_fails_fast(self):
+        attempts = {"n": 0}
+
+        def unauthorized(texts):
+            attempts["n"] += 1
+            raise PermissionError("bad key")
+
+        pipeline = EmbeddingPipeline(unauthorized, max_attempts=5, backoff_initial=0,
+                                     backoff_max=0, non_retryable=(PermissionError,))
+        result = pipeline.run(["a"], lambda *a: None)
+        assert result["stored"] == 0
+        assert attempts["n"] == 1
+
+    def test_lazy_input_is_consumed_in_a_bounded_window(self):
+        pulled = {"n": 0}
+        max_ahead = {"n": 0}
+        stored = {"n": 0}
+
+        def produce():
+            for i in range(50):
+                pulled["n"] += 1
+                max_ahead["n"] = max(max_ahead["n"], pulled["n"] - stored["n"])
+                yield f"chunk {i}"
+
+        def sink(start, texts, vectors):
+            stored["n"] += len(texts)
+
+        pipeline = EmbeddingPipeline(fake_embed, batch_size=5, max_concurrency=2)
+        result = pipeline.run(produce(), sink)
+        assert result["stored"] == result["total"] == 50
+        # 2 × concurrency batches in flight plus the batch being assembled
+        assert max_ahead["n"] <= 5 * 5
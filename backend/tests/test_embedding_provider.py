@@ -0,0 +1,66 @@
+"""
+tests/test_embedding_provider.py — Embedding provider selection and wiring
+Run: pytest tests/ -v
+"""
+
+import dataclasses
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import Config
+from embedding_provider import (
+    EmbeddingProvider, GeminiEmbeddingProvider, OnnxEmbeddingProvider,
+    collection_suffix, create_embedding_provider,
+)
+
+
+class FakeProvider(EmbeddingProvider):
+    name = "fake"
+
+    def __init__(self, embed):
+        super().__init__("bag-of-words")
+        self._embed = embed
+        self.calls = 0
+
+    def embed(self, texts, task_type):
+        self.calls += 1
+        return self._embed(texts, task_type)
+
+
+def _config(**overrides):
+    return dataclasses.replace(Config(), **overrides)
+
+
+class TestProviderSelection:
+    def test_auto_without_key_is_local(self):
+        provider = create_embedding_provider(_config(embedding_provider="auto", gemini_api_key=""))
+        assert isinstance(provider, OnnxEmbeddingProvider)
+
+    def test_auto_with_key_is_gemini(self):
+        provider = create_embedding_provider(_config(embedding_provider="auto", gemini_api_key="test-key"))
+        assert isinstance(provider, GeminiEmbeddingProvider)
+        assert collection_suffix(provider) == ""
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError):
+            create_embedding_provider(_config(embedding_provider="word2vec"))
+
+    def test_local_models_get_their_own_collection(self):
+        assert collection_suffix(OnnxEmbeddingProvider()) == "onnx-all-minilm-l6-v2"
+
+
+class TestRAGWithProvider:
+    def test_ingest_and_retrieve_through_provider(self, tmp_path, fake_embed):
+        from rag_engine import RAGEngine
+        provider = FakeProvider(fake_embed)
+        rag = RAGEngine(persist_dir=str(tmp_path / "chroma"), embedding_provider=provider)
+        text = "Ohm's law states that voltage equals current times resistance in a conductor. " * 6
+        rag.add_document(text, {"filename": "ohm.txt", "subject": "Physics"})
+
+        result = rag.retrieve("voltage current resistance", subject_filter="Physics")
+        assert result["chunks"]
+        assert provider.calls >= 2
+        assert rag.shard("Physics").name.startswith("syllabus_docs_v3_fake-bag-of-words__physics-")
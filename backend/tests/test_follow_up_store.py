@@ -0,0 +1,104 @@
+"""
+tests/test_follow_up_store.py — Unit tests for deferred follow-up generation
+Run: pytest tests/ -v
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from follow_up_store import FollowUpStore
+
+
+class TestFollowUpStore:
+    def test_ticket_resolves(self):
+        async def scenario():
+            store = FollowUpStore()
+
+            async def generate():
+                await asyncio.sleep(0.01)
+                return ["q1?", "q2?"]
+
+            ticket = store.submit(generate)
+            assert store.get(ticket)["status"] == "pending"
+            return await store.wait(ticket, timeout=1.0)
+
+        result = asyncio.run(scenario())
+        assert result["status"] == "ready"
+        assert result["follow_up_suggestions"] == ["q1?", "q2?"]
+
+    def test_failure_is_reported(self):
+        async def scenario():
+            store = FollowUpStore()
+
+            async def generate():
+                raise RuntimeError("boom")
+
+            ticket = store.submit(generate)
+            return await store.wait(ticket, timeout=1.0)
+
+        assert asyncio.run(scenario())["status"] == "failed"
+
+    def test_bounded_and_unknown_tickets(self):
+        async def scenario():
+            store = FollowUpStore(max_entries=2)
+
+            async def generate():
+                return []
+
+            tickets = [store.submit(generate) for _ in range(3)]
+            await asyncio.sleep(0)
+            return store, tickets
+
+        store, tickets = asyncio.run(scenario())
+        assert store.get(tickets[0]) is None
+        assert store.get(tickets[2]) is not None
+        assert store.get("missing") is None
+
+    def test_evicted_ticket_is_cancelled_and_frees_its_slot(self):
+        async def scenario():
+            store = FollowUpStore(max_entries=1, max_concurrency=1)
+            started, cancelled = asyncio.Event(), []
+
+            async def hang():
+                started.set()
+                try:
+                    await asyncio.sleep(60)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+            async def quick():
+                return ["q?"]
+
+            first = store.submit(hang)
+            await started.wait()
+            second = store.submit(quick)   # evicts the hung ticket
+            evicted = await store.wait(first, timeout=1.0)
+            return evicted, await store.wait(second, timeout=1.0), cancelled
+
+        evicted, result, cancelled = asyncio.run(scenario())
+        assert evicted is None and cancelled == [True]
+        assert result == {"status": "ready", "follow_up_suggestions": ["q?"]}
+
+    def test_concurrency_is_capped(self):
+        async def scenario():
+            store = FollowUpStore(max_concurrency=2)
+            active = peak = 0
+
+            async def generate():
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                return []
+
+            tickets = [store.submit(generate) for _ in range(6)]
+            for t in tickets:
+                await store.wait(t, timeout=1.0)
+            return peak
+
+        assert asyncio.run(scenario()) == 2
@@ -0,0 +1,102 @@
+"""
+tests/test_history_cache.py — Unit tests for the session history cache
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from history_cache import HistoryCache, entry_size
+
+
+def turn(i, answer="A"):
+    return {"question": f"Q{i}", "answer": answer, "type": "answered", "topic": "t", "timestamp": str(i)}
+
+
+def fill(cache, session, history):
+    token = cache.begin_fill(session)
+    cache.finish_fill(session, token, history)
+
+
+class TestHistoryCache:
+    def test_miss_then_hit(self):
+        cache = HistoryCache(turns_per_session=4)
+        assert cache.get("s", 2) is None
+        fill(cache, "s", [turn(i) for i in range(6)])
+        assert [t["question"] for t in cache.get("s", 2)] == ["Q4", "Q5"]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_short_session_is_complete(self):
+        cache = HistoryCache(turns_per_session=4)
+        fill(cache, "s", [turn(0)])
+        # Only one turn exists, so asking for 3 is still answerable
+        assert [t["question"] for t in cache.get("s", 3)] == ["Q0"]
+
+    def test_write_through_ring(self):
+        cache = HistoryCache(turns_per_session=3)
+        fill(cache, "s", [])
+        for i in range(5):
+            cache.append("s", turn(i))
+        assert [t["question"] for t in cache.get("s", 3)] == ["Q2", "Q3", "Q4"]
+        assert cache.bytes == sum(entry_size(turn(i)) for i in range(2, 5))
+
+    def test_uncached_session_append_is_ignored(self):
+        cache = HistoryCache()
+        cache.append("s", turn(0))
+        assert cache.get("s", 1) is None
+
+    def test_write_during_fill_prevents_stale_install(self):
+        cache = HistoryCache()
+        token = cache.begin_fill("s")
+        snapshot = [turn(0)]                # read before the write below
+        cache.append("s", turn(1))
+        cache.finish_fill("s", token, snapshot)
+        assert cache.get("s", 1) is None    # next read goes to the database
+
+    def test_lru_eviction_under_budget(self):
+        size = entry_size(turn(0))
+        cache = HistoryCache(turns_per_session=2, budget_bytes=size * 4)
+        fill(cache, "a", [turn(0), turn(1)])
+        fill(cache, "b", [turn(0), turn(1)])
+        cache.get("a", 1)                   # b is now least recently used
+        fill(cache, "c", [turn(0)])
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 1) is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.bytes <= cache.budget_bytes
+
+    def test_results_are_copies(self):
+        cache = HistoryCache()
+        fill(cache, "s", [turn(0)])
+        cache.get("s", 1)[0]["answer"] = "mutated"
+        assert cache.get("s", 1)[0]["answer"] == "A"
+
+
+class TestConversationMemoryCache:
+    @pytest.fixture
+    def memory(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('memory_manager.DB_PATH', str(tmp_path / "memory.db"))
+        from memory_manager import ConversationMemory
+        mem = ConversationMemory()
+        yield mem
+        mem.close()
+
+    def test_reads_after_writes_never_stale(self, memory):
+        memory.add_turn("s", "Q0", "A0")
+        assert [h["question"] for h in memory.get_history("s", 5)] == ["Q0"]
+        for i in range(1, 15):
+            memory.add_turn("s", f"Q{i}", f"A{i}")
+            assert memory.get_history("s", 3)[-1]["question"] == f"Q{i}"
+        stats = memory.history_cache.stats()
+        assert stats["misses"] == 1 and stats["hits"] == 14
+
+    def test_large_window_bypasses_cache(self, memory):
+        for i in range(30):
+            memory.add_turn("s", f"Q{i}", f"A{i}")
+        history = memory.get_history("s", last_n=25)
+        assert len(history) == 25 and history[-1]["question"] == "Q29"
+        assert memory.history_cache.stats()["bypassed"] == 1
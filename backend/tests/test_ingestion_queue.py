@@ -0,0 +1,105 @@
+"""
+tests/test_ingestion_queue.py — Unit tests for background ingestion jobs
+Run: pytest tests/ -v
+"""
+
+import asyncio
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ingestion_queue import IngestionQueue, QueueFullError
+
+
+async def wait_for(job, status):
+    for _ in range(200):
+        if job.status == status:
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError(f"job stuck in {job.status}, expected {status}")
+
+
+class TestIngestionQueue:
+    def test_job_runs_queued_then_running_then_done(self):
+        release = threading.Event()
+
+        def handler(job):
+            job.set_stage("embedding")
+            release.wait(5)
+            job.set_stage("storing")
+            return {"doc_id": "d1"}
+
+        async def scenario():
+            queue = IngestionQueue(handler, workers=1)
+            job = queue.submit("notes.txt", "Physics", {"path": "x"})
+            seen = [job.status]
+            await wait_for(job, "running")
+            seen.append(job.status)
+            release.set()
+            await wait_for(job, "done")
+            seen.append(job.status)
+            await queue.shutdown()
+            return job, seen
+
+        job, seen = asyncio.run(scenario())
+        assert seen == ["queued", "running", "done"]
+        assert job.stage == "done" and job.result == {"doc_id": "d1"}
+        assert job.payload == {}  # upload reference released
+        assert {"embedding", "storing"} <= set(job.stage_seconds)
+
+    def test_handler_error_marks_job_failed(self):
+        def handler(job):
+            job.set_stage("parsing")
+            raise ValueError("No indexable text found in document")
+
+        async def scenario():
+            queue = IngestionQueue(handler, workers=1)
+            job = queue.submit("empty.txt", "Physics", {})
+            await wait_for(job, "failed")
+            await queue.shutdown()
+            return job
+
+        job = asyncio.run(scenario())
+        assert job.to_dict()["error"] == "No indexable text found in document"
+        assert job.stage == "parsing" and job.finished_at is not None
+
+    def test_full_backlog_raises(self):
+        release = threading.Event()
+
+        async def scenario():
+            queue = IngestionQueue(lambda job: release.wait(5), workers=1, max_pending=1)
+            first = queue.submit("a.txt", "Physics", {})
+            await wait_for(first, "running")
+            queue.submit("b.txt", "Physics", {})        # waits in the queue
+            with pytest.raises(QueueFullError):
+                queue.submit("c.txt", "Physics", {})
+            release.set()
+            await queue.shutdown()
+
+        asyncio.run(scenario())
+
+    def test_history_keeps_newest_finished_jobs(self):
+        release = threading.Event()
+
+        async def scenario():
+            queue = IngestionQueue(lambda job: release.wait(5), workers=1, history_size=2)
+            running = queue.submit("slow.txt", "Physics", {})
+            await wait_for(running, "running")
+            done = [queue.record_completed(f"{i}.txt", "Physics", {}) for i in range(3)]
+            # The oldest entry is still running, so nothing behind it is dropped
+            kept_while_running = [queue.get(j.job_id) is not None for j in [running] + done]
+            release.set()
+            await wait_for(running, "done")
+            latest = queue.record_completed("3.txt", "Physics", {})
+            await queue.shutdown()
+            return queue, running, done, latest, kept_while_running
+
+        queue, running, done, latest, kept_while_running = asyncio.run(scenario())
+        assert kept_while_running == [True] * 4
+        assert [queue.get(j.job_id) is not None for j in [running] + done + [latest]] == [
+            False, False, False, True, True
+        ]
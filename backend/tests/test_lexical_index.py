@@ -0,0 +1,131 @@
+"""
+tests/test_lexical_index.py — BM25 lexical index and hybrid retrieval
+Run: pytest tests/ -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lexical_index import LexicalIndex, tokenize
+
+
+def _meta(doc_id, subject="Physics", index=0):
+    return {"doc_id": doc_id, "subject": subject, "filename": f"{doc_id}.txt", "chunk_index": index}
+
+
+class TestLexicalIndex:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.index = LexicalIndex(str(tmp_path / "lexical.db"))
+        self.index.add_chunks([
+            ("a_0", "Newton's second law relates force, mass and acceleration.", _meta("a")),
+            ("a_1", "Kinetic energy equals one half m v squared.", _meta("a", index=1)),
+            ("b_0", "Photosynthesis converts light energy into chemical energy.", _meta("b", "Biology")),
+        ])
+
+    def test_tokenize_drops_stop_words(self):
+        assert tokenize("The Law of the Jungle") == ["law", "jungle"]
+
+    def test_exact_term_ranks_first(self):
+        hits = self.index.search("kinetic energy")
+        assert hits[0]["chunk_id"] == "a_1"
+        assert hits[0]["coverage"] == 1.0
+
+    def test_subject_filter(self):
+        hits = self.index.search("energy", subject="Biology")
+        assert [h["chunk_id"] for h in hits] == ["b_0"]
+
+    def test_remove_document(self):
+        self.index.remove_document("a")
+        assert self.index.count() == 1
+        assert self.index.search("newton") == []
+
+
+class TestHybridRetrieval:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch, fake_embed):
+        from rag_engine import RAGEngine
+        self.rag = RAGEngine(persist_dir=str(tmp_path / "test_chroma"))
+        monkeypatch.setattr(self.rag, "_embed", fake_embed)
+        text = (
+            "Chapter PHY-204 introduces the Bernoulli equation for incompressible flow. "
+            "Pressure, velocity and height trade off along a streamline in steady flow. "
+            "The continuity equation states that mass flow rate is conserved in a pipe. "
+        ) * 3
+        self.doc_id = self.rag.add_document(text, {"filename": "fluids.txt", "subject": "Physics"})
+
+    def test_results_carry_doc_id(self):
+        result = self.rag.retrieve("Bernoulli equation", subject_filter="Physics")
+        assert result["chunks"]
+        assert result["chunks"][0]["doc_id"] == self.doc_id
+
+    def test_lexical_fallback_when_embedding_fails(self, monkeypatch):
+        def broken(texts, task_type):
+            raise RuntimeError("embedding API down")
+
+        monkeypatch.setattr(self.rag, "_embed", broken)
+        result = self.rag.retrieve("Bernoulli equation", subject_filter="Physics")
+        assert result["mode"] == "lexical"
+        assert "error" not in result
+        assert "Bernoulli" in result["chunks"][0]["text"]
+
+    def test_stuck_embedding_calls_do_not_queue_up(self, monkeypatch, fake_embed):
+        import threading
+        import time
+        from rag_engine import settings
+        release, calls = threading.Event(), []
+
+        def hung(texts, task_type):
+            calls.append(texts)
+            release.wait(5)
+            return fake_embed(texts, task_type)
+
+        monkeypatch.setattr(self.rag, "_embed", hung)
+        monkeypatch.setattr(settings, "embedding_timeout_s", 0.02)
+        try:
+            modes = [self.rag.retrieve(f"Bernoulli equation {i}", subject_filter="Physics")["mode"]
+                     for i in range(settings.query_embedding_workers + 2)]
+        finally:
+            release.set()
+        assert modes == ["lexical"] * len(modes)
+        # Once every worker is held by a stuck call, later queries skip embedding
+        assert len(calls) == settings.query_embedding_workers
+
+        monkeypatch.setattr(self.rag, "_embed", fake_embed)
+        time.sleep(0.05)   # stuck calls return and free their slots
+        assert self.rag.retrieve("Bernoulli equation", subject_filter="Physics")["mode"] == "hybrid"
+
+    def test_lexical_fallback_when_a_shard_hangs(self, monkeypatch):
+        import threading
+        from rag_engine import RAGEngine, settings
+        self.rag.add_document("Bernoulli " + "unrelated biology filler words " * 10,
+                              {"filename": "bio.txt", "subject": "Biology"})
+        release = threading.Event()
+        query_shard = RAGEngine._query_shard
+
+        def stuck(collection, embedding, n_results):
+            if collection.metadata["subject"] == "Biology":
+                release.wait(5)
+            return query_shard(collection, embedding, n_results)
+
+        monkeypatch.setattr(self.rag, "_query_shard", stuck)
+        monkeypatch.setattr(settings, "shard_query_timeout_s", 0.05)
+        try:
+            result = self.rag.retrieve("Bernoulli equation")
+        finally:
+            release.set()
+        assert result["mode"] == "lexical"
+        assert "Bernoulli" in result["chunks"][0]["text"]
+
+    def test_index_follows_delete(self):
+        self.rag.delete_document(self.doc_id)
+        assert self.rag.lexical_index.count() == 0
+
+    def test_backfill_from_existing_store(self, tmp_path):
+        from rag_engine import RAGEngine
+        self.rag.lexical_index.remove_document(self.doc_id)
+        reopened = RAGEngine(persist_dir=str(tmp_path / "test_chroma"))
+        assert reopened.lexical_index.count() == reopened.count_chunks()
@@ -0,0 +1,101 @@
+"""
+tests/test_metrics.py — Unit tests for Prometheus metrics and stage timing
+Run: pytest tests/ -v
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+from async_storage import AsyncStore, InstrumentedExecutor
+
+
+class TestMetricTypes:
+    def test_counter_and_gauge_render(self):
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter("t_calls_total", "Calls.", ("kind",)))
+        gauge = registry.register(metrics.Gauge("t_busy", "Busy workers."))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        text = registry.render()
+        assert "# TYPE t_calls_total counter" in text
+        assert 't_calls_total{kind="a"} 3' in text
+        assert "t_busy 1" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = metrics.Histogram("t_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            hist.observe(value, op="read")
+
+        lines = hist.render()
+        assert 't_seconds_bucket{op="read",le="0.1"} 2' in lines   # le is inclusive
+        assert 't_seconds_bucket{op="read",le="1"} 3' in lines
+        assert 't_seconds_bucket{op="read",le="+Inf"} 4' in lines
+        assert 't_seconds_count{op="read"} 4' in lines
+        assert hist.count(op="read") == 4
+
+    def test_wrong_labels_rejected(self):
+        counter = metrics.Counter("t_total", "x", ("kind",))
+        try:
+            counter.inc(other="a")
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    def test_collector_families(self):
+        registry = metrics.Registry()
+        registry.add_collector(lambda: [("t_queue", "gauge", "Depth.", [({"pool": "rag"}, 4)])])
+        assert 't_queue{pool="rag"} 4' in registry.render()
+
+
+class TestStageTiming:
+    def test_server_timing_header_and_histogram(self):
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            with metrics.stage("lookup"):
+                await asyncio.sleep(0.01)
+            return {"id": item_id}
+
+        app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
+        before = metrics.STAGE_SECONDS.count(route="/items/{item_id}", stage="lookup")
+
+        response = TestClient(app).get("/items/42")
+        assert response.headers["server-timing"].startswith("lookup;dur=")
+        # Labelled by route template, not the raw path
+        assert metrics.STAGE_SECONDS.count(route="/items/{item_id}", stage="lookup") == before + 1
+        assert metrics.REQUESTS_IN_FLIGHT.value(route="/items/{item_id}") == 0
+
+    def test_stage_outside_request_is_background(self):
+        before = metrics.STAGE_SECONDS.count(route="background", stage="t_job")
+        with metrics.stage("t_job"):
+            pass
+        assert metrics.STAGE_SECONDS.count(route="background", stage="t_job") == before + 1
+
+    def test_stages_in_storage_threads_are_attributed(self):
+        class Component:
+            def read(self):
+                with metrics.stage("db_read"):
+                    return 1
+
+        store = AsyncStore(Component(), InstrumentedExecutor("metrics-test", max_workers=1))
+        app = FastAPI()
+
+        @app.get("/read")
+        async def read():
+            return {"value": await store.read()}
+
+        app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
+        response = TestClient(app).get("/read")
+        assert "db_read;dur=" in response.headers["server-timing"]
@@ -0,0 +1,130 @@
+"""
+tests/test_quiz_pool.py — Unit tests for quiz parsing, the question bank
+and the pre-generated quiz pool
+Run: pytest tests/ -v
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from async_storage import AsyncStore, InstrumentedExecutor
+from quiz_pool import QuizPool, QuizUnavailableError, parse_quiz, validate_question
+
+
+def question(i, topic="optics"):
+    return {
+        "questionText": f"{topic} question {i}?",
+        "options": ["A", "B", "C", "D"],
+        "correctAnswerIndex": i % 4,
+        "explanation": "Because.",
+    }
+
+
+def llm_output(questions):
+    return "```json\n" + json.dumps({"questions": questions}) + "\n```"
+
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    monkeypatch.setattr('quiz_pool.DB_PATH', str(tmp_path / "quiz.db"))
+    from quiz_pool import QuizBank
+    quiz_bank = QuizBank(max_per_topic=8)
+    yield quiz_bank
+    quiz_bank.close()
+
+
+class TestParsing:
+    def test_fenced_and_python_quoted_output(self):
+        assert parse_quiz(llm_output([question(1)])) == [question(1)]
+        legacy = "Sure! {'questions': [{'questionText': 'Q?', 'options': ['x', 'y'], 'correctAnswerIndex': 1}]}"
+        assert parse_quiz(legacy)[0]["correctAnswerIndex"] == 1
+
+    def test_invalid_questions_are_dropped(self):
+        bad = [
+            {**question(0), "correctAnswerIndex": 7},
+            {**question(1), "options": ["same", "Same"]},
+            {**question(2), "questionText": ""},
+            {"question": "Alt keys?", "options": ["p", "q", "r"], "answer": "q"},
+        ]
+        assert parse_quiz(json.dumps(bad)) == [validate_question(bad[3])]
+        assert validate_question(bad[3])["correctAnswerIndex"] == 1
+        with pytest.raises(ValueError):
+            parse_quiz("I cannot help with that.")
+
+
+class TestQuizBank:
+    def test_no_repeats_within_session(self, bank):
+        assert bank.add("optics", [question(i) for i in range(5)]) == 5
+        assert bank.add("optics", [question(0)]) == 0          # already pooled
+        first, left = bank.take("optics", "s1", 3)
+        second, _ = bank.take("optics", "s1", 3)
+        assert left == 2 and len(second) == 2
+        assert not {q["questionText"] for q in first} & {q["questionText"] for q in second}
+        assert len(bank.take("optics", "s2", 5)[0]) == 5       # other sessions unaffected
+
+    def test_persisted_and_capped(self, bank, tmp_path):
+        bank.add("optics", [question(i) for i in range(10)])
+        from quiz_pool import QuizBank
+        reopened = QuizBank(max_per_topic=8)
+        questions, _ = reopened.take("optics", "s", 10)
+        assert sorted(q["questionText"] for q in questions) == sorted(
+            question(i)["questionText"] for i in range(2, 10)   # oldest two evicted
+        )
+        reopened.close()
+
+    def test_resident_topics_are_capped(self, bank):
+        bank.max_topics = 2
+        for topic in ("optics", "waves", "optics", "heat"):
+            bank.add(topic, [question(1, topic)])
+        assert list(bank._topics) == ["optics", "heat"]          # "waves" least recent
+        questions, _ = bank.take("waves", "s", 5)                 # reloaded from SQLite
+        assert [q["questionText"] for q in questions] == ["waves question 1?"]
+        assert bank.stats()["topics"] == 2
+
+
+class TestQuizPool:
+    @pytest.fixture
+    def store(self, bank):
+        executor = InstrumentedExecutor("quiz", 1)
+        yield AsyncStore(bank, executor)
+        executor.shutdown()
+
+    def test_cold_topic_then_pool_then_refill(self, store):
+        calls = []
+
+        async def generate(topic, count):
+            start = len(calls) * count
+            calls.append(topic)
+            return llm_output([question(i, topic) for i in range(start, start + count)])
+
+        async def scenario():
+            pool = QuizPool(store, generate, batch_size=4, low_watermark=2)
+            cold = await pool.get_quiz("s", "Optics!", 3)
+            warm = await pool.get_quiz("s2", "optics", 2)
+            await asyncio.gather(*pool._refilling.values())
+            return pool, cold, warm
+
+        pool, cold, warm = asyncio.run(scenario())
+        assert not cold["from_pool"] and len(cold["questions"]) == 3
+        assert warm["from_pool"] and cold["topic"] == warm["topic"] == "optics"
+        # s was left with 1 unseen (< watermark 2), so a refill ran in the background
+        assert calls == ["optics", "optics"]
+        assert pool.stats()["served_from_pool"] == 1
+
+    def test_unusable_generations_fail_cleanly(self, store):
+        async def generate(topic, count):
+            return "[Gemini Error] quota exceeded"
+
+        async def scenario():
+            pool = QuizPool(store, generate, max_attempts=2)
+            with pytest.raises(QuizUnavailableError):
+                await pool.get_quiz("s", "optics", 3)
+            return pool
+
+        assert asyncio.run(scenario()).stats()["invalid_generations"] >= 2
@@ -6,6 +6,8 @@ Run: pytest tests/ -v
 import pytest
 import sys
 import os
+import json
+from collections import Counter
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
@@ -14,9 +16,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 class TestRAGEngine:
     @pytest.fixture(autouse=True)
-    def setup(self, tmp_path):
+    def setup(self, tmp_path, monkeypatch, fake_embed):
         from rag_engine import RAGEngine
         self.rag = RAGEngine(persist_dir=str(tmp_path / "test_chroma"))
+        monkeypatch.setattr(self.rag, "_embed", fake_embed)
 
     def test_chunking_basic(self):
         """Chunks should be non-empty and respect min word count."""
@@ -170,6 +173,51 @@ class TestInsightTracker:
         assert "Physics" in subjects
         assert "Mathematics" in subjects
 
+    def test_topic_aggregates_match_question_scan(self):
+        questions = [
+            "Explain Newton's laws of motion", "What is integration by parts?",
+            "Newton's laws and friction", "Integration of motion equations",
+        ]
+        for i in range(40):
+            self.tracker.record_question(f"s{i % 3}", questions[i % len(questions)], "Physics")
+
+        expected = Counter()
+        session = Counter()
+        for i in range(40):
+            keywords = self.tracker._extract_keywords(questions[i % len(questions)])
+            expected.update(keywords)
+            if i % 3 == 0:
+                session.update(keywords)
+        top = {t["topic"]: t["count"] for t in self.tracker.get_global_top_topics(fresh=True)}
+        assert top == dict(expected.most_common(10))
+        frequent = {t["topic"]: t["count"] for t in self.tracker.get_frequent_topics("s0")}
+        assert frequent == dict(session.most_common(8))
+
+    def test_backfill_from_legacy_questions(self, tmp_path, monkeypatch):
+        import sqlite3
+        import insight_tracker
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE questions (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, "
+                     "question TEXT, subject TEXT, keywords TEXT, timestamp TEXT)")
+        conn.executemany(
+            "INSERT INTO questions (session_id, question, subject, keywords, timestamp) VALUES (?,?,?,?,?)",
+            [("old", "q", "Physics", json.dumps(["gravity", "orbits"]), "t")] * 3
+            + [("old", "q", "Physics", json.dumps(["gravity"]), "t")]
+        )
+        conn.commit()
+        conn.close()
+
+        monkeypatch.setattr("insight_tracker.DB_PATH", path)
+        tracker = insight_tracker.InsightTracker()
+        assert tracker.get_frequent_topics("old") == [
+            {"topic": "gravity", "count": 4}, {"topic": "orbits", "count": 3}
+        ]
+        tracker.record_question("old", "Why do orbits decay?", "Physics")
+        assert tracker.get_global_top_topics(fresh=True)[1] == {"topic": "orbits", "count": 4}
+        # Re-opening does not backfill twice
+        assert insight_tracker.InsightTracker().get_global_top_topics()[0]["count"] == 4
+
 
 # ── Helper Tests ──────────────────────────────────────────────────────────────
 
@@ -190,3 +238,119 @@ class TestHelpers:
         assert is_vague("help me") == True
         assert is_vague("Explain Newton's Second Law of Motion in detail") == False
         assert is_vague("What is the formula for kinetic energy and how is it derived?") == False
+
+
+# ── Streaming Ingestion Tests ─────────────────────────────────────────────────
+
+class TestStreamingIngestion:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        from rag_engine import RAGEngine
+        self.rag = RAGEngine(persist_dir=str(tmp_path / "test_chroma"))
+        self.tmp_path = tmp_path
+
+    def test_page_stream_matches_whole_text(self):
+        """Chunking page by page should give the same chunks as the joined text."""
+        path = os.path.join(os.path.dirname(__file__), '..', 'sample_syllabus.txt')
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        # Arbitrary cut points, like extracted PDF pages or file blocks
+        pages = [text[i:i + 333] for i in range(0, len(text), 333)]
+        streamed = list(self.rag._chunk_pages(pages))
+        whole = self.rag._chunk_text(text)
+        assert streamed == whole
+        assert [(c.start, c.end) for c in streamed] == [(c.start, c.end) for c in whole]
+        assert all(text[c.start:c.end] == c for c in whole)
+
+    def test_text_blocks_do_not_split_words(self):
+        from document_reader import iter_text_blocks
+        path = self.tmp_path / "doc.txt"
+        path.write_text("alpha beta gamma delta " * 200, encoding="utf-8")
+        blocks = list(iter_text_blocks(str(path), block_chars=37))
+        assert "".join(blocks) == path.read_text(encoding="utf-8")
+        assert all(b.endswith((" ", "\n")) for b in blocks[:-1])
+
+
+# ── Document Replacement Tests ────────────────────────────────────────────────
+
+class TestDocumentReplace:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch, fake_embed):
+        from rag_engine import RAGEngine
+        self.rag = RAGEngine(persist_dir=str(tmp_path / "test_chroma"))
+        self.embedded = []
+
+        def embed(texts, task_type):
+            self.embedded.extend(texts)
+            return fake_embed(texts, task_type)
+
+        monkeypatch.setattr(self.rag, "_embed", embed)
+
+    def _sentences(self, n, offset=0):
+        return [f"Sentence {i + offset} covers idea {i + offset} with enough filler words to count." for i in range(n)]
+
+    def test_only_changed_chunks_are_embedded(self):
+        original = self._sentences(120)
+        doc_id = self.rag.add_document(" ".join(original), {"filename": "a.txt", "subject": "Physics"})
+        self.embedded.clear()
+
+        # Append new material: earlier chunks are untouched
+        changes = self.rag.replace_document(
+            doc_id, [" ".join(original + self._sentences(30, offset=500))],
+            {"filename": "a.txt", "subject": "Physics"}
+        )
+        assert changes["kept"] > 0
+        assert changes["added"] == len(self.embedded)
+        assert changes["added"] < self.rag.get_chunk_count(doc_id)
+
+        stored = self.rag.shard("Physics").get(where={"doc_id": doc_id})["metadatas"]
+        indexes = sorted(m["chunk_index"] for m in stored)
+        assert indexes == list(range(len(stored)))
+        assert {m["chunk_total"] for m in stored} == {len(stored)}
+        assert self.rag.get_chunk_count(doc_id) == len(stored)
+
+    def _stored_texts(self, doc_id):
+        docs = self.rag.shard("Physics").get(where={"doc_id": doc_id})["documents"]
+        lexical = [r[0] for r in self.rag.lexical_index.conn.execute(
+            "SELECT text FROM chunks WHERE doc_id = ?", (doc_id,))]
+        return docs, lexical
+
+    def test_case_only_edit_is_stored(self):
+        text = "Acids have a low ph value and bases have a high ph value on the scale used in school chemistry labs."
+        doc_id = self.rag.add_document(text, {"filename": "a.txt", "subject": "Physics"})
+        self.embedded.clear()
+
+        changes = self.rag.replace_document(doc_id, [text.replace("ph", "pH")], {"filename": "a.txt", "subject": "Physics"})
+        assert changes["kept"] == 0 and changes["added"] == 1
+        assert self.embedded == [text.replace("ph", "pH")]
+        docs, lexical = self._stored_texts(doc_id)
+        assert docs == lexical == [text.replace("ph", "pH")]
+
+    def test_whitespace_only_edit_keeps_vector_but_rewrites_text(self):
+        text = "Acids have a low pH value and bases have a high pH value on the scale used in school chemistry labs."
+        doc_id = self.rag.add_document(text, {"filename": "a.txt", "subject": "Physics"})
+        self.embedded.clear()
+
+        edited = text.replace("low pH", "low  pH")
+        changes = self.rag.replace_document(doc_id, [edited], {"filename": "a.txt", "subject": "Physics"})
+        assert changes["kept"] == 1 and changes["added"] == 0
+        assert self.embedded == []
+        docs, lexical = self._stored_texts(doc_id)
+        assert docs == lexical == [edited]
+
+    def test_duplicate_lookup_follows_replace_and_delete(self):
+        meta = {"filename": "a.txt", "subject": "Physics", "file_hash": "h1"}
+        doc_id = self.rag.add_document(" ".join(self._sentences(10)), meta)
+        assert self.rag.find_duplicate("h1", "Physics")["doc_id"] == doc_id
+        assert self.rag.find_duplicate("h1", "Chemistry") is None
+
+        self.rag.replace_document(doc_id, [" ".join(self._sentences(12))], {**meta, "file_hash": "h2"})
+        assert self.rag.find_duplicate("h1", "Physics") is None
+        assert self.rag.find_duplicate("h2", "Physics")["doc_id"] == doc_id
+
+        self.rag.delete_document(doc_id)
+        assert self.rag.find_duplicate("h2", "Physics") is None
+
+    def test_unknown_document(self):
+        with pytest.raises(KeyError):
+            self.rag.replace_document("missing", ["text"], {})
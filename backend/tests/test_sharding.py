@@ -0,0 +1,62 @@
+"""
+tests/test_sharding.py — Per-subject vector store shards
+Run: pytest tests/ -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+PHYSICS = "Kinematics describes displacement, velocity and acceleration of moving bodies over time. " * 5
+BIOLOGY = "Mitosis divides one cell nucleus into two identical daughter nuclei during growth. " * 5
+
+
+class TestSharding:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch, fake_embed):
+        from rag_engine import RAGEngine
+        self.persist_dir = str(tmp_path / "chroma")
+        self.rag = RAGEngine(persist_dir=self.persist_dir)
+        monkeypatch.setattr(self.rag, "_embed", fake_embed)
+        self.physics = self.rag.add_document(PHYSICS, {"filename": "p.txt", "subject": "Physics"})
+        self.biology = self.rag.add_document(BIOLOGY, {"filename": "b.txt", "subject": "Biology"})
+
+    def test_documents_routed_to_subject_shards(self):
+        assert sorted(self.rag.list_subjects()) == ["Biology", "Physics"]
+        assert self.rag.count_chunks("Physics") == self.rag.get_chunk_count(self.physics)
+        assert self.rag.shard("Physics").name != self.rag.shard("Biology").name
+
+    def test_filtered_query_stays_in_shard(self):
+        chunks = self.rag.retrieve("mitosis cell nucleus", subject_filter="Physics")["chunks"]
+        assert all(c["subject"] == "Physics" for c in chunks)
+
+    def test_general_query_fans_out(self):
+        chunks = self.rag.retrieve("mitosis cell nucleus", subject_filter="General")["chunks"]
+        assert chunks and chunks[0]["doc_id"] == self.biology
+
+    def test_delete_routes_to_shard(self):
+        self.rag.delete_document(self.physics)
+        assert self.rag.count_chunks("Physics") == 0
+        assert self.rag.count_chunks("Biology") > 0
+
+    def test_replace_with_new_subject_moves_chunks(self):
+        self.rag.replace_document(self.physics, [PHYSICS], {"filename": "p.txt", "subject": "Mechanics"})
+        assert self.rag.count_chunks("Physics") == 0
+        assert self.rag.count_chunks("Mechanics") == self.rag.get_chunk_count(self.physics)
+
+    def test_legacy_collection_is_migrated(self, fake_embed):
+        from rag_engine import RAGEngine
+        legacy = self.rag.client.get_or_create_collection(name=self.rag.collection_prefix)
+        legacy.add(
+            ids=["old_0"],
+            embeddings=fake_embed([BIOLOGY], "retrieval_document"),
+            documents=[BIOLOGY],
+            metadatas=[{"doc_id": "old", "subject": "Chemistry", "filename": "c.txt", "chunk_index": 0}],
+        )
+        reopened = RAGEngine(persist_dir=self.persist_dir)
+        assert reopened.count_chunks("Chemistry") == 1
+        assert reopened.get_document("old")["subject"] == "Chemistry"
+        assert reopened.lexical_index.count() == reopened.count_chunks()
+        assert self.rag.collection_prefix not in [c.name for c in reopened.client.list_collections()]
@@ -0,0 +1,124 @@
+"""
+tests/test_single_flight.py — Unit tests for single-flight LLM call sharing
+Run: pytest tests/ -v
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_result(self):
+        shared = []
+        flight = SingleFlight(on_shared=shared.append)
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"text": "answer"}
+
+        async def scenario():
+            results = await asyncio.gather(*(flight.call("k", upstream) for _ in range(5)))
+            later = await flight.call("k", upstream)   # not overlapping: a fresh call
+            return results, later
+
+        results, later = asyncio.run(scenario())
+        assert all(r == {"text": "answer"} for r in results) and later == {"text": "answer"}
+        assert len(calls) == 2
+        assert shared == ["complete"] * 4
+        assert flight.in_flight() == {"complete": 0, "stream": 0}
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def scenario():
+            leader = asyncio.ensure_future(flight.call("k", upstream))
+            follower = asyncio.ensure_future(flight.call("k", upstream))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(scenario()) == "done"
+
+    def test_streams_fan_out_and_late_joiners_replay(self):
+        shared = []
+        flight = SingleFlight(on_shared=shared.append)
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            for piece in ("a", "b", "c"):
+                await asyncio.sleep(0.005)
+                yield piece
+
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return "".join([p async for p in flight.stream("k", upstream)])
+
+        async def scenario():
+            return await asyncio.gather(collect(0), collect(0), collect(0.007))
+
+        assert asyncio.run(scenario()) == ["abc", "abc", "abc"]
+        assert len(calls) == 1
+        assert shared == ["stream", "stream"]
+
+    def test_stream_stops_when_every_subscriber_leaves(self):
+        flight = SingleFlight()
+        produced = []
+
+        async def upstream():
+            for i in range(100):
+                produced.append(i)
+                await asyncio.sleep(0.001)
+                yield str(i)
+
+        async def scenario():
+            stream = flight.stream("k", upstream)
+            assert await stream.__anext__() == "0"
+            await stream.aclose()
+            await asyncio.sleep(0.02)
+            # A new caller gets a fresh stream, not the abandoned one's tail
+            return await flight.stream("k", upstream).__anext__()
+
+        assert asyncio.run(scenario()) == "0"
+        assert len(produced) < 50
+
+
+class TestAIClientSharing:
+    def test_identical_prompts_share_and_different_settings_do_not(self, monkeypatch):
+        from ai_client import AIClient
+        import metrics
+
+        client = AIClient()
+        calls = []
+
+        async def fake_complete(prompt, max_tokens):
+            calls.append((prompt, max_tokens))
+            await asyncio.sleep(0.01)
+            return {"text": prompt.upper(), "web_sources": []}
+
+        monkeypatch.setattr(client, "_complete", fake_complete)
+        before = metrics.LLM_COALESCED.value(mode="complete")
+
+        async def scenario():
+            return await asyncio.gather(
+                client.complete("quiz on optics"),
+                client.complete("quiz on optics"),
+                client.complete("quiz on optics", max_tokens=200),
+            )
+
+        results = asyncio.run(scenario())
+        assert [r["text"] for r in results] == ["QUIZ ON OPTICS"] * 3
+        assert results[0]["web_sources"] is not results[1]["web_sources"]
+        assert sorted(calls) == [("quiz on optics", 200), ("quiz on optics", 1500)]
+        assert metrics.LLM_COALESCED.value(mode="complete") == before + 1
@@ -0,0 +1,112 @@
+"""
+tests/test_sqlite_db.py — Unit tests for the shared SQLite access layer
+Run: pytest tests/ -v
+"""
+
+import sqlite3
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlite_db import SQLiteDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+class TestConnections:
+    def test_wal_and_pragmas(self, db):
+        conn = db.connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1   # NORMAL
+
+    def test_one_connection_per_thread(self, db):
+        main = db.connection()
+        assert db.connection() is main
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not main
+
+    def test_reads_not_blocked_by_open_write(self, db):
+        db.migrate([lambda c: c.execute("CREATE TABLE t (v INTEGER)")])
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+        writer = db.connection()
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO t VALUES (2)")
+
+        seen = []
+        reader = threading.Thread(
+            target=lambda: seen.append(db.connection().execute("SELECT COUNT(*) FROM t").fetchone()[0])
+        )
+        reader.start()
+        reader.join(timeout=2)
+        writer.commit()
+        assert seen == [1]    # snapshot read, not a busy wait on the writer
+
+
+class TestMigrations:
+    def test_applied_once_in_order(self, db):
+        calls = []
+        migrations = [
+            lambda c: (calls.append(1), c.execute("CREATE TABLE a (x)")),
+            lambda c: (calls.append(2), c.execute("CREATE INDEX idx_a ON a(x)")),
+        ]
+        assert db.migrate(migrations) == 2
+        assert db.migrate(migrations) == 2
+        assert calls == [1, 2]
+
+    def test_failed_migration_rolls_back(self, db):
+        def broken(conn):
+            conn.execute("CREATE TABLE b (x)")
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            db.migrate([lambda c: c.execute("CREATE TABLE a (x)"), broken])
+        assert db.schema_version() == 1
+        tables = {r[0] for r in db.connection().execute("SELECT name FROM sqlite_master")}
+        assert "a" in tables and "b" not in tables
+
+
+class TestStoreSchemas:
+    def test_legacy_memory_db_gets_session_index(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "memory.db")
+        legacy = sqlite3.connect(path)
+        legacy.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, student_name TEXT, subject TEXT, created_at TEXT)")
+        legacy.execute("CREATE TABLE turns (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, question TEXT, "
+                       "answer TEXT, turn_type TEXT, topic TEXT, timestamp TEXT)")
+        legacy.execute("INSERT INTO turns (session_id, question) VALUES ('s', 'kept')")
+        legacy.commit()
+        legacy.close()
+
+        monkeypatch.setattr('memory_manager.DB_PATH', path)
+        from memory_manager import ConversationMemory
+        memory = ConversationMemory()
+        plan = memory.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT 6", ("s",)
+        ).fetchall()
+        assert any("idx_turns_session" in row[-1] for row in plan)
+        assert memory.get_history("s")[0]["question"] == "kept"
+        memory.close()
+
+    def test_insight_queries_use_session_indexes(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('insight_tracker.DB_PATH', str(tmp_path / "insights.db"))
+        from insight_tracker import InsightTracker
+        tracker = InsightTracker()
+        for sql in (
+            "SELECT COUNT(*) FROM questions WHERE session_id = ?",
+            "SELECT topic, COUNT(*) FROM confusion_reports WHERE session_id = ? GROUP BY topic",
+        ):
+            plan = tracker.conn.execute(f"EXPLAIN QUERY PLAN {sql}", ("s",)).fetchall()
+            assert any("USING" in row[-1] and "INDEX" in row[-1] for row in plan), plan
+        tracker.close()
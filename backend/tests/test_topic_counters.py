@@ -0,0 +1,113 @@
+"""
+tests/test_topic_counters.py — Unit tests for per-session topic counters
+and weak-subject detection
+Run: pytest tests/ -v
+"""
+
+import sqlite3
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import settings
+from topic_counters import TopicCounters, bump, current
+
+
+class TestTopicCounters:
+    def test_bump_and_decay(self):
+        counter = bump(None, 100.0, decay_s=10)
+        counter = bump(counter, 105.0, decay_s=10)
+        assert counter == (2, 105.0)
+        assert current(counter, 115.0, decay_s=10) == 2
+        assert current(counter, 116.0, decay_s=10) == 0
+        assert bump(counter, 116.0, decay_s=10) == (1, 116.0)
+        assert current(counter, 1e9, decay_s=0) == 2
+
+    def test_write_through_after_fill(self):
+        counters = TopicCounters()
+        assert counters.get("s", "t", 0.0) is None
+        token = counters.begin_fill("s")
+        counters.finish_fill("s", token, {"t": (1, 0.0)})
+        counters.record("s", "t", 1.0)
+        counters.record("s", "other", 1.0)
+        assert counters.get("s", "t", 2.0) == 2
+        assert counters.get("s", "missing", 2.0) == 0
+
+    def test_write_during_fill_prevents_stale_install(self):
+        counters = TopicCounters()
+        token = counters.begin_fill("s")
+        counters.record("s", "t", 1.0)
+        counters.finish_fill("s", token, {})
+        assert counters.get("s", "t", 1.0) is None
+
+    def test_lru_eviction(self):
+        counters = TopicCounters(max_sessions=2)
+        for session in ("a", "b", "c"):
+            counters.finish_fill(session, counters.begin_fill(session), {})
+        assert counters.get("a", "t", 0.0) is None
+        assert counters.stats()["evictions"] == 1
+
+
+class TestWeakTopics:
+    @pytest.fixture
+    def db_path(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "memory.db")
+        monkeypatch.setattr('memory_manager.DB_PATH', path)
+        return path
+
+    def test_counts_beyond_history_window(self, db_path):
+        from memory_manager import ConversationMemory
+        memory = ConversationMemory()
+        question = "Explain photosynthesis light reactions"
+        topic = memory._extract_topic(question)
+        memory.add_turn("s", question, "A")
+        assert memory.topic_count("s", topic) == 1   # fill sees the queued turn
+        for i in range(20):
+            memory.add_turn("s", f"Unrelated question number {i}", "A")
+        memory.add_turn("s", question, "A")
+        assert memory.topic_count("s", topic) == 2
+        assert memory.is_weak_topic("s", topic)
+        assert not memory.is_weak_topic("other", topic)
+        memory.close()
+
+        reopened = ConversationMemory()              # persisted, not just cached
+        assert reopened.topic_count("s", topic) == 2
+        assert reopened.topic_counters.stats()["misses"] == 1
+        reopened.close()
+
+    def test_decay_window(self, db_path, monkeypatch):
+        monkeypatch.setattr(settings, "weak_topic_decay_s", 60)
+        monkeypatch.setattr('memory_manager.time.time', lambda: clock[0])
+        from memory_manager import ConversationMemory
+        clock = [1000.0]
+        memory = ConversationMemory()
+        memory.add_turn("s", "Explain photosynthesis", "A")
+        memory.add_turn("s", "Explain photosynthesis", "A")
+        assert memory.topic_count("s", "photosynthesis") == 2
+        clock[0] += 61
+        assert memory.topic_count("s", "photosynthesis") == 0
+        memory.add_turn("s", "Explain photosynthesis", "A")
+        memory.writes.flush(timeout=5)
+        row = memory.conn.execute("SELECT count FROM topic_counts WHERE session_id = 's'").fetchone()
+        assert row[0] == 1 and memory.topic_count("s", "photosynthesis") == 1
+        memory.close()
+
+    def test_legacy_turns_are_backfilled(self, db_path):
+        legacy = sqlite3.connect(db_path)
+        legacy.execute("CREATE TABLE turns (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, question TEXT, "
+                       "answer TEXT, turn_type TEXT, topic TEXT, timestamp TEXT)")
+        legacy.executemany(
+            "INSERT INTO turns (session_id, question, topic, timestamp) VALUES ('s', 'q', ?, ?)",
+            [("optics", "2020-01-01T00:00:00.123456+00:00")] * 3 + [("waves", None)],
+        )
+        legacy.commit()
+        legacy.close()
+
+        from memory_manager import ConversationMemory
+        memory = ConversationMemory()
+        rows = dict(memory.conn.execute("SELECT topic, count FROM topic_counts").fetchall())
+        assert rows == {"optics": 3, "waves": 1}
+        memory.close()
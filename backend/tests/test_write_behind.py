@@ -0,0 +1,143 @@
+"""
+tests/test_write_behind.py — Unit tests for the write-behind queue and the
+read-your-writes guarantees of the stores that use it
+Run: pytest tests/ -v
+"""
+
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import settings
+from sqlite_db import SQLiteDatabase
+from write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "queue.db"))
+    database.migrate([lambda c: c.execute("CREATE TABLE t (v INTEGER NOT NULL)")])
+    yield database
+    database.close()
+
+
+def insert_rows(conn, values):
+    conn.executemany("INSERT INTO t VALUES (?)", [(v,) for v in values])
+
+
+def count(db):
+    return db.connection().execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+class TestWriteBehindQueue:
+    def test_rows_are_grouped_into_batches(self, db):
+        queue = WriteBehindQueue("t", db, insert_rows, flush_interval_s=0.05, max_batch=100)
+        for i in range(250):
+            queue.submit(i)
+        assert queue.flush(timeout=5)
+        assert count(db) == 250
+        assert queue.stats()["batches"] < 250 / 10
+        queue.close()
+
+    def test_barrier_waits_only_for_key(self, db):
+        queue = WriteBehindQueue("t", db, insert_rows, flush_interval_s=60)
+        queue.submit(1, key="a")
+        # Without a barrier the row would sit out the 60 s interval
+        assert queue.barrier("a", timeout=5)
+        assert count(db) == 1
+        assert queue.barrier("never-written", timeout=0)
+        queue.close()
+
+    def test_close_flushes_pending_rows(self, db):
+        queue = WriteBehindQueue("t", db, insert_rows, flush_interval_s=60)
+        for i in range(10):
+            queue.submit(i)
+        queue.close()
+        assert count(db) == 10
+        queue.submit(11)              # a closed queue restarts its writer on demand
+        queue.close()
+        assert count(db) == 11
+
+    def test_bad_row_does_not_drop_batch(self, db):
+        settled = []
+        queue = WriteBehindQueue(
+            "t", db, insert_rows, on_commit=settled.extend, flush_interval_s=60, max_batch=3
+        )
+        for value in (1, None, 3):    # NULL violates NOT NULL
+            queue.submit(value)
+        assert queue.flush(timeout=5)
+        assert count(db) == 2
+        assert queue.stats()["failed"] == 1
+        assert settled == [1, None, 3]
+        queue.close()
+
+
+class TestReadYourWrites:
+    @pytest.fixture(autouse=True)
+    def slow_flush(self, monkeypatch):
+        # Long interval: reads must see writes that are still queued
+        monkeypatch.setattr(settings, "write_behind_flush_ms", 60_000)
+
+    def test_history_includes_queued_turns(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('memory_manager.DB_PATH', str(tmp_path / "memory.db"))
+        from memory_manager import ConversationMemory
+        memory = ConversationMemory()
+        for i in range(5):
+            memory.add_turn("s", f"Question {i}", f"Answer {i}")
+        assert memory.writes.stats()["rows"] == 0          # nothing committed yet
+        assert [h["question"] for h in memory.get_history("s", last_n=3)] == [
+            "Question 2", "Question 3", "Question 4"
+        ]
+        memory.writes.flush(timeout=5)
+        memory.add_turn("s", "Question 5", "Answer 5")
+        history = memory.get_history("s", last_n=10)
+        assert [h["question"] for h in history] == [f"Question {i}" for i in range(6)]
+        assert memory.get_history("other") == []
+        memory.close()
+
+    def test_history_has_no_duplicates_during_commit(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('memory_manager.DB_PATH', str(tmp_path / "memory.db"))
+        monkeypatch.setattr(settings, "write_behind_flush_ms", 1)
+        from memory_manager import ConversationMemory
+        memory = ConversationMemory()
+        stop = threading.Event()
+
+        def writer():
+            for i in range(200):
+                memory.add_turn("s", f"Q{i}", "A")
+            stop.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not stop.is_set():
+            questions = [h["question"] for h in memory.get_history("s", last_n=50)]
+            assert len(questions) == len(set(questions))
+            assert questions == sorted(questions, key=lambda q: int(q[1:]))
+        thread.join()
+        assert len(memory.get_history("s", last_n=500)) == 200
+        memory.close()
+
+    def test_insights_barrier(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('insight_tracker.DB_PATH', str(tmp_path / "insights.db"))
+        from insight_tracker import InsightTracker
+        tracker = InsightTracker()
+        tracker.record_question("s", "What is momentum conservation?", "Physics")
+        assert tracker.get_question_count("s") == 1
+        assert tracker.get_subjects("s") == ["Physics"]
+        assert tracker.get_global_top_topics(fresh=True)[0]["count"] == 1
+        tracker.close()
+
+    def test_global_topics_do_not_force_a_flush(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('insight_tracker.DB_PATH', str(tmp_path / "insights.db"))
+        from insight_tracker import InsightTracker
+        tracker = InsightTracker()
+        flushes = []
+        monkeypatch.setattr(tracker.writes, "flush", lambda *a, **k: flushes.append(1))
+        tracker.record_question("s", "What is momentum conservation?", "Physics")
+        tracker.get_global_top_topics()
+        assert flushes == []
+        tracker.close()
@@ -0,0 +1,112 @@
+"""
+Session Topic Counters
+Per-session topic frequencies for weak-subject detection. ConversationMemory
+persists a (session, topic) -> count row with every turn and keeps the
+counts of active sessions here, so "how often has this student asked about
+this topic" is a dictionary lookup instead of a scan over their history.
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+Counter = Tuple[int, float]   # (count, last_seen epoch seconds)
+
+
+def bump(counter: Optional[Counter], now: float, decay_s: float) -> Counter:
+    """
+    Count one more ask at `now`. A repeat that comes more than `decay_s`
+    after the previous ask starts the count over (0 disables decay).
+    Mirrored by the upsert in ConversationMemory._insert_turns.
+    """
+    if counter is None or (decay_s > 0 and now - counter[1] > decay_s):
+        return 1, now
+    return counter[0] + 1, now
+
+
+def current(counter: Optional[Counter], now: float, decay_s: float) -> int:
+    """Asks that still count at `now`."""
+    if counter is None or (decay_s > 0 and now - counter[1] > decay_s):
+        return 0
+    return counter[0]
+
+
+class TopicCounters:
+    """
+    LRU cache of `max_sessions` sessions' topic counters.
+
+    Same consistency scheme as HistoryCache: writes for a cached session are
+    applied here in the same critical section as the write itself, and a
+    fill from the database only installs if no write to that session raced
+    it (`begin_fill` / `finish_fill`).
+    """
+
+    def __init__(self, max_sessions: int = 10000, decay_s: float = 0.0):
+        self.max_sessions = max_sessions
+        self.decay_s = decay_s
+        self.lock = threading.RLock()
+        self._sessions: "OrderedDict[str, Dict[str, Counter]]" = OrderedDict()
+        self._fills: Dict[str, int] = {}
+        self._tokens = itertools.count(1)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: str, topic: str, now: float) -> Optional[int]:
+        """The topic's current count, or None if the session is not cached."""
+        with self.lock:
+            counters = self._sessions.get(session_id)
+            if counters is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return current(counters.get(topic), now, self.decay_s)
+
+    def begin_fill(self, session_id: str) -> int:
+        """Register a database read for `session_id`; returns its token."""
+        with self.lock:
+            token = next(self._tokens)
+            self._fills[session_id] = token
+            return token
+
+    def finish_fill(self, session_id: str, token: int, counters: Dict[str, Counter]):
+        """Install the session's counters as read from the database unless a write raced it."""
+        with self.lock:
+            if self._fills.get(session_id) != token:
+                return
+            del self._fills[session_id]
+            self._sessions[session_id] = dict(counters)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def record(self, session_id: str, topic: str, now: float):
+        """Write-through for a new turn; call while holding `lock` around the write."""
+        with self.lock:
+            self._fills.pop(session_id, None)   # an in-flight fill may predate this write
+            counters = self._sessions.get(session_id)
+            if counters is None:
+                return
+            counters[topic] = bump(counters.get(topic), now, self.decay_s)
+            self._sessions.move_to_end(session_id)
+
+    def invalidate(self, session_id: str):
+        with self.lock:
+            self._fills.pop(session_id, None)
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "sessions": len(self._sessions),
+                "evictions": self.evictions,
+                "max_sessions": self.max_sessions,
+                "decay_s": self.decay_s,
+            }
@@ -0,0 +1,194 @@
+"""
+Write-Behind Queue
+Moves small, frequent SQLite writes off the request path. Callers enqueue
+a row and return immediately; one writer thread per database drains the
+queue and commits many rows per transaction, every `flush_interval_s` or
+as soon as `max_batch` rows are waiting. Write throughput then scales
+with batch size instead of the per-commit cost.
+
+Read-your-writes is the owning store's job, using what the queue offers:
+`barrier(key)` blocks until everything enqueued under `key` (a session)
+is committed, and `on_commit` lets a store drop rows from a pending-write
+overlay once they are visible in the database.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlite_db import SQLiteDatabase
+
+
+class WriteBehindQueue:
+    """
+    `apply(conn, payloads)` writes one batch inside a transaction on the
+    writer thread; `on_commit(payloads)` runs once the batch is settled.
+    A failing batch is retried row by row so one bad row cannot drop its
+    neighbours; rows that still fail are logged, counted and dropped (they
+    are still passed to on_commit, since they will never become visible).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        db: SQLiteDatabase,
+        apply: Callable[[Any, List[Any]], None],
+        on_commit: Optional[Callable[[List[Any]], None]] = None,
+        flush_interval_s: float = 0.05,
+        max_batch: int = 256,
+    ):
+        self.name = name
+        self.db = db
+        self.apply = apply
+        self.on_commit = on_commit
+        self.flush_interval_s = flush_interval_s
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._pending: Deque[Tuple[int, Any, Any]] = deque()   # (seq, key, payload)
+        self._first_enqueued = 0.0
+        self._seq = 0               # last sequence number handed out
+        self._committed = 0         # every seq <= this has been written (or failed)
+        self._last_seq: Dict[Any, int] = {}
+        self._urgent = False
+        self._closing = False
+        self._writer: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.rows = 0
+        self.failed = 0
+        self.max_batch_seen = 0
+
+    # ─── Producer side ───────────────────────────────────────────────────────
+
+    def submit(self, payload: Any, key: Any = None) -> int:
+        """Enqueue one row; returns its sequence number."""
+        with self._cond:
+            if self._closing:
+                raise RuntimeError(f"write-behind queue '{self.name}' is closing")
+            self._ensure_writer()
+            self._seq += 1
+            if not self._pending:
+                self._first_enqueued = time.monotonic()
+            self._pending.append((self._seq, key, payload))
+            if key is not None:
+                self._last_seq[key] = self._seq
+            if len(self._pending) in (1, self.max_batch):
+                self._cond.notify_all()   # writer is idle, or a batch is full
+            return self._seq
+
+    def wait(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Block until row `seq` is committed; asks the writer to flush now."""
+        with self._cond:
+            if self._committed >= seq:
+                return True
+            self._urgent = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._committed >= seq, timeout)
+
+    def barrier(self, key: Any, timeout: Optional[float] = None) -> bool:
+        """Block until every row enqueued under `key` so far is committed."""
+        with self._cond:
+            seq = self._last_seq.get(key, 0)
+        return self.wait(seq, timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row enqueued so far is committed."""
+        with self._cond:
+            seq = self._seq
+        return self.wait(seq, timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Flush what is queued and stop the writer; a later submit starts a new one."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join(timeout)
+        with self._cond:
+            self._closing = False
+            self._writer = None
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "rows": self.rows,
+                "failed": self.failed,
+                "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+                "max_batch": self.max_batch_seen,
+            }
+
+    # ─── Writer thread ───────────────────────────────────────────────────────
+
+    def _ensure_writer(self):
+        # caller holds self._cond
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._run, name=f"write-behind-{self.name}", daemon=True
+            )
+            self._writer.start()
+
+    def _next_batch(self) -> List[Tuple[int, Any, Any]]:
+        with self._cond:
+            while True:
+                if self._pending:
+                    full = len(self._pending) >= self.max_batch
+                    due = self._first_enqueued + self.flush_interval_s - time.monotonic()
+                    if full or due <= 0 or self._urgent or self._closing:
+                        break
+                    self._cond.wait(due)
+                elif self._closing:
+                    return []
+                else:
+                    self._cond.wait()
+            count = min(len(self._pending), self.max_batch)
+            batch = [self._pending.popleft() for _ in range(count)]
+            if self._pending:
+                self._first_enqueued = time.monotonic()
+            else:
+                self._urgent = False
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                break
+            payloads = [payload for _, _, payload in batch]
+            written, failed = self._write(payloads)
+            if self.on_commit is not None:
+                try:
+                    self.on_commit(payloads)
+                except Exception as e:
+                    print(f"[WriteBehind] {self.name}: commit callback failed: {e}")
+            with self._cond:
+                self._committed = batch[-1][0]
+                for _, key, _ in batch:
+                    if key is not None and self._last_seq.get(key, 0) <= self._committed:
+                        self._last_seq.pop(key, None)
+                self.batches += 1
+                self.rows += len(written)
+                self.failed += failed
+                self.max_batch_seen = max(self.max_batch_seen, len(batch))
+                self._cond.notify_all()
+
+    def _write(self, payloads: List[Any]) -> Tuple[List[Any], int]:
+        try:
+            with self.db.transaction() as conn:
+                self.apply(conn, payloads)
+            return payloads, 0
+        except Exception as e:
+            print(f"[WriteBehind] {self.name}: batch of {len(payloads)} failed ({e}); retrying rows")
+        written = []
+        for payload in payloads:
+            try:
+                with self.db.transaction() as conn:
+                    self.apply(conn, [payload])
+                written.append(payload)
+            except Exception as e:
+                print(f"[WriteBehind] {self.name}: dropped row: {e}")
+        return written, len(payloads) - len(written)
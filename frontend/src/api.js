@@ -33,14 +33,77 @@ export const createSession = (studentName, subject) =>
 export const askQuestion = (payload) =>
   client.post('/ask', payload)
 
+// Streaming variant of /ask. Calls handlers.onToken(text) for every answer
+// fragment and handlers.on<Event>(data) for the trailing SSE events
+// (sources, meta, follow_ups, done). Resolves with the full answer text;
+// rejects if the server sends an `error` event (model failed mid-answer).
+export const askQuestionStream = async (payload, handlers = {}) => {
+  const res = await fetch(`${BASE_URL}/ask/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload)
+  })
+  if (!res.ok || !res.body) throw new Error(`Stream failed (${res.status})`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let answer = ''
+
+  const dispatch = (frame) => {
+    let event = 'message'
+    let data = ''
+    for (const line of frame.split('\n')) {
+      if (line.startsWith('event: ')) event = line.slice(7)
+      else if (line.startsWith('data: ')) data += line.slice(6)
+    }
+    const parsed = data ? JSON.parse(data) : {}
+    if (event === 'token') {
+      answer += parsed.text
+      handlers.onToken?.(parsed.text)
+    } else if (event === 'sources') handlers.onSources?.(parsed)
+    else if (event === 'meta') handlers.onMeta?.(parsed)
+    else if (event === 'follow_ups') handlers.onFollowUps?.(parsed.follow_up_suggestions)
+    else if (event === 'done') handlers.onDone?.(answer)
+    else if (event === 'error') throw new Error(parsed.error)
+  }
+
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let idx
+    while ((idx = buffer.indexOf('\n\n')) !== -1) {
+      dispatch(buffer.slice(0, idx))
+      buffer = buffer.slice(idx + 2)
+    }
+  }
+  return answer
+}
+
+// Fetch follow-ups deferred via `defer_follow_ups: true`; `wait` long-polls (s)
+export const getFollowUps = (ticket, wait = 10) =>
+  client.get(`/follow-ups/${ticket}?wait=${wait}`)
+
 // ── Documents ──────────────────────────────────────────────────────────────
 
-export const uploadDocument = (file, subject) => {
+export const getJob = (jobId) => client.get(`/jobs/${jobId}`)
+
+// Uploads are ingested in the background; poll the job until it settles
+// and resolve with the indexed document entry.
+export const uploadDocument = async (file, subject, onProgress) => {
   const form = new FormData()
   form.append('file', file)
-  return client.post(`/upload?subject=${encodeURIComponent(subject)}`, form, {
+  let job = await client.post(`/upload?subject=${encodeURIComponent(subject)}`, form, {
     headers: { 'Content-Type': 'multipart/form-data' }
   })
+  while (job.status === 'queued' || job.status === 'running') {
+    onProgress?.(job)
+    await new Promise((resolve) => setTimeout(resolve, 1000))
+    job = await getJob(job.job_id)
+  }
+  if (job.status === 'failed') throw new Error(job.error || 'Ingestion failed')
+  return job.result
 }
 
 export const listDocuments = () => client.get('/documents')